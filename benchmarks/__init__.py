@@ -0,0 +1,4 @@
+"""
+Performance benchmarks for Fresh-Share Platform
+Run individual benchmarks with: python -m benchmarks.<name>
+"""
@@ -0,0 +1,296 @@
+"""
+Load test for the core API flows
+Seeds clustered synthetic vendors, users and listings across a city, then
+drives register, login, create_listing (with notification fan-out), search
+and claim, either in-process through the Flask test client or against a
+running server. Prints a JSON report with throughput and p50/p95/p99 per
+flow so runs can be compared across commits.
+
+Run with: python -m benchmarks.bench_api [--listings 10000] [--output run.json]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from src.app import create_app
+from src.config import config
+from src.db.synthetic import DEFAULT_BBOX, EXPIRY_PROFILES, SEED_PASSWORD, SyntheticDataGenerator
+from src.models import db, FoodListing
+
+SEED_PREFIX = "bench"
+
+FLOWS = ('register', 'login', 'create_listing', 'search', 'claim')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class TestClientDriver:
+    """Sends requests in-process; one test client per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpDriver:
+    """Sends requests to a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None, token=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        if token:
+            req.add_header("Authorization", f"Bearer {token}")
+        try:
+            with urllib.request.urlopen(req) as response:
+                return response.status, json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+
+def run_flow(name, operation, requests, concurrency):
+    """Run `operation(i)` `requests` times and summarise latency and errors"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(i):
+        nonlocal errors
+        started = time.perf_counter()
+        ok = operation(i)
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(timed, range(requests)))
+    else:
+        for i in range(requests):
+            timed(i)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / wall, 2) if wall else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": round(percentile(latencies, 0.50), 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95), 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 3) if latencies else None,
+    }
+
+
+def seeded_email(role, i):
+    return f"{SEED_PREFIX}-{role}{i}@example.com"
+
+
+def build_flows(driver, args, listing_ids, generator):
+    """Bind each flow to the driver and seeded data"""
+    rng = random.Random(args.seed)
+    run_id = int(time.time())
+    tokens = {}
+
+    def login(email):
+        status, body = driver.request('POST', '/api/auth/login', {
+            "email": email, "password": SEED_PASSWORD
+        })
+        return body["access_token"] if status == 200 else None
+
+    # Log in once per worker slot and role up front so flows time only their own request
+    slots = max(args.concurrency, 1)
+    for role, pool in (("vendor", args.vendors), ("charity", args.users // 2)):
+        for slot in range(slots):
+            tokens[(role, slot)] = login(seeded_email(role, slot % max(pool, 1)))
+
+    def token_for(role, i):
+        return tokens[(role, i % slots)]
+
+    def register(i):
+        latitude, longitude = generator.point()
+        status, _ = driver.request('POST', '/api/auth/register', {
+            "email": f"new-{run_id}-{i}@bench.local",
+            "password": SEED_PASSWORD,
+            "name": f"New user {i}",
+            "role": "individual",
+            "latitude": latitude,
+            "longitude": longitude,
+        })
+        return status == 201
+
+    def login_flow(i):
+        return login(seeded_email("charity", i % max(args.users // 2, 1))) is not None
+
+    def create_listing(i):
+        latitude, longitude = generator.point()
+        status, _ = driver.request('POST', '/api/listings/', {
+            "title": f"Bench listing {i}",
+            "quantity": 20,
+            "unit": "kg",
+            "food_type": "bakery",
+            "expiry_time": (datetime.now(timezone.utc) + timedelta(hours=3)).isoformat(),
+            "pickup_address": f"{i} Bench Street",
+            "latitude": latitude,
+            "longitude": longitude,
+        }, token=token_for("vendor", i))
+        return status == 201
+
+    def search(i):
+        latitude, longitude = generator.point()
+        path = (
+            f"/api/listings/search?latitude={latitude}"
+            f"&longitude={longitude}&radius_km={args.radius_km}"
+        )
+        status, _ = driver.request('GET', path, token=token_for("charity", i))
+        return status == 200
+
+    def claim(i):
+        status, _ = driver.request('POST', '/api/claims/', {
+            "listing_id": rng.choice(listing_ids),
+            "quantity": 1,
+        }, token=token_for("charity", i))
+        # 409 means the listing ran out, which is a valid outcome under load
+        return status in (201, 409)
+
+    return {
+        "register": register,
+        "login": login_flow,
+        "create_listing": create_listing,
+        "search": search,
+        "claim": claim,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_config(args, directory):
+    """Application config for the run; file-backed SQLite unless a config name is given"""
+    base = config[args.config]
+
+    class BenchConfig(base):
+        LOG_LEVEL = "WARNING"
+        HOT_SET_ENABLED = args.hot_set
+
+    if args.config == 'testing':
+        BenchConfig.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    return BenchConfig
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--config', default='testing', choices=sorted(config))
+    parser.add_argument('--base-url', help="Drive a running server instead of the test client")
+    parser.add_argument('--listings', type=int, default=10000)
+    parser.add_argument('--vendors', type=int, help="Defaults to listings / 20")
+    parser.add_argument('--users', type=int, help="Defaults to listings / 2")
+    parser.add_argument('--bbox', type=lambda s: tuple(float(v) for v in s.split(',')),
+                        default=DEFAULT_BBOX, help="min_lat,min_lon,max_lat,max_lon")
+    parser.add_argument('--radius-km', type=float, default=2.0)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per flow")
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--flows', default=",".join(FLOWS))
+    parser.add_argument('--expiry-profile', default='mixed', choices=EXPIRY_PROFILES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-seed', action='store_true', help="Reuse data already in the database")
+    parser.add_argument('--hot-set', action='store_true', help="Serve search from the listing hot set")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    args.vendors = args.vendors or max(1, args.listings // 20)
+    args.users = args.users or max(2, args.listings // 2)
+    generator = SyntheticDataGenerator(
+        seed=args.seed, bbox=args.bbox, expiry_profile=args.expiry_profile, prefix=SEED_PREFIX
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(bench_config(args, directory))
+
+        seed_seconds = 0.0
+        if args.no_seed:
+            with app.app_context():
+                listing_ids = db.session.scalars(db.select(FoodListing.id)).all()
+        else:
+            started = time.perf_counter()
+            with app.app_context():
+                listing_ids = generator.load(args.vendors, args.users, args.listings).listing_ids
+            seed_seconds = time.perf_counter() - started
+        
+        hot_set = app.extensions.get('listing_hot_set')
+        if hot_set is not None:
+            # Bulk-loaded rows bypass the service layer, so load them explicitly
+            with app.app_context():
+                hot_set.reload()
+
+        driver = HttpDriver(args.base_url) if args.base_url else TestClientDriver(app)
+        flows = build_flows(driver, args, listing_ids, generator)
+
+        results = {}
+        for name in args.flows.split(','):
+            results[name] = run_flow(name, flows[name], args.requests, args.concurrency)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "driver": "http" if args.base_url else "test_client",
+        "config": args.config,
+        "scale": {
+            "vendors": args.vendors,
+            "users": args.users,
+            "listings": args.listings,
+            "bbox": args.bbox,
+        },
+        "seed_seconds": round(seed_seconds, 3),
+        "requests_per_flow": args.requests,
+        "concurrency": args.concurrency,
+        "hot_set": args.hot_set,
+        "flows": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+Benchmark of the async API against the threaded Flask server
+Seeds clustered synthetic data into a file-backed database, then serves the
+same search, get, create and claim endpoints from two processes - the Flask
+app on Werkzeug's thread-per-connection server and the asyncio
+AsyncApiServer - and drives each with the same mix of requests from 1000
+concurrent clients. Clients keep their connection open unless the server
+closes it (Werkzeug does after every response), in which case they
+reconnect, and connection time counts towards latency. Prints a JSON report
+with throughput, p50/p95/p99 latency and errors per server.
+
+Run with: python -m benchmarks.bench_async [--connections 1000] [--requests 5]
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler, make_server
+
+from benchmarks.bench_api import git_revision, percentile
+from src.app import create_app
+from src.async_api import AsyncApiServer
+from src.config import TestingConfig
+from src.db.synthetic import SyntheticDataGenerator
+from src.models import db, User
+from src.services.auth_service import token_claims
+
+SERVERS = ('threaded', 'async')
+
+# Creates are kept rare: their nearby-user notification fan-out costs the same on
+# both servers and would otherwise dominate the run
+DEFAULT_MIX = "search=75,get=15,claim=9,create=1"
+
+
+def bench_config(database_path):
+    class BenchConfig(TestingConfig):
+        LOG_LEVEL = "WARNING"
+        METRICS_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{database_path}"
+
+    return BenchConfig
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve_threaded(database_path, backlog, ports):
+    """Child process: the Flask app on Werkzeug's threaded server"""
+    # Same listen backlog as the async server, so both see the same connect storm
+    ThreadedWSGIServer.request_queue_size = backlog
+    app = create_app(bench_config(database_path))
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_QuietHandler)
+    ports.put(server.server_port)
+    server.serve_forever()
+
+
+def serve_async(database_path, backlog, ports):
+    """Child process: the asyncio server over the async listing service"""
+    AsyncApiServer.BACKLOG = backlog
+    server = AsyncApiServer(create_app(bench_config(database_path)), host="127.0.0.1", port=0)
+
+    async def main():
+        await server.start()
+        ports.put(server.port)
+        await server._server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def send(reader, writer, method, path, token, body=None):
+    """
+    One request on an open connection
+
+    Returns:
+        (status code, whether the server keeps the connection open)
+    """
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'connection':
+            keep_alive = value.strip().lower() != 'close'
+    if length:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+
+def build_requests(args, seeded, generator):
+    """Factory of (flow, method, path, body, token) tuples, the same for every server"""
+    flows, weights = zip(*(
+        (name, int(weight)) for name, weight in (item.split('=') for item in args.mix.split(','))
+    ))
+    rng = random.Random(args.seed)
+
+    def next_request(i):
+        flow = rng.choices(flows, weights)[0]
+        token = seeded['charity_tokens'][i % len(seeded['charity_tokens'])]
+        if flow == 'search':
+            latitude, longitude = generator.point()
+            path = f"/api/listings/search?latitude={latitude}&longitude={longitude}&radius_km={args.radius_km}"
+            return flow, 'GET', path, None, token
+        if flow == 'get':
+            return flow, 'GET', f"/api/listings/{rng.choice(seeded['listing_ids'])}", None, token
+        if flow == 'claim':
+            body = {"listing_id": rng.choice(seeded['listing_ids']), "quantity": 1}
+            return flow, 'POST', "/api/claims/", body, token
+        latitude, longitude = generator.point()
+        body = {
+            "title": f"Bench listing {i}", "quantity": 20, "unit": "kg", "food_type": "bakery",
+            "expiry_time": (datetime.now(timezone.utc) + timedelta(hours=3)).isoformat(),
+            "pickup_address": f"{i} Bench Street", "latitude": latitude, "longitude": longitude,
+        }
+        token = seeded['vendor_tokens'][i % len(seeded['vendor_tokens'])]
+        return flow, 'POST', "/api/listings/", body, token
+
+    return next_request
+
+
+async def drive(port, args, next_request):
+    """Open the connections, send every request, and summarise per flow"""
+    latencies = {}
+    errors = {"connect": 0, "connection_lost": 0, "status": 0}
+    plans = [[next_request(i * args.requests + j) for j in range(args.requests)] for i in range(args.connections)]
+
+    async def connection(plan):
+        writer = None
+        try:
+            for flow, method, path, body, token in plan:
+                started = time.perf_counter()
+                if writer is None:
+                    try:
+                        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                    except OSError:
+                        errors["connect"] += 1
+                        return
+                status, keep_alive = await send(reader, writer, method, path, token, body)
+                latencies.setdefault(flow, []).append((time.perf_counter() - started) * 1000)
+                # 409 means the listing ran out, which is a valid outcome under load
+                if status not in (200, 201, 409):
+                    errors["status"] += 1
+                if not keep_alive:
+                    writer.close()
+                    writer = None
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError, ValueError):
+            errors["connection_lost"] += 1
+        finally:
+            if writer is not None:
+                writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connection(plan) for plan in plans))
+    wall = time.perf_counter() - started
+
+    def summary(values):
+        values.sort()
+        return {
+            "requests": len(values),
+            "p50_ms": round(percentile(values, 0.50), 3) if values else None,
+            "p95_ms": round(percentile(values, 0.95), 3) if values else None,
+            "p99_ms": round(percentile(values, 0.99), 3) if values else None,
+        }
+
+    completed = sum(len(values) for values in latencies.values())
+    return {
+        "completed": completed,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(completed / wall, 2) if wall else None,
+        "overall": summary([value for values in latencies.values() for value in values]),
+        "flows": {flow: summary(values) for flow, values in sorted(latencies.items())},
+        "errors": errors,
+    }
+
+
+def seed(database_path, args, generator):
+    """Load synthetic data and issue tokens for the seeded users"""
+    app = create_app(bench_config(database_path))
+    with app.app_context():
+        data = generator.load(args.vendors, args.users, args.listings)
+        charities = data.user_ids[:args.users // 2]
+
+        def tokens(ids):
+            return [
+                create_access_token(str(user.id), additional_claims=token_claims(user))
+                for user in db.session.scalars(db.select(User).where(User.id.in_(ids[:args.connections])))
+            ]
+
+        seeded = {
+            "listing_ids": data.listing_ids,
+            "vendor_tokens": tokens(data.vendor_ids),
+            "charity_tokens": tokens(charities),
+        }
+        db.session.remove()
+        db.engine.dispose()
+    return seeded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=5, help="Requests per connection")
+    parser.add_argument('--listings', type=int, default=10000)
+    parser.add_argument('--vendors', type=int, default=200)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--radius-km', type=float, default=2.0)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="flow=weight pairs")
+    parser.add_argument('--servers', default=",".join(SERVERS))
+    parser.add_argument('--backlog', type=int, default=1024)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # Every connection is a file descriptor on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, min(hard, args.connections * 2 + 256)), hard))
+
+    generator = SyntheticDataGenerator(seed=args.seed, prefix="bench")
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, 'bench.db')
+        seeded = seed(database_path, args, generator)
+
+        context = multiprocessing.get_context('fork')
+        for name in args.servers.split(','):
+            ports = context.Queue()
+            target = serve_threaded if name == 'threaded' else serve_async
+            # Each server starts from the same freshly seeded data
+            server_database = os.path.join(directory, f'{name}.db')
+            shutil.copyfile(database_path, server_database)
+            process = context.Process(target=target, args=(server_database, args.backlog, ports), daemon=True)
+            process.start()
+            try:
+                port = ports.get(timeout=30)
+                # Same request sequence for every server
+                points = SyntheticDataGenerator(seed=args.seed + 1, prefix="bench")
+                results[name] = asyncio.run(drive(port, args, build_requests(args, seeded, points)))
+            finally:
+                process.terminate()
+                process.join()
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "connections": args.connections,
+        "requests_per_connection": args.requests,
+        "mix": args.mix,
+        "scale": {"vendors": args.vendors, "users": args.users, "listings": args.listings},
+        "servers": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
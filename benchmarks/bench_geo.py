@@ -0,0 +1,68 @@
+"""
+Benchmark for bulk distance computations
+Measures radius queries over a clustered point set (1M points by default)
+with the NumPy and pure-Python backends, with and without the bounding-box
+prefilter, and reports throughput in points per second.
+
+Run with: python -m benchmarks.bench_geo [--points 1000000]
+"""
+import argparse
+import statistics
+import time
+
+from src.db.synthetic import SyntheticDataGenerator
+from src.geo import HAS_NUMPY, haversine_many, within_radius
+
+
+def measure(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--points', type=int, default=1_000_000)
+    parser.add_argument('--radius-km', type=float, default=2.0)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--python-iterations', type=int, default=1)
+    args = parser.parse_args()
+
+    generator = SyntheticDataGenerator(seed=1)
+    points = [generator.point() for _ in range(args.points)]
+    latitudes = [lat for lat, _ in points]
+    longitudes = [lon for _, lon in points]
+    centre = (40.7580, -73.9855)
+
+    cases = []
+    if HAS_NUMPY:
+        import numpy as np
+        lat_array = np.asarray(latitudes)
+        lon_array = np.asarray(longitudes)
+        cases += [
+            ("numpy, all distances", args.iterations,
+             lambda: haversine_many(*centre, lat_array, lon_array, backend='numpy')),
+            ("numpy, bbox prefilter", args.iterations,
+             lambda: within_radius(*centre, args.radius_km, lat_array, lon_array, backend='numpy')),
+        ]
+    else:
+        print("numpy not installed; measuring the pure-Python backend only")
+    cases += [
+        ("python, all distances", args.python_iterations,
+         lambda: haversine_many(*centre, latitudes, longitudes, backend='python')),
+        ("python, bbox prefilter", args.python_iterations,
+         lambda: within_radius(*centre, args.radius_km, latitudes, longitudes, backend='python')),
+    ]
+
+    matches = len(within_radius(*centre, args.radius_km, latitudes, longitudes)[0])
+    print(f"{args.points} points, {matches} within {args.radius_km} km of Midtown")
+    for name, iterations, fn in cases:
+        seconds = measure(fn, iterations)
+        print(f"{name:<24} {seconds * 1000:9.1f} ms  {args.points / seconds / 1e6:7.1f} M points/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark for per-request logging overhead
+Replays the log calls of one create-listing request (listing created,
+fan-out to every recipient, search summary) under the old setup -
+f-string INFO lines through a synchronous handler - and under the current
+one: lazy %-style calls through the queued JSON handler with per-recipient
+sends sampled. Both write to a real file so I/O cost is included.
+
+Run with: python -m benchmarks.bench_logging [--recipients 200]
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from src.monitoring.structured_logging import TEXT_FORMAT, build_handlers
+
+logger = logging.getLogger("benchmarks.request")
+
+LISTING = {"id": 1, "title": "Day-old bread", "vendor_id": 1}
+
+
+def legacy_request(users):
+    """Log calls as they were made before structured logging"""
+    logger.info(f"Created listing: {LISTING['id']} - {LISTING['title']}")
+    logger.info(f"Found {len(users)} nearby users within 5.0km")
+    logger.info(f"Notifying {len(users)} users about new listing: {LISTING['title']}")
+    for user in users:
+        logger.info(
+            f"[EMAIL] Sending notification to {user['email']}: "
+            f"New listing '{LISTING['title']}' available nearby"
+        )
+        logger.info(f"Email notification sent successfully to {user['email']}")
+    logger.info(f"Sent {len(users)} notifications successfully")
+
+
+def current_request(users):
+    """Log calls as made by the current service and notifier code"""
+    logger.info("Created listing: %s - %s", LISTING['id'], LISTING['title'],
+                extra={"listing_id": LISTING['id']})
+    logger.info("Found %s nearby users within %skm", len(users), 5.0,
+                extra={"results": len(users), "radius_km": 5.0})
+    logger.info("Notifying %s users about new listing: %s", len(users), LISTING['title'],
+                extra={"listing_id": LISTING['id'], "recipients": len(users)})
+    for user in users:
+        logger.debug("[EMAIL] Sending notification to %s: New listing '%s' available nearby",
+                     user['email'], LISTING['title'])
+        logger.info("Email notification sent successfully to %s", user['email'],
+                    extra={"sample": "notification.send", "channel": "email"})
+    logger.info("Sent %s notifications successfully", len(users),
+                extra={"listing_id": LISTING['id'], "sent": len(users)})
+
+
+def run(request, handler, listener, users, iterations):
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if listener is not None:
+        listener.start()
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        request(users)
+        timings.append((time.perf_counter() - started) * 1e6)
+
+    if listener is not None:
+        listener.stop()
+    handler.close()
+    return timings
+
+
+def summarize(name, timings):
+    timings.sort()
+    p50 = statistics.median(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<8} p50={p50:9.1f}us  p95={p95:9.1f}us per request")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipients', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--sample-rate', type=float, default=0.01)
+    args = parser.parse_args()
+
+    users = [{"id": i, "email": f"user{i}@example.com"} for i in range(args.recipients)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "before.log"), "w") as stream:
+            handler = logging.StreamHandler(stream)
+            handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            before = run(legacy_request, handler, None, users, args.iterations)
+
+        with open(os.path.join(directory, "after.log"), "w") as stream:
+            handler, listener = build_handlers({
+                "LOG_FORMAT": "json",
+                "LOG_ASYNC": True,
+                "LOG_SAMPLE_RATES": {"notification.send": args.sample_rate},
+            }, stream)
+            after = run(current_request, handler, listener, users, args.iterations)
+
+    print(f"{args.recipients} recipients per request, {args.iterations} requests")
+    before_p50 = summarize("before", before)
+    after_p50 = summarize("after", after)
+    print(f"speedup  {before_p50 / after_p50:.1f}x at p50")
+
+
+if __name__ == '__main__':
+    main()
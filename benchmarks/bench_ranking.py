@@ -0,0 +1,73 @@
+"""
+Benchmark for ranked search scoring
+Scores a full candidate set (ListingService.RANK_CANDIDATE_LIMIT listings)
+repeatedly and fails if the per-query cost exceeds the budget.
+
+Run with: python -m benchmarks.bench_ranking [--budget-ms 5]
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from src.models import FoodListing, FoodType
+from src.services.listing_service import ListingService
+from src.services.ranking import rank_listings
+
+
+def make_candidates(count: int, radius_km: float, seed: int = 42):
+    """Build transient listings with random distance, expiry and quantity"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    candidates = []
+    for i in range(count):
+        listing = FoodListing(
+            id=i,
+            vendor_id=1,
+            title=f"Listing {i}",
+            quantity=rng.uniform(1, 100),
+            unit="kg",
+            food_type=FoodType.OTHER,
+            expiry_time=now + timedelta(minutes=rng.uniform(5, 24 * 60)),
+            pickup_address="n/a",
+            latitude=0.0,
+            longitude=0.0
+        )
+        listing.remaining_quantity = listing.quantity
+        candidates.append((listing, rng.uniform(0, radius_km)))
+    return candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--candidates', type=int, default=ListingService.RANK_CANDIDATE_LIMIT)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--radius-km', type=float, default=5.0)
+    parser.add_argument('--budget-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    candidates = make_candidates(args.candidates, args.radius_km)
+
+    timings = []
+    for _ in range(args.iterations):
+        started = time.perf_counter()
+        rank_listings(candidates, args.radius_km)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    p50 = statistics.median(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"ranked {args.candidates} candidates: "
+        f"p50={p50:.3f}ms p95={p95:.3f}ms budget={args.budget_ms}ms"
+    )
+
+    if p95 > args.budget_ms:
+        print("FAIL: ranking overhead exceeds budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark for list-endpoint read models
+Loads a page of listings (100 rows by default) the old way - hydrated
+FoodListing ORM instances - and through column-projected ListingRecord rows,
+serializes both, and reports median latency and peak traced memory per page.
+
+Run with: python -m benchmarks.bench_read_model [--page-size 100]
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from src.app import create_app
+from src.config import TestingConfig
+from src.db.synthetic import SyntheticDataGenerator
+from src.models import db, FoodListing, ListingRecord
+
+
+class BenchConfig(TestingConfig):
+    LOG_LEVEL = "WARNING"
+
+
+def orm_page(vendor_id, page_size):
+    listings = (
+        FoodListing.query.filter(FoodListing.vendor_id == vendor_id)
+        .order_by(FoodListing.created_at.desc())
+        .limit(page_size)
+        .all()
+    )
+    return [listing.to_dict() for listing in listings]
+
+
+def record_page(vendor_id, page_size):
+    rows = db.session.execute(
+        ListingRecord.select()
+        .where(FoodListing.vendor_id == vendor_id)
+        .order_by(FoodListing.created_at.desc())
+        .limit(page_size)
+    )
+    return [ListingRecord(row).to_dict() for row in rows]
+
+
+def measure(fn, iterations):
+    """Median milliseconds per call; each call gets a fresh session, like a request"""
+    timings = []
+    for _ in range(iterations):
+        db.session.remove()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def peak_kib(fn):
+    """Peak memory traced while building one page"""
+    db.session.remove()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--listings', type=int, default=5000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        vendor_id = SyntheticDataGenerator(seed=3).load(1, 0, args.listings).vendor_ids[0]
+
+        cases = (
+            ("ORM instances", lambda: orm_page(vendor_id, args.page_size)),
+            ("projected records", lambda: record_page(vendor_id, args.page_size)),
+        )
+        assert cases[0][1]() == cases[1][1](), "read models disagree"
+
+        print(f"{args.page_size}-row pages out of {args.listings} listings")
+        for name, fn in cases:
+            fn()  # Warm up statement caches
+            print(
+                f"{name:<18} {measure(fn, args.iterations):8.3f} ms  "
+                f"peak {peak_kib(fn):8.1f} KiB"
+            )
+
+
+if __name__ == '__main__':
+    main()
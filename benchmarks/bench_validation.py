@@ -0,0 +1,148 @@
+"""
+Benchmark for per-request payload validation cost
+Validates the same listing-create payloads with the ad-hoc checks the
+create endpoint used before (filter blanks, loop over required fields, parse
+each field with its own try/except) and with the precompiled LISTING_CREATE
+schema, then times every other request schema on a valid and an invalid
+payload. Reports microseconds per payload and fails if the schema costs
+more than --max-ratio times the ad-hoc checks it replaced on valid
+payloads (parsing dominates both, so they should be close; invalid payloads
+are rejected faster because the schema stops at the first bad field).
+
+Run with: python -m benchmarks.bench_validation [--iterations 20000] [--max-ratio 1.2]
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import statistics
+import sys
+import time
+
+from src.models import FoodType
+from src.validation import (
+    CLAIM_CREATE, LISTING_CREATE, LISTING_UPDATE, LOGIN, RATING, REGISTER, ValidationError
+)
+
+_REQUIRED = (
+    'title', 'quantity', 'unit', 'food_type',
+    'expiry_time', 'pickup_address', 'latitude', 'longitude'
+)
+
+
+def _legacy_datetime(value, field):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid {field} format")
+
+
+def _legacy_number(value, field):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {field}")
+
+
+def legacy_listing(data):
+    """Listing checks as they were made before the schema layer"""
+    data = {key: value for key, value in data.items() if value not in (None, '')}
+    for field in _REQUIRED:
+        if field not in data:
+            raise ValueError(f"Missing required field: {field}")
+    data['quantity'] = _legacy_number(data['quantity'], 'quantity')
+    if data['quantity'] <= 0:
+        raise ValueError("quantity must be positive")
+    data['latitude'] = _legacy_number(data['latitude'], 'latitude')
+    data['longitude'] = _legacy_number(data['longitude'], 'longitude')
+    if not (-90 <= data['latitude'] <= 90 and -180 <= data['longitude'] <= 180):
+        raise ValueError("latitude or longitude out of range")
+    data['expiry_time'] = _legacy_datetime(data['expiry_time'], 'expiry_time')
+    expiry_time = data['expiry_time']
+    if expiry_time.tzinfo is None:
+        expiry_time = expiry_time.replace(tzinfo=timezone.utc)
+    if expiry_time <= datetime.now(timezone.utc):
+        raise ValueError("expiry_time must be in the future")
+    for field in ('pickup_start_time', 'pickup_end_time'):
+        if field in data:
+            data[field] = _legacy_datetime(data[field], field)
+    try:
+        data['food_type'] = FoodType(data['food_type'])
+    except ValueError:
+        raise ValueError("Invalid food_type")
+    return data
+
+
+def payloads():
+    """(name, validator, valid payload, invalid payload) per request type"""
+    expiry = (datetime.now(timezone.utc) + timedelta(hours=6)).isoformat()
+    listing = {
+        "title": "Day-old bread", "description": "Sourdough and rye", "quantity": 12,
+        "unit": "loaves", "food_type": "bakery", "expiry_time": expiry,
+        "pickup_start_time": "2030-01-01T17:00:00Z", "pickup_end_time": "2030-01-01T19:00:00Z",
+        "pickup_address": "1 Baker Street", "latitude": 51.52, "longitude": -0.16,
+        "special_instructions": "Ring the bell",
+    }
+    return [
+        ("listing_create_legacy", legacy_listing, listing, {**listing, "food_type": "pastry"}),
+        ("listing_create", LISTING_CREATE.validate, listing, {**listing, "food_type": "pastry"}),
+        ("listing_update", LISTING_UPDATE.validate,
+         {"title": "Fresh bread", "quantity": 20, "status": "available"}, {"quantity": "lots"}),
+        ("register", REGISTER.validate,
+         {"email": "a@example.com", "password": "secret", "name": "A", "role": "charity",
+          "latitude": 51.5, "longitude": -0.1},
+         {"email": "a@example.com", "password": "secret", "name": "A", "role": "pirate"}),
+        ("login", LOGIN.validate, {"email": "a@example.com", "password": "secret"}, {"email": "a@example.com"}),
+        ("claim_create", CLAIM_CREATE.validate, {"listing_id": 7, "quantity": 2.5}, {"listing_id": 7, "quantity": 0}),
+        ("rating", RATING.validate, {"listing_id": 7, "score": 5, "comment": "Great"}, {"listing_id": 7, "score": 9}),
+    ]
+
+
+def time_per_call(validate, payload, iterations):
+    """Median microseconds per call over five rounds"""
+    rounds = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            try:
+                validate(payload)
+            except ValueError:
+                pass
+        rounds.append((time.perf_counter() - started) / iterations * 1e6)
+    return statistics.median(rounds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--max-ratio', type=float, default=1.2)
+    args = parser.parse_args()
+
+    results = {}
+    for name, validate, valid, invalid in payloads():
+        try:
+            validate(invalid)
+            raise SystemExit(f"{name}: invalid payload was accepted")
+        except ValidationError:
+            pass
+        except ValueError:
+            if validate is not legacy_listing:
+                raise
+        results[name] = (
+            time_per_call(validate, valid, args.iterations),
+            time_per_call(validate, invalid, args.iterations),
+        )
+        print(f"{name:<22} valid={results[name][0]:7.2f}us  invalid={results[name][1]:7.2f}us")
+
+    legacy, schema = results["listing_create_legacy"], results["listing_create"]
+    print(
+        f"listing create: schema/ad-hoc valid={schema[0] / legacy[0]:.2f} "
+        f"invalid={schema[1] / legacy[1]:.2f} max={args.max_ratio}"
+    )
+    if schema[0] > legacy[0] * args.max_ratio:
+        print("FAIL: schema validation costs more than the ad-hoc checks it replaced")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
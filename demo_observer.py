@@ -2,6 +2,7 @@
 Simple demonstration of the Observer Pattern in FreshShare Platform
 Run this to see the notification system in action
 """
+from datetime import datetime, timedelta, timezone
 from src.observers.notification_observer import (
     NotificationService,
     EmailNotifier,
@@ -37,7 +38,7 @@ def main():
         'vendor_name': 'Joe\'s Bakery',
         'quantity': 10,
         'unit': 'loaves',
-        'expiry_time': '2025-12-17 18:00:00',
+        'expiry_time': (datetime.now(timezone.utc) + timedelta(hours=4)).isoformat(timespec='seconds'),
         'pickup_address': '123 Main St, New York',
         'food_type': 'Bakery',
         'latitude': 40.7128,
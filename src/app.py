@@ -1,23 +1,37 @@
 """
 Main Flask application for Fresh-Share Platform
 """
+import click
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flasgger import Swagger
 from src.config import config
 from src.models import db
+from src.models.routing import init_read_replicas
 from src.routes.auth_routes import auth_bp
 from src.routes.listing_routes import listing_bp
 from src.routes.claim_routes import claim_bp
 from src.routes.user_routes import user_bp
+from src.routes.debug_routes import debug_bp
+from src.routes.impact_routes import impact_bp
+from src.routes.export_routes import export_bp
+from src.observers.notification_observer import notification_service
+from src.services.reservation_service import reservation_engine
+from src.services.rating_service import RatingService
+from src.services.impact_service import ImpactService
+from src.services.region_service import RegionService
+from src.services.archive_service import ArchiveService
+from src.services.export_service import EXPORT_FORMATS, EXPORT_KINDS, ExportService
+from src.services.import_service import IMPORT_FORMATS, ImportService, format_for_filename
+from src.realtime.broker import configure_feed
+from src.services.auth_service import init_auth
+from src.services.response_cache import init_response_cache
+from src.services.hot_set import init_hot_set
+from src.monitoring import init_metrics, init_slow_query_log
+from src.monitoring.structured_logging import configure_logging
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
@@ -26,7 +40,8 @@ def create_app(config_name='development'):
     Application factory pattern
     
     Args:
-        config_name: Configuration to use (development, testing, production)
+        config_name: Configuration to use (development, testing, production),
+            or a Config subclass
         
     Returns:
         Configured Flask application
@@ -34,12 +49,29 @@ def create_app(config_name='development'):
     app = Flask(__name__)
     
     # Load configuration
-    app.config.from_object(config[config_name])
+    if isinstance(config_name, str):
+        app.config.from_object(config[config_name])
+    else:
+        app.config.from_object(config_name)
+    
+    # Configure logging (queued, structured output)
+    configure_logging(app.config)
     
     # Initialize extensions
     db.init_app(app)
+    init_read_replicas(app)
     CORS(app, origins=app.config['CORS_ORIGINS'])
-    JWTManager(app)
+    jwt = JWTManager(app)
+    init_auth(app, jwt)
+    init_response_cache(app)
+    notification_service.configure(app.config)
+    if app.config.get('NOTIFICATION_DRAIN_SECONDS', 0) > 0:
+        notification_service.start_drainer(app.config['NOTIFICATION_DRAIN_SECONDS'])
+    reservation_engine.configure(app.config)
+    configure_feed(app.config)
+    init_metrics(app)
+    with app.app_context():
+        init_slow_query_log(app, db.engine)
     
     # Initialize Swagger for API documentation
     swagger_config = {
@@ -80,6 +112,9 @@ def create_app(config_name='development'):
     app.register_blueprint(listing_bp, url_prefix='/api/listings')
     app.register_blueprint(claim_bp, url_prefix='/api/claims')
     app.register_blueprint(user_bp, url_prefix='/api/users')
+    app.register_blueprint(impact_bp, url_prefix='/api/impact')
+    app.register_blueprint(export_bp, url_prefix='/api/exports')
+    app.register_blueprint(debug_bp, url_prefix='/debug')
     
     # Health check endpoint
     @app.route('/health')
@@ -110,11 +145,90 @@ def create_app(config_name='development'):
         logger.error(f"Internal server error: {str(error)}")
         return jsonify({"error": "Internal server error"}), 500
     
+    # CLI commands
+    @app.cli.command('release-reservations')
+    def release_reservations():
+        """Release pending claims whose reservation TTL has lapsed"""
+        total = 0
+        while True:
+            released = reservation_engine.release_expired()
+            total += released
+            if not released:
+                break
+        click.echo(f"Released {total} expired reservations")
+    
+    @app.cli.command('reconcile-ratings')
+    def reconcile_ratings():
+        """Recompute user rating aggregates from ratings and fix any drift"""
+        corrected = RatingService.reconcile_ratings()
+        click.echo(f"Corrected rating aggregates for {corrected} users")
+    
+    @app.cli.command('backfill-impact')
+    @click.option('--batch-size', default=5000, show_default=True, help="Claims read per batch")
+    def backfill_impact(batch_size):
+        """Rebuild the impact dashboard rollups from collected claims"""
+        total = ImpactService.backfill(batch_size=batch_size)
+        click.echo(f"Rolled up {total} collected claims")
+    
+    @app.cli.command('archive-listings')
+    @click.option('--days', type=int, help="Archive after this many days (default ARCHIVE_AFTER_DAYS)")
+    @click.option('--batch-size', default=500, show_default=True, help="Listings moved per transaction")
+    def archive_listings(days, batch_size):
+        """Move old completed, expired and cancelled listings to the archive tables"""
+        days = app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+        total = ArchiveService.archive_listings(older_than_days=days, batch_size=batch_size)
+        click.echo(f"Archived {total} listings")
+    
+    @app.cli.command('rebalance-region-cells')
+    @click.option('--batch-size', default=5000, show_default=True, help="Rows read per batch")
+    def rebalance_region_cells(batch_size):
+        """Recompute the region cell (partition key) of every user and listing"""
+        moved = RegionService.rebalance(batch_size=batch_size)
+        click.echo(", ".join(f"{count} {table} moved" for table, count in moved.items()))
+    
+    @app.cli.command('region-load')
+    @click.option('--limit', default=20, show_default=True, help="Cells to show")
+    def region_load(limit):
+        """Show the region cells with the most available listings"""
+        for cell in RegionService.load(limit=limit):
+            click.echo(f"{cell['cell']}\t{cell['bounds']}\t{cell['listings']} listings\t{cell['users']} users")
+    
+    @app.cli.command('export-data')
+    @click.argument('kind', type=click.Choice(EXPORT_KINDS))
+    @click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='csv', show_default=True)
+    @click.option('--gzip', 'compress', is_flag=True, help="Gzip the output")
+    @click.option('--vendor-id', type=int, help="Only this vendor's listings")
+    @click.option('--output', type=click.Path(dir_okay=False), help="File to write (default: stdout)")
+    def export_data(kind, fmt, compress, vendor_id, output):
+        """Stream listings or claims as CSV or NDJSON"""
+        stream = ExportService.stream(kind, fmt, compress, vendor_id)
+        with click.open_file(output or '-', 'wb') as handle:
+            for piece in stream:
+                handle.write(piece)
+    
+    @app.cli.command('import-listings')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--vendor-id', type=int, required=True, help="Vendor the listings belong to")
+    @click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), help="Default: from the file extension, else csv")
+    @click.option('--batch-size', type=int, help="Rows inserted per transaction")
+    def import_listings(path, vendor_id, fmt, batch_size):
+        """Bulk import listings for a vendor from a CSV or NDJSON file"""
+        with open(path, 'rb') as handle:
+            result = ImportService.import_listings(
+                vendor_id, handle, fmt or format_for_filename(path) or 'csv', batch_size
+            )
+        for error in result.errors:
+            click.echo(f"line {error['line']}: {error['error']}", err=True)
+        click.echo(f"Imported {result.imported} listings, rejected {result.failed} rows")
+    
     # Create database tables
     with app.app_context():
         db.create_all()
         logger.info("Database tables created")
     
+    # Load the listing hot set once the tables exist
+    init_hot_set(app)
+    
     logger.info(f"Application created with config: {config_name}")
     
     return app
@@ -134,4 +248,9 @@ if __name__ == '__main__':
 
     debug = os.getenv('FLASK_DEBUG', 'True').lower() in ('1', 'true', 'yes')
 
+    # Serve the real-time feed from the same process when requested
+    if app.config['FEED_SERVER_ENABLED']:
+        from src.realtime.server import FeedServer
+        FeedServer(app).start_in_thread()
+
     app.run(host=host, port=port, debug=debug)
@@ -0,0 +1,8 @@
+"""
+Async API package - asyncio entry point for the hottest listing endpoints
+"""
+from src.async_api.server import AsyncApiServer
+
+__all__ = [
+    'AsyncApiServer'
+]
@@ -0,0 +1,308 @@
+"""
+Asynchronous HTTP server for the listing search, read, create and claim endpoints
+Requests are handled by coroutines over AsyncListingService, so one process
+holds thousands of keep-alive connections while their queries wait on the
+database, instead of one worker thread per in-flight request. Paths,
+parameters, authentication and responses match the Flask API. Run
+standalone with:
+
+    python -m src.async_api.server
+
+and route the four endpoints to it ahead of the threaded API.
+"""
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import json
+import logging
+import threading
+
+from flask_jwt_extended import decode_token
+from src.models import UserRole
+from src.services.async_listing_service import AsyncListingService
+from src.services.auth_service import is_revoked
+from src.services.reservation_service import ClaimError
+from src.validation import CLAIM_CREATE
+
+logger = logging.getLogger(__name__)
+
+
+class _HttpError(Exception):
+    """Ends a request with an error response"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _arg(params: Dict[str, str], name: str, type_, default=None):
+    """Query parameter converted like Flask's request.args.get(type=...)"""
+    try:
+        return type_(params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+class AsyncApiServer:
+    """Minimal HTTP/1.1 keep-alive server for the hottest listing endpoints"""
+
+    # Seconds allowed for a client to send a request once it starts one
+    REQUEST_TIMEOUT_SECONDS = 10
+    # Seconds an idle keep-alive connection is held open
+    KEEP_ALIVE_SECONDS = 30
+    MAX_BODY_BYTES = 1024 * 1024
+    # Pending connections queued by the kernel while the loop is busy
+    BACKLOG = 1024
+
+    def __init__(
+        self,
+        app,
+        service: Optional[AsyncListingService] = None,
+        host: Optional[str] = None,
+        port: Optional[int] = None
+    ):
+        """
+        Args:
+            app: Flask application, used for config and JWT verification
+            service: Async listing service (created from the app's config if omitted)
+            host: Interface to bind (defaults to ASYNC_API_HOST)
+            port: Port to bind (defaults to ASYNC_API_PORT)
+        """
+        self.app = app
+        self.service = service or AsyncListingService(app)
+        self.host = host or app.config['ASYNC_API_HOST']
+        self.port = app.config['ASYNC_API_PORT'] if port is None else port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> asyncio.AbstractServer:
+        """Start listening; returns the asyncio server"""
+        self._server = await asyncio.start_server(
+            self.handle, self.host, self.port, backlog=self.BACKLOG
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Async API listening on %s:%s", self.host, self.port)
+        return self._server
+
+    def serve_forever(self):
+        """Run the server on a new event loop until interrupted"""
+        async def main():
+            server = await self.start()
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                await self.service.dispose()
+
+        asyncio.run(main())
+
+    def start_in_thread(self) -> threading.Thread:
+        """Run the server on a daemon thread next to a synchronous app server"""
+        thread = threading.Thread(target=self.serve_forever, name="async-api", daemon=True)
+        thread.start()
+        return thread
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one client connection"""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), self.KEEP_ALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    return
+                except ValueError as e:
+                    await self._respond(writer, 400, {"error": str(e)}, keep_alive=False)
+                    return
+                except _HttpError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+
+                method, target, headers, body = request
+                status, payload = await self.dispatch(method, target, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error("Error serving API connection: %s", e)
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """Read one request, or None when the client closed the connection"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        return await asyncio.wait_for(
+            self._read_rest(request_line, reader), self.REQUEST_TIMEOUT_SECONDS
+        )
+
+    async def _read_rest(
+        self, request_line: bytes, reader: asyncio.StreamReader
+    ) -> Tuple[str, str, Dict[str, str], bytes]:
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ValueError("Bad request")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        # Bodies are read by Content-Length only; a chunked body left unread
+        # would be parsed as the next request on the connection
+        if 'transfer-encoding' in headers:
+            raise _HttpError(411, "Chunked request bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise ValueError("Invalid Content-Length")
+        if not 0 <= length <= self.MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return parts[0].upper(), parts[1], headers, body
+
+    async def dispatch(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, dict]:
+        """
+        Route a request to its endpoint
+
+        Returns:
+            (status code, JSON payload)
+        """
+        url = urlsplit(target)
+        path = url.path.rstrip('/')
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            if path == '/api/listings/search' and method == 'GET':
+                await self._authenticate(headers)
+                return await self._search(params)
+            if path.startswith('/api/listings/') and method == 'GET':
+                try:
+                    listing_id = int(path[len('/api/listings/'):])
+                except ValueError:
+                    raise _HttpError(404, "Resource not found")
+                await self._authenticate(headers)
+                return await self._get_listing(listing_id)
+            if path == '/api/listings' and method == 'POST':
+                claims = await self._authenticate(headers, UserRole.VENDOR)
+                return await self._create_listing(int(claims['sub']), self._json(body))
+            if path == '/api/claims' and method == 'POST':
+                claims = await self._authenticate(headers, UserRole.CHARITY, UserRole.INDIVIDUAL)
+                return await self._create_claim(int(claims['sub']), self._json(body))
+            raise _HttpError(404, "Resource not found")
+
+        except _HttpError as e:
+            return e.status, {"error": str(e)}
+        except ClaimError as e:
+            return e.status_code, {"error": str(e)}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            logger.error("Error handling %s %s: %s", method, url.path, e)
+            return 500, {"error": "Internal server error"}
+
+    async def _authenticate(self, headers: Dict[str, str], *roles: UserRole) -> dict:
+        """
+        Verify the bearer token, its revocation state and, if given, the role claim
+
+        Returns:
+            The token's claims
+        """
+        authorization = headers.get('authorization', '')
+        if not authorization.startswith('Bearer '):
+            raise _HttpError(401, "Missing or invalid token")
+        try:
+            with self.app.app_context():
+                claims = decode_token(authorization[len('Bearer '):])
+        except Exception:
+            raise _HttpError(401, "Missing or invalid token")
+
+        principal = await self.service.get_principal(
+            self.app.extensions['principal_cache'], int(claims['sub'])
+        )
+        if is_revoked(principal, claims):
+            raise _HttpError(401, "Token has been revoked")
+
+        if roles and claims.get('role', principal.role.value) not in {role.value for role in roles}:
+            allowed = ", ".join(role.value for role in roles)
+            raise _HttpError(403, f"This action requires role: {allowed}")
+        return claims
+
+    @staticmethod
+    def _json(body: bytes) -> dict:
+        try:
+            data = json.loads(body or b"null")
+        except ValueError:
+            raise ValueError("Invalid JSON body")
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        return data
+
+    async def _search(self, params: Dict[str, str]) -> Tuple[int, dict]:
+        latitude = _arg(params, 'latitude', float)
+        longitude = _arg(params, 'longitude', float)
+        sort = params.get('sort', 'newest')
+        if latitude is None or longitude is None:
+            raise _HttpError(400, "latitude and longitude are required")
+        if sort not in ('newest', 'rank'):
+            raise _HttpError(400, "sort must be 'newest' or 'rank'")
+
+        listings = await self.service.search_listings(
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=_arg(params, 'radius_km', float, 5.0),
+            food_type=params.get('food_type'),
+            limit=_arg(params, 'limit', int, 20),
+            offset=_arg(params, 'offset', int, 0),
+            sort=sort
+        )
+        return 200, {"count": len(listings), "listings": [listing.to_dict() for listing in listings]}
+
+    async def _get_listing(self, listing_id: int) -> Tuple[int, dict]:
+        listing = await self.service.get_listing_record(listing_id)
+        if listing is None:
+            raise _HttpError(404, "Listing not found")
+        return 200, {"listing": listing.to_dict()}
+
+    async def _create_listing(self, vendor_id: int, data: dict) -> Tuple[int, dict]:
+        listing = await self.service.create_listing(vendor_id, data)
+        return 201, {"message": "Listing created successfully", "listing": listing}
+
+    async def _create_claim(self, claimer_id: int, data: dict) -> Tuple[int, dict]:
+        data = CLAIM_CREATE.validate(data)
+        claim = await self.service.claim_listing(
+            claimer_id, data['listing_id'], data.get('quantity'), data.get('notes')
+        )
+        return 201, {"message": "Claim created successfully", "claim": claim}
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool = True):
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+
+if __name__ == '__main__':
+    import os
+    from src.app import create_app
+
+    AsyncApiServer(create_app(os.getenv('FLASK_CONFIG', 'development'))).serve_forever()
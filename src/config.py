@@ -26,6 +26,12 @@ class Config:
     SQLALCHEMY_DATABASE_URI = (
         f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
+    # Read replicas (comma-separated URIs) for search and other read-only queries
+    SQLALCHEMY_REPLICA_URIS = [
+        uri.strip() for uri in os.getenv("SQLALCHEMY_REPLICA_URIS", "").split(",") if uri.strip()
+    ]
+    # Seconds a client reads from the primary after writing (read-your-writes)
+    READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = DEBUG
     
@@ -34,10 +40,40 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(
         seconds=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "3600"))
     )
+    # Seconds a user's role/active state is cached for token revocation checks
+    PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
     
     # Geolocation
     DEFAULT_SEARCH_RADIUS_KM = float(os.getenv("DEFAULT_SEARCH_RADIUS_KM", "5"))
     
+    # Notification rate limits (sends per second and burst size per channel)
+    NOTIFICATION_RATE_LIMITS = {
+        "sms": {
+            "rate": float(os.getenv("SMS_RATE_LIMIT", "1")),
+            "burst": float(os.getenv("SMS_RATE_BURST", "10")),
+            "per_recipient_rate": 1 / 60,
+        },
+        "push": {
+            "rate": float(os.getenv("PUSH_RATE_LIMIT", "50")),
+            "burst": float(os.getenv("PUSH_RATE_BURST", "100")),
+        },
+    }
+    NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "1000"))
+    NOTIFICATION_MAX_DELAY_SECONDS = float(os.getenv("NOTIFICATION_MAX_DELAY_SECONDS", "300"))
+    # Seconds between drains of rate-limited sends (0 disables the drainer thread)
+    NOTIFICATION_DRAIN_SECONDS = float(os.getenv("NOTIFICATION_DRAIN_SECONDS", "5"))
+    
+    # Claims
+    CLAIM_RESERVATION_TTL_MINUTES = int(os.getenv("CLAIM_RESERVATION_TTL_MINUTES", "30"))
+    CLAIM_BATCH_SIZE = int(os.getenv("CLAIM_BATCH_SIZE", "100"))
+    
+    # Archival: terminal listings untouched for this many days move to the archive tables
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+    
+    # Bulk listing import: rows per insert transaction, and row errors reported
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+    IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+    
     # Pagination
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
@@ -50,6 +86,57 @@ class Config:
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
     
+    # Real-time feed
+    FEED_BROKER = os.getenv("FEED_BROKER", "local")  # local or redis
+    FEED_SERVER_ENABLED = os.getenv("FEED_SERVER_ENABLED", "False") == "True"
+    FEED_HOST = os.getenv("FEED_HOST", "0.0.0.0")
+    FEED_PORT = int(os.getenv("FEED_PORT", "5001"))
+    FEED_MAX_RADIUS_KM = float(os.getenv("FEED_MAX_RADIUS_KM", "25"))
+    
+    # Async API (search, get, create and claim over asyncio; python -m src.async_api.server)
+    ASYNC_API_HOST = os.getenv("ASYNC_API_HOST", "0.0.0.0")
+    ASYNC_API_PORT = int(os.getenv("ASYNC_API_PORT", "5002"))
+    # Defaults to SQLALCHEMY_DATABASE_URI with its async driver (asyncpg, aiosqlite)
+    ASYNC_DATABASE_URI = os.getenv("ASYNC_DATABASE_URI", "")
+    
+    # Logging
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json or text
+    # Hand records to a background thread instead of writing on the request thread
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "True") == "True"
+    # Fraction of high-volume INFO events kept, by sample key
+    LOG_SAMPLE_RATES = {
+        "notification.send": float(os.getenv("NOTIFICATION_LOG_SAMPLE_RATE", "0.01")),
+    }
+    
+    # Monitoring
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+    # Profile requests sent with an "X-Profile: 1" header
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+    # Record SQL statements slower than the threshold (listeners are not installed when off)
+    SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "False") == "True"
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    # Fraction of slow SELECTs re-run under EXPLAIN (ANALYZE, BUFFERS); PostgreSQL only
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0"))
+    SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", "logs/slow_queries.log")
+    SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "100"))
+    # Record bound parameter values (emails, password hashes, addresses) instead
+    # of their type names; for local debugging only
+    SLOW_QUERY_CAPTURE_PARAMETERS = os.getenv("SLOW_QUERY_CAPTURE_PARAMETERS", "False") == "True"
+    
+    # Listing read caching: Cache-Control max-age caps (further capped by expiry) and
+    # the number of serialized bodies kept per process
+    LISTING_CACHE_MAX_AGE = int(os.getenv("LISTING_CACHE_MAX_AGE", "60"))
+    SEARCH_CACHE_MAX_AGE = int(os.getenv("SEARCH_CACHE_MAX_AGE", "15"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    
+    # Listing hot set: serve search from an in-process index of available listings
+    HOT_SET_ENABLED = os.getenv("HOT_SET_ENABLED", "False") == "True"
+    # Seconds between full reloads from the database (0 disables the reconcile thread)
+    HOT_SET_RECONCILE_SECONDS = float(os.getenv("HOT_SET_RECONCILE_SECONDS", "60"))
+    
     # CORS
     CORS_ORIGINS = ["http://localhost:3000", "http://localhost:5000"]
 
@@ -65,6 +152,8 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    # Tests drain explicitly
+    NOTIFICATION_DRAIN_SECONDS = 0
 
 
 class ProductionConfig(Config):
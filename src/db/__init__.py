@@ -1,3 +1,18 @@
 """
 Database utilities and initialization
 """
+from src.db.synthetic import (
+    Cluster,
+    GeneratedData,
+    SyntheticDataGenerator,
+    bulk_insert,
+    load_synthetic_data,
+)
+
+__all__ = [
+    'Cluster',
+    'GeneratedData',
+    'SyntheticDataGenerator',
+    'bulk_insert',
+    'load_synthetic_data'
+]
@@ -0,0 +1,34 @@
+"""
+Geo package - distance computations for in-memory candidate sets and region cells
+"""
+from src.geo.distance import (
+    EARTH_RADIUS_KM,
+    HAS_NUMPY,
+    KM_PER_DEG_LAT,
+    bounding_box,
+    haversine_km,
+    haversine_many,
+    within_radius,
+)
+from src.geo.regions import (
+    MAX_QUERY_CELLS,
+    REGION_CELL_DEG,
+    region_cell,
+    region_cell_bounds,
+    region_cells,
+)
+
+__all__ = [
+    'EARTH_RADIUS_KM',
+    'HAS_NUMPY',
+    'KM_PER_DEG_LAT',
+    'MAX_QUERY_CELLS',
+    'REGION_CELL_DEG',
+    'bounding_box',
+    'haversine_km',
+    'haversine_many',
+    'region_cell',
+    'region_cell_bounds',
+    'region_cells',
+    'within_radius'
+]
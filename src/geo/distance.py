@@ -0,0 +1,149 @@
+"""
+Great-circle distances for in-memory candidate sets
+Distances are computed in bulk over arrays of coordinates with NumPy when it
+is installed and with a pure-Python loop otherwise. A bounding-box prefilter
+discards far-away points with cheap comparisons before any trigonometry.
+"""
+from typing import List, Optional, Sequence, Tuple
+import math
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+    HAS_NUMPY = False
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+BACKENDS = ('numpy', 'python')
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Smallest lat/lon box containing a circle
+
+    Returns:
+        (min_lat, min_lon, max_lat, max_lon); the longitude range widens to
+        the whole globe near the poles or when the circle crosses the
+        antimeridian
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular)
+    min_lat, max_lat = latitude - dlat, latitude + dlat
+    if min_lat <= -90 or max_lat >= 90 or angular >= math.pi / 2:
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+
+    # Longitude half-width at the circle's widest point (tangent meridians)
+    dlon = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(latitude))))
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, -180.0, max_lat, 180.0
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def _resolve_backend(backend: Optional[str]) -> str:
+    if backend is None:
+        return 'numpy' if HAS_NUMPY else 'python'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown distance backend: {backend}")
+    if backend == 'numpy' and not HAS_NUMPY:
+        raise RuntimeError("The numpy distance backend requires the 'numpy' package")
+    return backend
+
+
+def _haversine_numpy(latitude, longitude, latitudes, longitudes):
+    phi1 = math.radians(latitude)
+    phi2 = np.radians(latitudes)
+    dphi = phi2 - phi1
+    dlambda = np.radians(longitudes - longitude)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def haversine_many(
+    latitude: float,
+    longitude: float,
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    backend: Optional[str] = None
+):
+    """
+    Distances in kilometres from one point to many
+
+    Args:
+        latitude: Latitude of the reference point
+        longitude: Longitude of the reference point
+        latitudes: Latitudes of the other points
+        longitudes: Longitudes of the other points, same length
+        backend: 'numpy' or 'python' (defaults to numpy when installed)
+
+    Returns:
+        NumPy array with the numpy backend, list otherwise
+    """
+    if _resolve_backend(backend) == 'numpy':
+        return _haversine_numpy(
+            latitude,
+            longitude,
+            np.asarray(latitudes, dtype=np.float64),
+            np.asarray(longitudes, dtype=np.float64)
+        )
+    return [
+        haversine_km(latitude, longitude, lat, lon)
+        for lat, lon in zip(latitudes, longitudes)
+    ]
+
+
+def within_radius(
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    backend: Optional[str] = None
+) -> Tuple[List[int], List[float]]:
+    """
+    Points within a radius of a reference point
+
+    Args:
+        latitude: Latitude of the reference point
+        longitude: Longitude of the reference point
+        radius_km: Radius in kilometres
+        latitudes: Latitudes of the candidate points
+        longitudes: Longitudes of the candidate points, same length
+        backend: 'numpy' or 'python' (defaults to numpy when installed)
+
+    Returns:
+        (indices, distances_km) of matching points, in input order; NumPy
+        arrays with the numpy backend, lists otherwise
+    """
+    min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+
+    if _resolve_backend(backend) == 'numpy':
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+        candidates = np.flatnonzero(
+            (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        )
+        distances = _haversine_numpy(latitude, longitude, lats[candidates], lons[candidates])
+        keep = distances <= radius_km
+        return candidates[keep], distances[keep]
+
+    indices, distances = [], []
+    for index, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+        if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+            distance = haversine_km(latitude, longitude, lat, lon)
+            if distance <= radius_km:
+                indices.append(index)
+                distances.append(distance)
+    return indices, distances
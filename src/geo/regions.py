@@ -0,0 +1,62 @@
+"""
+Region cells - the geographic partition key of listings and users
+The globe is cut into fixed REGION_CELL_DEG x REGION_CELL_DEG cells (about
+55 km at the equator), each identified by one integer. Rows store the cell
+of their coordinates, and radius queries filter on the few cells their
+circle overlaps, so a search only touches its own region - an index range
+on a single table today, partition pruning once the column is used as a
+PostgreSQL partition or shard key.
+"""
+from typing import List, Optional, Tuple
+import math
+
+from src.geo.distance import bounding_box
+
+REGION_CELL_DEG = 0.5
+_COLUMNS = int(round(360 / REGION_CELL_DEG))
+
+# Beyond this many cells (huge radii, poles, antimeridian) queries skip the cell filter
+MAX_QUERY_CELLS = 64
+
+
+def _row(latitude: float) -> int:
+    return min(int(math.floor((latitude + 90) / REGION_CELL_DEG)), int(180 / REGION_CELL_DEG))
+
+
+def _column(longitude: float) -> int:
+    return int(math.floor((longitude + 180) / REGION_CELL_DEG)) % _COLUMNS
+
+
+def region_cell(latitude: Optional[float], longitude: Optional[float]) -> Optional[int]:
+    """Region cell of a point, or None when the point is unknown"""
+    if latitude is None or longitude is None:
+        return None
+    return _row(latitude) * _COLUMNS + _column(longitude)
+
+
+def region_cells(latitude: float, longitude: float, radius_km: float) -> Optional[List[int]]:
+    """
+    Region cells overlapped by a circle
+
+    Returns:
+        Cell keys, or None when the circle covers more than MAX_QUERY_CELLS
+        cells and filtering on them would not narrow the query
+    """
+    min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+    rows = range(_row(min_lat), _row(max_lat) + 1)
+    first, last = _column(min_lon), _column(max_lon)
+    if max_lon - min_lon >= 360 - REGION_CELL_DEG:
+        columns = range(_COLUMNS)
+    else:
+        columns = range(first, last + 1) if first <= last else [*range(first, _COLUMNS), *range(last + 1)]
+    if len(rows) * len(columns) > MAX_QUERY_CELLS:
+        return None
+    return [row * _COLUMNS + column for row in rows for column in columns]
+
+
+def region_cell_bounds(cell: int) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) of a region cell"""
+    row, column = divmod(cell, _COLUMNS)
+    min_lat = row * REGION_CELL_DEG - 90
+    min_lon = column * REGION_CELL_DEG - 180
+    return min_lat, min_lon, min_lat + REGION_CELL_DEG, min_lon + REGION_CELL_DEG
@@ -4,10 +4,13 @@ Database models for Fresh-Share Platform
 from datetime import datetime, timezone
 from enum import Enum as PyEnum
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Enum, Float, CheckConstraint, Text, event
+from sqlalchemy import Enum, Float, CheckConstraint, Text, UniqueConstraint, event, inspect
 from werkzeug.security import generate_password_hash, check_password_hash
+from src.models.routing import RoutingSession
+from src.geo.regions import region_cell
 
-db = SQLAlchemy()
+# Read-only service methods can route SELECTs to replicas (see src.models.routing)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # Helper function to get location column type based on database
 def get_location_column():
@@ -56,6 +59,20 @@ class ClaimStatus(PyEnum):
     CANCELLED = "cancelled"
 
 
+class RollupDimension(PyEnum):
+    """What an impact rollup row is grouped by, besides the day"""
+    TOTAL = "total"
+    VENDOR = "vendor"
+    AREA_CELL = "area_cell"
+    FOOD_TYPE = "food_type"
+
+
+def _region_cell_default(context):
+    """Insert default: the region cell of the row's coordinates (also for Core executemany)"""
+    parameters = context.get_current_parameters()
+    return region_cell(parameters.get('latitude'), parameters.get('longitude'))
+
+
 class User(db.Model):
     """User model - Base class for all user types"""
     __tablename__ = "users"
@@ -72,12 +89,18 @@ class User(db.Model):
     location = db.Column(Text, nullable=True)
     latitude = db.Column(Float)
     longitude = db.Column(Float)
+    # Partition key (see src.geo.regions); kept in step with the coordinates
+    region_cell = db.Column(db.Integer, default=_region_cell_default, index=True)
     
     # Verification and ratings
     verified = db.Column(db.Boolean, default=False)
     rating = db.Column(Float, default=0.0)
     rating_count = db.Column(db.Integer, default=0)
     
+    # Access control - deactivating a user or bumping the version revokes their tokens
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    token_version = db.Column(db.Integer, default=0, nullable=False)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -132,6 +155,9 @@ class FoodListing(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     quantity = db.Column(Float, nullable=False)
+    remaining_quantity = db.Column(  # Decremented atomically by claims
+        Float, default=lambda context: context.get_current_parameters()["quantity"]
+    )
     unit = db.Column(db.String(50), nullable=False)  # kg, pieces, servings, etc.
     food_type = db.Column(Enum(FoodType), nullable=False)
     
@@ -145,6 +171,7 @@ class FoodListing(db.Model):
     location = db.Column(Text, nullable=True)
     latitude = db.Column(Float, nullable=False)
     longitude = db.Column(Float, nullable=False)
+    region_cell = db.Column(db.Integer, default=_region_cell_default)
     
     # Status
     status = db.Column(Enum(ListingStatus), default=ListingStatus.AVAILABLE)
@@ -163,36 +190,110 @@ class FoodListing(db.Model):
     
     __table_args__ = (
         CheckConstraint("quantity > 0", name="positive_quantity"),
+        CheckConstraint("remaining_quantity >= 0", name="non_negative_remaining_quantity"),
         CheckConstraint("expiry_time > created_at", name="valid_expiry_time"),
+        # Radius searches filter on the cells their circle overlaps
+        db.Index("ix_food_listings_region_cell_status", "region_cell", "status"),
     )
     
+    # Distance from the searcher in km; set by ranked search, not persisted
+    distance_km = None
+    
     def to_dict(self):
         """Convert listing to dictionary"""
-        return {
-            "id": self.id,
-            "vendor_id": self.vendor_id,
-            "vendor_name": self.vendor.name,
-            "title": self.title,
-            "description": self.description,
-            "quantity": self.quantity,
-            "unit": self.unit,
-            "food_type": self.food_type.value,
-            "expiry_time": self.expiry_time.isoformat(),
-            "pickup_start_time": self.pickup_start_time.isoformat() if self.pickup_start_time else None,
-            "pickup_end_time": self.pickup_end_time.isoformat() if self.pickup_end_time else None,
-            "pickup_address": self.pickup_address,
-            "latitude": self.latitude,
-            "longitude": self.longitude,
-            "status": self.status.value,
-            "image_url": self.image_url,
-            "special_instructions": self.special_instructions,
-            "created_at": self.created_at.isoformat(),
-        }
+        return listing_to_dict(self, self.vendor.name)
     
     def __repr__(self):
         return f"<FoodListing {self.title} by {self.vendor.name}>"
 
 
+def listing_to_dict(listing, vendor_name: str) -> dict:
+    """Serialize a FoodListing or ListingRecord; the single source of the listing JSON shape"""
+    data = {
+        "id": listing.id,
+        "vendor_id": listing.vendor_id,
+        "vendor_name": vendor_name,
+        "title": listing.title,
+        "description": listing.description,
+        "quantity": listing.quantity,
+        "remaining_quantity": listing.remaining_quantity,
+        "unit": listing.unit,
+        "food_type": listing.food_type.value,
+        "expiry_time": listing.expiry_time.isoformat(),
+        "pickup_start_time": listing.pickup_start_time.isoformat() if listing.pickup_start_time else None,
+        "pickup_end_time": listing.pickup_end_time.isoformat() if listing.pickup_end_time else None,
+        "pickup_address": listing.pickup_address,
+        "latitude": listing.latitude,
+        "longitude": listing.longitude,
+        "status": listing.status.value,
+        "image_url": listing.image_url,
+        "special_instructions": listing.special_instructions,
+        "created_at": listing.created_at.isoformat(),
+        "updated_at": listing.updated_at.isoformat() if listing.updated_at else None,
+    }
+    if listing.distance_km is not None:
+        data["distance_km"] = round(listing.distance_km, 3)
+    return data
+
+
+class ListingRecord:
+    """
+    Read-only listing row for list endpoints
+    
+    Built from a column-projected query, so no ORM instance, identity-map
+    entry or attribute instrumentation is created per row. Serializes
+    exactly like FoodListing.
+    """
+    
+    FIELDS = (
+        "id", "vendor_id", "title", "description", "quantity", "remaining_quantity",
+        "unit", "food_type", "expiry_time", "pickup_start_time", "pickup_end_time",
+        "pickup_address", "latitude", "longitude", "status", "image_url",
+        "special_instructions", "created_at", "updated_at",
+    )
+    
+    __slots__ = FIELDS + ("vendor_name", "distance_km")
+    
+    def __init__(self, row, distance_km=None):
+        """
+        Args:
+            row: Row selected by ListingRecord.select(), in FIELDS order plus vendor_name
+            distance_km: Distance from the searcher, if known
+        """
+        (
+            self.id, self.vendor_id, self.title, self.description, self.quantity,
+            self.remaining_quantity, self.unit, self.food_type, self.expiry_time,
+            self.pickup_start_time, self.pickup_end_time, self.pickup_address,
+            self.latitude, self.longitude, self.status, self.image_url,
+            self.special_instructions, self.created_at, self.updated_at,
+            self.vendor_name,
+        ) = row
+        self.distance_km = distance_km
+    
+    @classmethod
+    def select(cls, *extra_columns, source=None):
+        """
+        SELECT of the record's columns (and any extras after them), joined to the vendor
+        
+        Args:
+            extra_columns: Columns selected after the record's own
+            source: Model to read, FoodListing (default) or ArchivedListing
+        """
+        source = source or FoodListing
+        return db.select(
+            *(getattr(source, field) for field in cls.FIELDS),
+            User.name.label("vendor_name"),
+            *extra_columns
+        ).join(User, User.id == source.vendor_id)
+    
+    def to_dict(self):
+        """Convert listing to dictionary"""
+        return listing_to_dict(self, self.vendor_name)
+    
+    def __repr__(self):
+        return f"<ListingRecord {self.title} by {self.vendor_name}>"
+
+
 class Claim(db.Model):
     """Claim model - Represents a claim on a food listing"""
     __tablename__ = "claims"
@@ -202,6 +303,7 @@ class Claim(db.Model):
     claimer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     
     # Claim details
+    quantity = db.Column(Float, nullable=False)
     status = db.Column(Enum(ClaimStatus), default=ClaimStatus.PENDING)
     notes = db.Column(db.Text)
     
@@ -210,11 +312,16 @@ class Claim(db.Model):
     confirmed_at = db.Column(db.DateTime)
     picked_up_at = db.Column(db.DateTime)
     cancelled_at = db.Column(db.DateTime)
+    reserved_until = db.Column(db.DateTime, index=True)  # Pending claims lapse after this
     
     # Relationships
     listing = db.relationship("FoodListing", back_populates="claims")
     claimer = db.relationship("User", back_populates="claims")
     
+    __table_args__ = (
+        CheckConstraint("quantity > 0", name="positive_claim_quantity"),
+    )
+    
     def to_dict(self):
         """Convert claim to dictionary"""
         return {
@@ -222,11 +329,14 @@ class Claim(db.Model):
             "listing_id": self.listing_id,
             "claimer_id": self.claimer_id,
             "claimer_name": self.claimer.name,
+            "quantity": self.quantity,
             "status": self.status.value,
             "notes": self.notes,
             "claimed_at": self.claimed_at.isoformat(),
             "confirmed_at": self.confirmed_at.isoformat() if self.confirmed_at else None,
             "picked_up_at": self.picked_up_at.isoformat() if self.picked_up_at else None,
+            "cancelled_at": self.cancelled_at.isoformat() if self.cancelled_at else None,
+            "reserved_until": self.reserved_until.isoformat() if self.reserved_until else None,
         }
     
     def __repr__(self):
@@ -239,8 +349,9 @@ class Rating(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     rater_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    rated_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    listing_id = db.Column(db.Integer, db.ForeignKey("food_listings.id"))
+    rated_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    # No foreign key: terminal listings move to archived_food_listings
+    listing_id = db.Column(db.Integer)
     
     score = db.Column(db.Integer, nullable=False)  # 1-5
     comment = db.Column(db.Text)
@@ -254,6 +365,7 @@ class Rating(db.Model):
     __table_args__ = (
         CheckConstraint("score >= 1 AND score <= 5", name="valid_score"),
         CheckConstraint("rater_id != rated_id", name="cannot_rate_self"),
+        UniqueConstraint("rater_id", "rated_id", "listing_id", name="one_rating_per_listing"),
     )
     
     def to_dict(self):
@@ -271,3 +383,96 @@ class Rating(db.Model):
     
     def __repr__(self):
         return f"<Rating {self.score}/5 from User {self.rater_id} to User {self.rated_id}>"
+
+
+class ImpactRollup(db.Model):
+    """Daily impact totals of collected claims, pre-aggregated per dimension"""
+    __tablename__ = "impact_rollups"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    dimension = db.Column(Enum(RollupDimension), nullable=False)
+    # Vendor ID, area cell ("lat_cell:lon_cell"), food type value, or "" for totals
+    bucket_key = db.Column(db.String(64), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    
+    pickups = db.Column(db.Integer, nullable=False, default=0)
+    food_kg = db.Column(Float, nullable=False, default=0.0)
+    meals = db.Column(Float, nullable=False, default=0.0)
+    co2e_kg = db.Column(Float, nullable=False, default=0.0)
+    
+    __table_args__ = (
+        UniqueConstraint("dimension", "bucket_key", "day", name="one_rollup_per_bucket"),
+    )
+    
+    def to_dict(self):
+        """Convert rollup to dictionary"""
+        return {
+            "dimension": self.dimension.value,
+            "key": self.bucket_key,
+            "day": self.day.isoformat(),
+            "pickups": self.pickups,
+            "food_kg": round(self.food_kg, 3),
+            "meals": round(self.meals, 1),
+            "co2e_kg": round(self.co2e_kg, 3),
+        }
+    
+    def __repr__(self):
+        return f"<ImpactRollup {self.dimension.value}:{self.bucket_key} {self.day}>"
+
+
+class ArchivedListing(db.Model):
+    """Terminal listing moved out of food_listings by the archival job (same columns and ids)"""
+    __tablename__ = "archived_food_listings"
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    vendor_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    quantity = db.Column(Float, nullable=False)
+    remaining_quantity = db.Column(Float)
+    unit = db.Column(db.String(50), nullable=False)
+    food_type = db.Column(Enum(FoodType), nullable=False)
+    expiry_time = db.Column(db.DateTime, nullable=False)
+    pickup_start_time = db.Column(db.DateTime)
+    pickup_end_time = db.Column(db.DateTime)
+    pickup_address = db.Column(db.String(255), nullable=False)
+    latitude = db.Column(Float, nullable=False)
+    longitude = db.Column(Float, nullable=False)
+    status = db.Column(Enum(ListingStatus), nullable=False)
+    image_url = db.Column(db.String(500))
+    special_instructions = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<ArchivedListing {self.id} {self.title}>"
+
+
+class ArchivedClaim(db.Model):
+    """Claim of an archived listing (same columns and ids as claims)"""
+    __tablename__ = "archived_claims"
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    listing_id = db.Column(db.Integer, nullable=False, index=True)
+    claimer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    quantity = db.Column(Float, nullable=False)
+    status = db.Column(Enum(ClaimStatus), nullable=False)
+    notes = db.Column(db.Text)
+    claimed_at = db.Column(db.DateTime)
+    confirmed_at = db.Column(db.DateTime)
+    picked_up_at = db.Column(db.DateTime)
+    cancelled_at = db.Column(db.DateTime)
+    reserved_until = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f"<ArchivedClaim {self.id} for Listing {self.listing_id}>"
+
+
+@event.listens_for(User, "before_update")
+@event.listens_for(FoodListing, "before_update")
+def _move_region_cell(mapper, connection, target):
+    """Keep region_cell in step when an instance's coordinates change"""
+    state = inspect(target)
+    if state.attrs.latitude.history.has_changes() or state.attrs.longitude.history.has_changes():
+        target.region_cell = region_cell(target.latitude, target.longitude)
@@ -0,0 +1,122 @@
+"""
+Read-replica routing
+Each URI in SQLALCHEMY_REPLICA_URIS gets its own engine, kept in
+`app.extensions['read_replicas']`. Read-only service methods are wrapped in
+`replica_read`; while one runs, the session sends plain SELECTs to a random
+replica. Everything else - flushes, INSERT/UPDATE/DELETE, reads with pending
+changes in the session, and any query outside a `replica_read` method -
+goes to the primary, so ownership checks made before a write never see
+replica lag.
+
+Read-your-writes: a request that wrote to the primary sets a short-lived
+cookie, and requests carrying it keep reading from the primary until it
+lapses (READ_YOUR_WRITES_SECONDS), by which time replicas have caught up.
+"""
+from typing import List
+import functools
+import random
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+import logging
+
+logger = logging.getLogger(__name__)
+
+READ_PRIMARY_COOKIE = "fs_read_primary"
+
+# session.info key: depth of nested replica_read calls
+_REPLICA_DEPTH = "replica_read_depth"
+
+
+def _reading_from_primary() -> bool:
+    """True while this request is inside its read-your-writes window"""
+    return has_request_context() and g.get('read_primary_until', 0) > time.time()
+
+
+class RoutingSession(Session):
+    """Session that can send read-only SELECTs to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                # Remember the write so the response can pin the client to the primary
+                if has_request_context():
+                    g.db_wrote = True
+            elif (
+                self.info.get(_REPLICA_DEPTH)
+                and isinstance(clause, Select)
+                and not (self.new or self.dirty or self.deleted)
+            ):
+                replicas = current_app.extensions.get('read_replicas')
+                if replicas:
+                    return random.choice(replicas)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_read(fn):
+    """
+    Let a read-only function's SELECTs go to a read replica
+
+    Has no effect when no replicas are configured or the current request is
+    in its read-your-writes window.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _reading_from_primary() or not current_app.extensions.get('read_replicas'):
+            return fn(*args, **kwargs)
+        session = current_app.extensions['sqlalchemy'].session()
+        session.info[_REPLICA_DEPTH] = session.info.get(_REPLICA_DEPTH, 0) + 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            session.info[_REPLICA_DEPTH] -= 1
+    return wrapper
+
+
+def init_read_replicas(app) -> List[Engine]:
+    """
+    Create replica engines and install the read-your-writes hooks on an application
+
+    Args:
+        app: Flask application
+
+    Returns:
+        Replica engines (empty when none are configured)
+    """
+    engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    replicas = [
+        create_engine(uri, **engine_options)
+        for uri in app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    ]
+    app.extensions['read_replicas'] = replicas
+    if not replicas:
+        return replicas
+
+    window = app.config.get('READ_YOUR_WRITES_SECONDS', 5)
+
+    @app.before_request
+    def _load_read_primary_window():
+        g.db_wrote = False
+        try:
+            g.read_primary_until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+        except ValueError:
+            g.read_primary_until = 0
+        # Never trust a window longer than configured
+        g.read_primary_until = min(g.read_primary_until, time.time() + window)
+
+    @app.after_request
+    def _pin_writers_to_primary(response):
+        if g.get('db_wrote') and window > 0:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE, f"{time.time() + window:.3f}",
+                max_age=int(window) + 1, httponly=True, samesite='Lax'
+            )
+        return response
+
+    logger.info("Routing read-only queries to %s read replicas", len(replicas))
+    return replicas
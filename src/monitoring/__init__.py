@@ -0,0 +1,18 @@
+"""
+Monitoring package - metrics, profiling and diagnostics
+"""
+from src.monitoring.metrics import Counter, Histogram, MetricsRegistry, metrics_registry
+from src.monitoring.instrumentation import init_metrics
+from src.monitoring.profiler import SamplingProfiler
+from src.monitoring.slow_queries import SlowQueryLog, init_slow_query_log
+
+__all__ = [
+    'Counter',
+    'Histogram',
+    'MetricsRegistry',
+    'metrics_registry',
+    'init_metrics',
+    'SamplingProfiler',
+    'SlowQueryLog',
+    'init_slow_query_log'
+]
@@ -0,0 +1,138 @@
+"""
+Request instrumentation - latency histograms, SQL accounting and profiling
+init_metrics() hooks an application so every request records its latency
+per blueprint and endpoint, plus how many SQL statements it ran and how long
+they took. Requests sent with an `X-Profile: 1` header are run under the
+sampling profiler when PROFILING_ENABLED is set.
+"""
+from datetime import datetime, timezone
+import os
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from src.models import db
+from src.monitoring.metrics import metrics_registry
+from src.monitoring.profiler import SamplingProfiler
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SQL_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+_request_latency = metrics_registry.histogram(
+    "freshshare_http_request_duration_seconds",
+    "HTTP request latency by blueprint and endpoint",
+    labels=("blueprint", "endpoint", "method", "status")
+)
+_request_queries = metrics_registry.histogram(
+    "freshshare_http_request_sql_queries",
+    "SQL statements executed per HTTP request",
+    labels=("endpoint",),
+    buckets=SQL_COUNT_BUCKETS
+)
+_request_sql_time = metrics_registry.histogram(
+    "freshshare_http_request_sql_duration_seconds",
+    "Time spent in SQL per HTTP request",
+    labels=("endpoint",)
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_sql_count' in g:
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if starts and has_request_context() and 'metrics_sql_count' in g:
+        g.metrics_sql_time += time.perf_counter() - starts.pop()
+        g.metrics_sql_count += 1
+
+
+def _instrument_engine(engine):
+    """Attach the SQL accounting listeners to an engine once"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _start_profiler(app):
+    if app.config.get('PROFILING_ENABLED') and request.headers.get('X-Profile') == '1':
+        profiler = SamplingProfiler(interval=app.config.get('PROFILE_SAMPLE_INTERVAL', 0.005))
+        profiler.start()
+        g.metrics_profiler = profiler
+
+
+def _finish_profiler(app, response=None):
+    profiler = g.pop('metrics_profiler', None)
+    if profiler is None:
+        return
+    profiler.stop()
+
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    filename = f"{timestamp}-{request.endpoint or 'unmatched'}.collapsed"
+    path = os.path.join(app.config.get('PROFILE_DIR', 'profiles'), filename)
+    try:
+        profiler.write(path)
+    except OSError as e:
+        logger.error(f"Error writing profile {path}: {str(e)}")
+        return
+
+    logger.info(f"Profiled {request.method} {request.path}: {profiler.sample_count} samples in {path}")
+    if response is not None:
+        response.headers['X-Profile-File'] = filename
+        response.headers['X-Profile-Samples'] = str(profiler.sample_count)
+
+
+def init_metrics(app):
+    """
+    Register request instrumentation and the /metrics endpoint
+
+    Args:
+        app: Flask application
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    with app.app_context():
+        _instrument_engine(db.engine)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_time = 0.0
+        _start_profiler(app)
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+
+        endpoint = request.endpoint or 'unmatched'
+        _request_latency.observe(
+            time.perf_counter() - start,
+            blueprint=request.blueprint or '',
+            endpoint=endpoint,
+            method=request.method,
+            status=response.status_code
+        )
+        _request_queries.observe(g.metrics_sql_count, endpoint=endpoint)
+        _request_sql_time.observe(g.metrics_sql_time, endpoint=endpoint)
+        _finish_profiler(app, response)
+        return response
+
+    @app.teardown_request
+    def stop_request_profiler(exc):
+        # after_request is skipped when a view raises; don't leave a sampler running
+        if 'metrics_profiler' in g:
+            _finish_profiler(app)
+
+    @app.route('/metrics')
+    def metrics():
+        """Metrics in Prometheus text exposition format"""
+        return Response(metrics_registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
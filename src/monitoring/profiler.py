@@ -0,0 +1,69 @@
+"""
+Sampling profiler for a single thread
+A background thread periodically captures the target thread's stack and
+counts identical stacks, producing "collapsed" output that flamegraph tools
+read directly (one `frame;frame;frame count` line per stack).
+"""
+from collections import Counter as StackCounter
+from typing import Optional
+import os
+import sys
+import threading
+
+
+class SamplingProfiler:
+    """Samples one thread's call stack at a fixed interval"""
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        """
+        Args:
+            thread_id: Thread to sample (defaults to the calling thread)
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples = StackCounter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Begin sampling in a daemon thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    @property
+    def sample_count(self) -> int:
+        """Total number of samples taken"""
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        """Samples in collapsed-stack format, most frequent first"""
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self.samples.most_common()
+        ) + "\n"
+
+    def write(self, path: str):
+        """Write collapsed stacks to a file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as handle:
+            handle.write(self.collapsed())
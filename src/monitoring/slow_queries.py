@@ -0,0 +1,202 @@
+"""
+Slow-query log - captures SQL statements that exceed a time threshold
+Each slow statement is recorded with the endpoint that issued it, written to
+a rotating log file and kept in a small in-memory buffer for the
+/debug/slow-queries endpoint. Bound parameters are redacted to their type
+names unless raw capture is switched on, since they hold emails, password
+hashes and addresses. On PostgreSQL a sample of slow SELECTs is re-run under
+EXPLAIN (ANALYZE, BUFFERS) to capture the plan.
+
+The engine listeners are only attached when the log is enabled, so a
+disabled log costs nothing per statement.
+"""
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Savepoint that isolates EXPLAIN failures from the caller's transaction
+_EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+
+class SlowQueryLog:
+    """Records statements slower than a threshold"""
+
+    def __init__(
+        self,
+        threshold_ms: float = 200.0,
+        explain_sample_rate: float = 0.0,
+        log_file: Optional[str] = None,
+        buffer_size: int = 100,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        capture_parameters: bool = False
+    ):
+        """
+        Args:
+            threshold_ms: Statements taking at least this long are recorded
+            explain_sample_rate: Fraction of slow SELECTs to EXPLAIN (PostgreSQL only)
+            log_file: Path of the rotating log file, or None to keep entries in memory only
+            buffer_size: Number of recent entries kept for the debug endpoint
+            max_bytes: Size at which the log file is rotated
+            backup_count: Number of rotated files kept
+            capture_parameters: Record bound parameter values instead of
+                their type names
+        """
+        self.threshold = threshold_ms / 1000.0
+        self.explain_sample_rate = explain_sample_rate
+        self.capture_parameters = capture_parameters
+        self._entries = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._file_logger = None
+
+        if log_file:
+            os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+            handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger = logging.getLogger(f"{__name__}.file.{os.path.abspath(log_file)}")
+            self._file_logger.handlers = [handler]
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.propagate = False
+
+    def install(self, engine):
+        """Attach the timing listeners to an engine"""
+        if not event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def uninstall(self, engine):
+        """Detach the timing listeners from an engine"""
+        if event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.remove(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        """Most recent slow statements, newest first"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        """Forget the buffered entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold or conn.info.get('slow_query_explaining'):
+            return
+
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+            "parameters": _jsonable(parameters) if self.capture_parameters else _redacted(parameters),
+            "executemany": executemany,
+            "endpoint": request.endpoint if has_request_context() else None,
+        }
+        if self._should_explain(conn, statement, executemany):
+            entry["plan"] = self._explain(conn, cursor, statement, parameters)
+
+        with self._lock:
+            self._entries.append(entry)
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(entry, default=str))
+        logger.warning(f"Slow query ({entry['duration_ms']} ms) from {entry['endpoint']}")
+
+    def _should_explain(self, conn, statement, executemany) -> bool:
+        return (
+            self.explain_sample_rate > 0
+            and not executemany
+            and conn.dialect.name == 'postgresql'
+            and statement.lstrip().upper().startswith('SELECT')
+            and random.random() < self.explain_sample_rate
+        )
+
+    @staticmethod
+    def _explain(conn, cursor, statement, parameters):
+        """Re-run a SELECT under EXPLAIN ANALYZE inside a savepoint"""
+        explain_cursor = cursor.connection.cursor()
+        conn.info['slow_query_explaining'] = True
+        try:
+            explain_cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            try:
+                explain_cursor.execute(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+                )
+                plan = explain_cursor.fetchone()[0]
+            finally:
+                explain_cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            return plan
+        except Exception as e:
+            logger.error(f"Error capturing query plan: {str(e)}")
+            return None
+        finally:
+            conn.info.pop('slow_query_explaining', None)
+            explain_cursor.close()
+
+
+def _jsonable(parameters):
+    """Bound parameters in a form json.dumps accepts"""
+    if isinstance(parameters, dict):
+        return {key: _jsonable(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_jsonable(value) for value in parameters]
+    if parameters is None or isinstance(parameters, (str, int, float, bool)):
+        return parameters
+    return str(parameters)
+
+
+def _redacted(parameters):
+    """Bound parameters with each value replaced by its type name"""
+    if isinstance(parameters, dict):
+        return {key: _redacted(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redacted(value) for value in parameters]
+    if parameters is None:
+        return None
+    return f"<{type(parameters).__name__}>"
+
+
+def init_slow_query_log(app, engine) -> Optional[SlowQueryLog]:
+    """
+    Install the slow-query log on an engine when enabled in config
+
+    Args:
+        app: Flask application
+        engine: SQLAlchemy engine to watch
+
+    Returns:
+        The installed SlowQueryLog, or None when disabled
+    """
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED'):
+        return None
+
+    slow_query_log = SlowQueryLog(
+        threshold_ms=app.config.get('SLOW_QUERY_THRESHOLD_MS', 200),
+        explain_sample_rate=app.config.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.0),
+        log_file=app.config.get('SLOW_QUERY_LOG_FILE'),
+        buffer_size=app.config.get('SLOW_QUERY_BUFFER_SIZE', 100),
+        capture_parameters=app.config.get('SLOW_QUERY_CAPTURE_PARAMETERS', False)
+    )
+    slow_query_log.install(engine)
+    app.extensions['slow_query_log'] = slow_query_log
+    logger.info(f"Slow-query log enabled at {app.config.get('SLOW_QUERY_THRESHOLD_MS', 200)} ms")
+    return slow_query_log
@@ -0,0 +1,155 @@
+"""
+Structured, non-blocking logging
+Request threads only merge a record's arguments into its message and put
+it on an in-memory queue; a QueueListener thread formats the records (as
+JSON lines by default) and writes them out, so a slow stream never stalls a
+request. High-volume events are tagged with a
+sample key and thinned out by SamplingFilter before they reach the queue.
+
+Hot paths should log with %-style arguments rather than f-strings so the
+message is only built for records that are actually emitted:
+
+    logger.info("Sent %s notifications", count, extra={"sample": "notification.send"})
+"""
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RESERVED_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'taskName'
+}
+
+_handler: Optional[logging.Handler] = None
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects, including `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRIBUTES and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of records tagged with a sample key
+
+    Records logged with `extra={"sample": key}` pass with the probability
+    configured for that key; untagged records and warnings always pass.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, rng: Optional[random.Random] = None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._random = (rng or random.Random()).random
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, 'sample', None)
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+        return self._random() < self.rates.get(key, 1.0)
+
+
+class _PreparedQueueHandler(QueueHandler):
+    """QueueHandler that defers formatting, but not message building, to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments may be mutable or bound to this thread's session, so the
+        # message is merged now, as QueueHandler.prepare does; formatting and
+        # the `extra` fields are left for the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def build_handlers(app_config: dict, stream=None):
+    """
+    Build the root handler stack described by application config
+
+    Args:
+        app_config: Flask config mapping
+        stream: Output stream (defaults to stderr)
+
+    Returns:
+        (handler to install on the root logger, QueueListener or None)
+    """
+    output = logging.StreamHandler(stream or sys.stderr)
+    if app_config.get('LOG_FORMAT', 'json') == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    sampling = SamplingFilter(app_config.get('LOG_SAMPLE_RATES'))
+
+    if not app_config.get('LOG_ASYNC', True):
+        output.addFilter(sampling)
+        return output, None
+
+    handler = _PreparedQueueHandler(queue.SimpleQueue())
+    handler.addFilter(sampling)
+    listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    return handler, listener
+
+
+def configure_logging(app_config: dict, stream=None):
+    """
+    Replace the root logging setup according to application config
+
+    Safe to call more than once: the handler installed by a previous call is
+    flushed and replaced. Handlers installed by anything else are left alone.
+
+    Args:
+        app_config: Flask config mapping
+        stream: Output stream (defaults to stderr)
+    """
+    global _handler, _listener
+
+    handler, listener = build_handlers(app_config, stream)
+
+    root = logging.getLogger()
+    shutdown_logging()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    root.addHandler(handler)
+    root.setLevel(app_config.get('LOG_LEVEL', 'INFO'))
+    _handler = handler
+
+    if listener is not None:
+        listener.start()
+        _listener = listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -9,6 +9,7 @@ from src.observers.notification_observer import (
     NotificationService,
     notification_service
 )
+from src.observers.rate_limit import TokenBucket, NotificationQueue
 
 __all__ = [
     'Observer',
@@ -16,5 +17,7 @@ __all__ = [
     'SMSNotifier',
     'PushNotifier',
     'NotificationService',
-    'notification_service'
+    'notification_service',
+    'TokenBucket',
+    'NotificationQueue'
 ]
@@ -3,12 +3,41 @@ Observer Pattern Implementation for Notification System
 This implements the Observer design pattern to notify users about new food listings.
 """
 from abc import ABC, abstractmethod
-from typing import List
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
 import logging
+import threading
+import time
+
+from src.observers.rate_limit import (
+    TokenBucket,
+    NotificationQueue,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    PRIORITY_LOW,
+)
+from src.monitoring.metrics import metrics_registry
 
 logger = logging.getLogger(__name__)
 
+FANOUT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+_fanout_histogram = metrics_registry.histogram(
+    "freshshare_notification_fanout_recipients",
+    "Recipients per notified listing",
+    buckets=FANOUT_BUCKETS
+)
+_sent_counter = metrics_registry.counter(
+    "freshshare_notifications_sent_total",
+    "Notifications delivered, by channel",
+    labels=("channel",)
+)
+_dropped_counter = metrics_registry.counter(
+    "freshshare_notifications_dropped_total",
+    "Notifications dropped, by reason",
+    labels=("reason",)
+)
+
 
 class Observer(ABC):
     """
@@ -16,6 +45,9 @@ class Observer(ABC):
     All concrete observers must implement the update method
     """
     
+    # Channel name used to look up rate limits for this observer
+    channel = "default"
+    
     @abstractmethod
     def update(self, listing_data: dict, user_data: dict):
         """
@@ -33,20 +65,25 @@ class EmailNotifier(Observer):
     Concrete Observer - Sends email notifications
     """
     
+    channel = "email"
+    
     def update(self, listing_data: dict, user_data: dict):
         """Send email notification to user"""
         try:
             # In production, integrate with email service (SendGrid, AWS SES, etc.)
-            logger.info(
-                f"[EMAIL] Sending notification to {user_data['email']}: "
-                f"New listing '{listing_data['title']}' available nearby"
+            logger.debug(
+                "[EMAIL] Sending notification to %s: New listing '%s' available nearby",
+                user_data['email'], listing_data['title']
             )
             
             # Simulate email sending
             email_body = self._compose_email(listing_data, user_data)
             # send_email(to=user_data['email'], subject="New Food Available Nearby", body=email_body)
             
-            logger.info(f"Email notification sent successfully to {user_data['email']}")
+            logger.info(
+                "Email notification sent successfully to %s", user_data['email'],
+                extra={"sample": "notification.send", "channel": self.channel}
+            )
             return True
             
         except Exception as e:
@@ -77,24 +114,29 @@ class SMSNotifier(Observer):
     Concrete Observer - Sends SMS notifications
     """
     
+    channel = "sms"
+    
     def update(self, listing_data: dict, user_data: dict):
         """Send SMS notification to user"""
         try:
             if not user_data.get('phone'):
-                logger.warning(f"User {user_data['email']} has no phone number")
+                logger.warning("User %s has no phone number", user_data['email'])
                 return False
             
             # In production, integrate with SMS service (Twilio, AWS SNS, etc.)
-            logger.info(
-                f"[SMS] Sending notification to {user_data['phone']}: "
-                f"New listing '{listing_data['title']}' available nearby"
+            logger.debug(
+                "[SMS] Sending notification to %s: New listing '%s' available nearby",
+                user_data['phone'], listing_data['title']
             )
             
             # Simulate SMS sending
             sms_message = self._compose_sms(listing_data)
             # send_sms(to=user_data['phone'], message=sms_message)
             
-            logger.info(f"SMS notification sent successfully to {user_data['phone']}")
+            logger.info(
+                "SMS notification sent successfully to %s", user_data['phone'],
+                extra={"sample": "notification.send", "channel": self.channel}
+            )
             return True
             
         except Exception as e:
@@ -115,20 +157,25 @@ class PushNotifier(Observer):
     Concrete Observer - Sends push notifications (for mobile apps)
     """
     
+    channel = "push"
+    
     def update(self, listing_data: dict, user_data: dict):
         """Send push notification to user"""
         try:
             # In production, integrate with push notification service (FCM, APNS, etc.)
-            logger.info(
-                f"[PUSH] Sending notification to user {user_data['id']}: "
-                f"New listing '{listing_data['title']}' available nearby"
+            logger.debug(
+                "[PUSH] Sending notification to user %s: New listing '%s' available nearby",
+                user_data['id'], listing_data['title']
             )
             
             # Simulate push notification
             push_payload = self._compose_push(listing_data)
             # send_push_notification(user_id=user_data['id'], payload=push_payload)
             
-            logger.info(f"Push notification sent successfully to user {user_data['id']}")
+            logger.info(
+                "Push notification sent successfully to user %s", user_data['id'],
+                extra={"sample": "notification.send", "channel": self.channel}
+            )
             return True
             
         except Exception as e:
@@ -153,9 +200,35 @@ class NotificationService:
     This is the core of the Observer pattern implementation
     """
     
-    def __init__(self):
-        """Initialize notification service with empty observer list"""
+    # Recipient roles that are served first when channels are saturated
+    ROLE_PRIORITIES = {
+        "charity": PRIORITY_HIGH,
+        "individual": PRIORITY_NORMAL,
+    }
+    
+    # Seconds between sweeps that drop refilled per-recipient buckets
+    BUCKET_SWEEP_SECONDS = 30.0
+    
+    def __init__(self, queue_size: int = 1000, max_delay_seconds: float = 300.0):
+        """
+        Initialize notification service with empty observer list
+        
+        Args:
+            queue_size: Maximum number of sends held while channels are rate limited
+            max_delay_seconds: Sends still queued after this long are dropped
+        """
         self._observers: List[Observer] = []
+        self._channel_limits: Dict[str, TokenBucket] = {}
+        self._recipient_limits: Dict[str, Tuple[float, float]] = {}
+        self._recipient_buckets: Dict[Tuple[str, int], TokenBucket] = {}
+        self._next_bucket_sweep = 0.0
+        self._queue = NotificationQueue(maxsize=queue_size)
+        self.max_delay_seconds = max_delay_seconds
+        self.dropped_count = 0
+        # Serializes drains from notify() and the drainer thread
+        self._drain_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._drainer: Optional[threading.Thread] = None
         logger.info("NotificationService initialized")
     
     def attach(self, observer: Observer):
@@ -167,7 +240,7 @@ class NotificationService:
         """
         if observer not in self._observers:
             self._observers.append(observer)
-            logger.info(f"Attached observer: {observer.__class__.__name__}")
+            logger.info("Attached observer: %s", observer.__class__.__name__)
     
     def detach(self, observer: Observer):
         """
@@ -178,46 +251,252 @@ class NotificationService:
         """
         if observer in self._observers:
             self._observers.remove(observer)
-            logger.info(f"Detached observer: {observer.__class__.__name__}")
+            logger.info("Detached observer: %s", observer.__class__.__name__)
+    
+    def set_rate_limit(
+        self,
+        channel: str,
+        rate: float,
+        burst: Optional[float] = None,
+        per_recipient_rate: Optional[float] = None,
+        per_recipient_burst: Optional[float] = None
+    ):
+        """
+        Limit how fast a channel is called
+        
+        Args:
+            channel: Observer channel name (email, sms, push)
+            rate: Sends per second allowed on the channel
+            burst: Maximum burst size on the channel
+            per_recipient_rate: Optional sends per second allowed per recipient
+            per_recipient_burst: Optional burst size per recipient
+        """
+        self._channel_limits[channel] = TokenBucket(rate, burst)
+        if per_recipient_rate:
+            self._recipient_limits[channel] = (per_recipient_rate, per_recipient_burst)
+        else:
+            self._recipient_limits.pop(channel, None)
+        self._recipient_buckets = {
+            key: bucket for key, bucket in self._recipient_buckets.items()
+            if key[0] != channel
+        }
+    
+    def configure(self, app_config: dict):
+        """
+        Apply rate limits and queue settings from application config
+        
+        Args:
+            app_config: Flask config mapping
+        """
+        self._queue = NotificationQueue(
+            maxsize=app_config.get('NOTIFICATION_QUEUE_SIZE', self._queue.maxsize)
+        )
+        self.max_delay_seconds = app_config.get(
+            'NOTIFICATION_MAX_DELAY_SECONDS', self.max_delay_seconds
+        )
+        self._channel_limits = {}
+        self._recipient_limits = {}
+        self._recipient_buckets = {}
+        for channel, limits in app_config.get('NOTIFICATION_RATE_LIMITS', {}).items():
+            self.set_rate_limit(channel, **limits)
+    
+    def is_backpressured(self) -> bool:
+        """True when producers should reduce the volume they hand to notify()"""
+        return self._queue.is_backpressured()
+    
+    def pending_count(self) -> int:
+        """Number of sends waiting for rate limit capacity"""
+        return len(self._queue)
     
     def notify(self, listing_data: dict, nearby_users: List[dict]):
         """
         Notify all observers about a new listing
         
+        Sends are queued per recipient and channel, then drained as far as
+        the rate limits allow. Anything left over is sent by the drainer
+        thread or later calls to notify() or drain(), or dropped once it is
+        too old.
+        
         Args:
             listing_data: Dictionary containing listing information
             nearby_users: List of user dictionaries who should be notified
+            
+        Returns:
+            Number of notifications sent successfully during this call
         """
+        expires_at = _expiry_timestamp(listing_data)
+        if expires_at is not None and expires_at <= time.time():
+            logger.info("Skipping notifications for expired listing: %s", listing_data['title'])
+            return 0
+        
         logger.info(
-            f"Notifying {len(nearby_users)} users about new listing: {listing_data['title']}"
+            "Notifying %s users about new listing: %s", len(nearby_users), listing_data['title'],
+            extra={"listing_id": listing_data.get('id'), "recipients": len(nearby_users)}
         )
         
-        notification_count = 0
+        deadline = time.time() + self.max_delay_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        
+        _fanout_histogram.observe(len(nearby_users))
         
         for user_data in nearby_users:
             # Skip the vendor who created the listing
             if user_data['id'] == listing_data['vendor_id']:
                 continue
             
-            # Notify all attached observers for this user
+            priority = self.ROLE_PRIORITIES.get(user_data.get('role'), PRIORITY_LOW)
+            
+            # Queue a send for every attached observer for this user
             for observer in self._observers:
+                dropped = self._queue.put(observer, listing_data, user_data, priority, deadline)
+                if dropped is not None:
+                    self.dropped_count += 1
+                    _dropped_counter.inc(reason="queue_full")
+                    logger.warning(
+                        "Notification queue full, dropped %s notification for user %s",
+                        dropped.observer.channel, dropped.user_data['id']
+                    )
+        
+        notification_count = self.drain()
+        
+        logger.info(
+            "Sent %s notifications successfully", notification_count,
+            extra={"listing_id": listing_data.get('id'), "sent": notification_count}
+        )
+        return notification_count
+    
+    def drain(self) -> int:
+        """
+        Send queued notifications that the rate limits currently allow
+        
+        Returns:
+            Number of notifications sent successfully
+        """
+        with self._drain_lock:
+            return self._drain()
+    
+    def start_drainer(self, interval_seconds: float):
+        """
+        Drain the queue every `interval_seconds` in a daemon thread
+        
+        Sends deferred by the rate limits then go out as capacity returns,
+        instead of waiting for the next listing to call notify().
+        """
+        if self._drainer is not None:
+            return
+        self._stop.clear()
+        
+        def run():
+            while not self._stop.wait(interval_seconds):
+                if not len(self._queue):
+                    continue
                 try:
-                    success = observer.update(listing_data, user_data)
-                    if success:
-                        notification_count += 1
+                    sent = self.drain()
+                    if sent:
+                        logger.info("Drained %s deferred notifications", sent)
                 except Exception as e:
-                    logger.error(
-                        f"Error notifying user {user_data['id']} via {observer.__class__.__name__}: {str(e)}"
-                    )
+                    logger.error("Error draining notifications: %s", e)
         
-        logger.info(f"Sent {notification_count} notifications successfully")
+        self._drainer = threading.Thread(target=run, name="notification-drainer", daemon=True)
+        self._drainer.start()
+    
+    def stop_drainer(self):
+        """Stop the drainer thread"""
+        self._stop.set()
+        if self._drainer is not None:
+            self._drainer.join()
+            self._drainer = None
+    
+    def _drain(self) -> int:
+        notification_count = 0
+        deferred = []
+        now = time.time()
+        
+        for job in self._queue.pop_all():
+            if job.deadline <= now:
+                self.dropped_count += 1
+                _dropped_counter.inc(reason="expired")
+                continue
+            
+            if not self._acquire(job.observer.channel, job.user_data['id']):
+                deferred.append(job)
+                continue
+            
+            try:
+                success = job.observer.update(job.listing_data, job.user_data)
+                if success:
+                    notification_count += 1
+                    _sent_counter.inc(channel=job.observer.channel)
+            except Exception as e:
+                logger.error(
+                    "Error notifying user %s via %s: %s",
+                    job.user_data['id'], job.observer.__class__.__name__, e
+                )
+        
+        if deferred:
+            self._queue.requeue(deferred)
+        
+        self._sweep_recipient_buckets()
         return notification_count
     
+    def _sweep_recipient_buckets(self):
+        """
+        Forget per-recipient buckets that have refilled to capacity
+        
+        A full bucket behaves exactly like the fresh one _acquire would
+        create, so dropping it loses nothing and keeps the map to recipients
+        sent to within roughly one refill window.
+        """
+        now = time.monotonic()
+        if now < self._next_bucket_sweep:
+            return
+        self._next_bucket_sweep = now + self.BUCKET_SWEEP_SECONDS
+        self._recipient_buckets = {
+            key: bucket for key, bucket in self._recipient_buckets.items()
+            if bucket.available() < bucket.capacity
+        }
+    
+    def _acquire(self, channel: str, user_id: int) -> bool:
+        """Take a token from the channel and recipient buckets, if limited"""
+        recipient_limit = self._recipient_limits.get(channel)
+        if recipient_limit:
+            key = (channel, user_id)
+            bucket = self._recipient_buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(*recipient_limit)
+                self._recipient_buckets[key] = bucket
+            if bucket.available() < 1:
+                return False
+        else:
+            bucket = None
+        
+        channel_bucket = self._channel_limits.get(channel)
+        if channel_bucket is not None and not channel_bucket.try_acquire():
+            return False
+        
+        return bucket is None or bucket.try_acquire()
+    
     def get_observer_count(self) -> int:
         """Get the number of attached observers"""
         return len(self._observers)
 
 
+def _expiry_timestamp(listing_data: dict) -> Optional[float]:
+    """Parse the listing's expiry_time into a POSIX timestamp, if present"""
+    expiry = listing_data.get('expiry_time')
+    if not expiry:
+        return None
+    if isinstance(expiry, str):
+        try:
+            expiry = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry.timestamp()
+
+
 # Singleton instance of notification service
 notification_service = NotificationService()
 
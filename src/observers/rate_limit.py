@@ -0,0 +1,155 @@
+"""
+Rate limiting and backpressure primitives for the notification system
+Token buckets cap how fast each channel (and optionally each recipient) is
+called, and a bounded priority queue holds sends that cannot go out yet.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+import heapq
+import itertools
+import threading
+import time
+
+
+# Notification priorities - lower values are sent first and dropped last
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiter
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Each send consumes one token; a send is refused when the bucket is empty.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to one second of tokens)
+            clock: Monotonic clock, injectable for tests
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(self.rate, 1.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take `tokens` from the bucket if available, without blocking"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def available(self) -> float:
+        """Current number of tokens in the bucket"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+@dataclass(order=True)
+class NotificationJob:
+    """A single pending send of one listing to one recipient over one channel"""
+    priority: int
+    deadline: float
+    seq: int
+    observer: Any = field(compare=False)
+    listing_data: dict = field(compare=False)
+    user_data: dict = field(compare=False)
+
+
+class NotificationQueue:
+    """
+    Bounded priority queue of notification jobs
+
+    When the queue is full, the least important job (highest priority value,
+    latest deadline) is evicted to make room, or the incoming job is rejected
+    if it is itself the least important.
+    """
+
+    def __init__(self, maxsize: int = 1000, high_water_ratio: float = 0.8):
+        """
+        Args:
+            maxsize: Maximum number of queued jobs
+            high_water_ratio: Fill ratio above which producers are told to back off
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.high_water = max(1, int(maxsize * high_water_ratio))
+        self._heap: List[NotificationJob] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def put(
+        self,
+        observer,
+        listing_data: dict,
+        user_data: dict,
+        priority: int,
+        deadline: float
+    ) -> Optional[NotificationJob]:
+        """
+        Enqueue a job
+
+        Returns:
+            The job that was dropped to respect the bound, or None
+        """
+        job = NotificationJob(
+            priority, deadline, next(self._seq), observer, listing_data, user_data
+        )
+        with self._lock:
+            if len(self._heap) < self.maxsize:
+                heapq.heappush(self._heap, job)
+                return None
+
+            worst_index = max(range(len(self._heap)), key=lambda i: self._heap[i])
+            worst = self._heap[worst_index]
+            if job >= worst:
+                return job
+
+            self._heap[worst_index] = job
+            heapq.heapify(self._heap)
+            return worst
+
+    def pop_all(self) -> List[NotificationJob]:
+        """Remove and return every queued job in priority order"""
+        with self._lock:
+            jobs = sorted(self._heap)
+            self._heap = []
+            return jobs
+
+    def requeue(self, jobs: List[NotificationJob]):
+        """Put back jobs that could not be sent yet (bypasses the bound check)"""
+        with self._lock:
+            for job in jobs:
+                heapq.heappush(self._heap, job)
+
+    def is_backpressured(self) -> bool:
+        """True when the queue is above its high-water mark"""
+        return len(self._heap) >= self.high_water
@@ -0,0 +1,14 @@
+"""
+Real-time listing feed package
+"""
+from src.realtime.subscriptions import Subscription, SubscriptionIndex
+from src.realtime.broker import LocalBroker, RedisBroker, listing_feed, configure_feed
+
+__all__ = [
+    'Subscription',
+    'SubscriptionIndex',
+    'LocalBroker',
+    'RedisBroker',
+    'listing_feed',
+    'configure_feed'
+]
@@ -0,0 +1,155 @@
+"""
+Listing event brokers for the real-time feed
+LocalBroker routes events to subscribers in this process. RedisBroker fans
+events out over Redis pub/sub so every node routes them to its own local
+subscribers, which is what multi-node deployments need.
+"""
+from typing import Optional
+import asyncio
+import json
+import logging
+import threading
+
+from src.realtime.subscriptions import Subscription, SubscriptionIndex
+
+logger = logging.getLogger(__name__)
+
+# Event types published by ListingService
+LISTING_CREATED = "listing.created"
+LISTING_UPDATED = "listing.updated"
+LISTING_DELETED = "listing.deleted"
+
+
+class LocalBroker:
+    """In-process broker backed by a spatial subscription index"""
+
+    def __init__(self):
+        self._index = SubscriptionIndex()
+
+    def subscribe(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        loop: Optional[asyncio.AbstractEventLoop] = None
+    ) -> Subscription:
+        """
+        Subscribe to listing events within a radius of a point
+
+        Args:
+            latitude: Latitude of the subscriber
+            longitude: Longitude of the subscriber
+            radius_km: Radius of interest in kilometres
+            loop: Event loop that will consume the subscription
+
+        Returns:
+            Subscription whose queue receives matching events
+        """
+        subscription = Subscription(latitude, longitude, radius_km, loop=loop)
+        self._index.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Stop delivering events to a subscription"""
+        self._index.remove(subscription)
+
+    def subscriber_count(self) -> int:
+        """Number of active subscriptions"""
+        return len(self._index)
+
+    def publish(self, event: dict) -> int:
+        """
+        Route an event to the subscribers around its listing
+
+        Args:
+            event: Dictionary with 'type' and 'listing' keys
+
+        Returns:
+            Number of local subscribers the event was delivered to
+        """
+        return self._dispatch(event)
+
+    def _dispatch(self, event: dict) -> int:
+        listing = event['listing']
+        subscribers = self._index.match(listing['latitude'], listing['longitude'])
+        for subscription in subscribers:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # The subscriber's event loop has shut down
+                self._index.remove(subscription)
+        return len(subscribers)
+
+    def publish_listing(self, event_type: str, listing_data: dict):
+        """Publish a listing event, logging rather than raising on failure"""
+        try:
+            self.publish({"type": event_type, "listing": listing_data})
+        except Exception as e:
+            logger.error(f"Error publishing {event_type} for listing {listing_data.get('id')}: {str(e)}")
+
+
+class RedisBroker(LocalBroker):
+    """
+    Broker that relays events through a Redis pub/sub channel
+
+    Requires the optional `redis` package. A daemon thread listens on the
+    channel and dispatches every event, including ones published by this
+    node, to local subscribers.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, channel: str = "freshshare:listings"):
+        super().__init__()
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RedisBroker requires the 'redis' package") from e
+
+        self.channel = channel
+        self._redis = redis.Redis(host=host, port=port)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(channel)
+        self._listener = threading.Thread(
+            target=self._listen, name="feed-redis-listener", daemon=True
+        )
+        self._listener.start()
+
+    def publish(self, event: dict) -> int:
+        """Publish an event to every node; returns the number of Redis receivers"""
+        return self._redis.publish(self.channel, json.dumps(event))
+
+    def _listen(self):
+        for message in self._pubsub.listen():
+            try:
+                self._dispatch(json.loads(message['data']))
+            except Exception as e:
+                logger.error(f"Error dispatching feed event from Redis: {str(e)}")
+
+
+class _FeedProxy:
+    """Stable handle on the configured broker, so callers can import it once"""
+
+    def __init__(self, broker: LocalBroker):
+        self.broker = broker
+
+    def __getattr__(self, name):
+        return getattr(self.broker, name)
+
+
+# Singleton handle on the listing feed broker
+listing_feed = _FeedProxy(LocalBroker())
+
+
+def configure_feed(app_config: dict):
+    """
+    Select the feed broker from application config
+
+    Args:
+        app_config: Flask config mapping
+    """
+    if app_config.get('FEED_BROKER', 'local') == 'redis':
+        if not isinstance(listing_feed.broker, RedisBroker):
+            listing_feed.broker = RedisBroker(
+                host=app_config['REDIS_HOST'], port=app_config['REDIS_PORT']
+            )
+    elif type(listing_feed.broker) is not LocalBroker:
+        listing_feed.broker = LocalBroker()
@@ -0,0 +1,233 @@
+"""
+Asynchronous Server-Sent Events server for the real-time listing feed
+Each open feed holds a coroutine rather than a worker thread, so thousands
+of idle clients cost almost nothing. Run standalone with:
+
+    python -m src.realtime.server
+
+or alongside the API by setting FEED_SERVER_ENABLED=True.
+"""
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+
+from flask_jwt_extended import decode_token
+from src.realtime.broker import listing_feed
+from src.services.auth_service import Principal, is_revoked
+
+logger = logging.getLogger(__name__)
+
+
+class FeedServer:
+    """Minimal HTTP/1.1 server that streams listing events as SSE"""
+
+    # Seconds between keep-alive comments on an idle stream
+    HEARTBEAT_SECONDS = 15
+    # Seconds allowed for a client to send its request headers
+    REQUEST_TIMEOUT_SECONDS = 10
+
+    def __init__(self, app, broker=listing_feed, host: Optional[str] = None, port: Optional[int] = None):
+        """
+        Args:
+            app: Flask application, used for config and JWT verification
+            broker: Broker to subscribe to
+            host: Interface to bind (defaults to FEED_HOST)
+            port: Port to bind (defaults to FEED_PORT)
+        """
+        self.app = app
+        self.broker = broker
+        self.host = host or app.config['FEED_HOST']
+        self.port = app.config['FEED_PORT'] if port is None else port
+        self.max_radius_km = app.config['FEED_MAX_RADIUS_KM']
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> asyncio.AbstractServer:
+        """Start listening; returns the asyncio server"""
+        self._server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Feed server listening on %s:%s", self.host, self.port)
+        return self._server
+
+    def serve_forever(self):
+        """Run the server on a new event loop until interrupted"""
+        async def main():
+            server = await self.start()
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(main())
+
+    def start_in_thread(self) -> threading.Thread:
+        """Run the server on a daemon thread next to a synchronous app server"""
+        thread = threading.Thread(target=self.serve_forever, name="feed-server", daemon=True)
+        thread.start()
+        return thread
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one client connection"""
+        subscription = None
+        try:
+            try:
+                path, headers = await asyncio.wait_for(
+                    self._read_request(reader), self.REQUEST_TIMEOUT_SECONDS
+                )
+            except (asyncio.TimeoutError, ValueError):
+                await self._respond_error(writer, 400, "Bad request")
+                return
+
+            url = urlsplit(path)
+            if url.path.rstrip('/') not in ('/stream', '/api/feed/stream'):
+                await self._respond_error(writer, 404, "Resource not found")
+                return
+
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            claims = await self._authenticate(headers, params)
+            if claims is None:
+                await self._respond_error(writer, 401, "Missing or invalid token")
+                return
+
+            try:
+                latitude = float(params['latitude'])
+                longitude = float(params['longitude'])
+                radius_km = float(params.get('radius_km', self.app.config['DEFAULT_SEARCH_RADIUS_KM']))
+            except (KeyError, ValueError):
+                await self._respond_error(writer, 400, "latitude and longitude are required")
+                return
+            # NaN fails every comparison, so these also reject it (and infinities)
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                await self._respond_error(writer, 400, "latitude or longitude out of range")
+                return
+            if not math.isfinite(radius_km) or radius_km <= 0:
+                await self._respond_error(writer, 400, "radius_km must be a positive number")
+                return
+            radius_km = min(radius_km, self.max_radius_km)
+
+            subscription = self.broker.subscribe(latitude, longitude, radius_km)
+            writer.write(self._stream_headers(headers))
+            await writer.drain()
+
+            loop = asyncio.get_running_loop()
+            next_check = loop.time() + self.HEARTBEAT_SECONDS
+            event_id = 0
+            while True:
+                event = await subscription.get(timeout=self.HEARTBEAT_SECONDS)
+                if loop.time() >= next_check:
+                    # Tokens expire and users are deactivated while streams stay open
+                    if not await self._authorized(claims):
+                        return
+                    next_check = loop.time() + self.HEARTBEAT_SECONDS
+                if event is None:
+                    writer.write(b": keep-alive\n\n")
+                else:
+                    event_id += 1
+                    writer.write(
+                        f"id: {event_id}\nevent: {event['type']}\n"
+                        f"data: {json.dumps(event['listing'])}\n\n".encode()
+                    )
+                await writer.drain()
+
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error("Error serving feed connection: %s", e)
+        finally:
+            if subscription is not None:
+                self.broker.unsubscribe(subscription)
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, Dict[str, str]]:
+        """Read the request line and headers"""
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) != 3 or request_line[0] != 'GET':
+            raise ValueError("Unsupported request")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return request_line[1], headers
+
+    async def _authenticate(self, headers: Dict[str, str], params: Dict[str, str]) -> Optional[dict]:
+        """
+        Verify the access token and that it has not been revoked
+
+        Browsers' EventSource cannot set headers, so the token may also be
+        passed as an `access_token` query parameter.
+
+        Returns:
+            The token's claims, or None if it is missing, invalid or revoked
+        """
+        token = params.get('access_token')
+        authorization = headers.get('authorization', '')
+        if authorization.startswith('Bearer '):
+            token = authorization[len('Bearer '):]
+        if not token:
+            return None
+        try:
+            with self.app.app_context():
+                claims = decode_token(token)
+        except Exception:
+            return None
+        return claims if await self._authorized(claims) else None
+
+    async def _authorized(self, claims: dict) -> bool:
+        """
+        True while a decoded token is unexpired and not revoked
+
+        Revocation is checked against the API's principal cache; a miss is
+        loaded on a worker thread so the event loop does not wait on the
+        database.
+        """
+        if 'exp' in claims and claims['exp'] <= time.time():
+            return False
+        user_id = int(claims['sub'])
+        found, principal = self.app.extensions['principal_cache'].peek(user_id)
+        if not found:
+            principal = await asyncio.get_running_loop().run_in_executor(
+                None, self._load_principal, user_id
+            )
+        return not is_revoked(principal, claims)
+
+    def _load_principal(self, user_id: int) -> Optional[Principal]:
+        with self.app.app_context():
+            return self.app.extensions['principal_cache'].get(user_id)
+
+    def _stream_headers(self, headers: Dict[str, str]) -> bytes:
+        lines = [
+            "HTTP/1.1 200 OK",
+            "Content-Type: text/event-stream",
+            "Cache-Control: no-cache",
+            "Connection: keep-alive",
+        ]
+        origin = headers.get('origin')
+        if origin and origin in self.app.config['CORS_ORIGINS']:
+            lines.append(f"Access-Control-Allow-Origin: {origin}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    @staticmethod
+    async def _respond_error(writer: asyncio.StreamWriter, status: int, message: str):
+        reasons = {400: "Bad Request", 401: "Unauthorized", 404: "Not Found"}
+        body = json.dumps({"error": message}).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {reasons[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+
+if __name__ == '__main__':
+    import os
+    from src.app import create_app
+
+    FeedServer(create_app(os.getenv('FLASK_CONFIG', 'development'))).serve_forever()
@@ -0,0 +1,145 @@
+"""
+Feed subscriptions and the spatial index used to route listing events
+Each subscription is a circle (centre and radius). The index buckets
+subscriptions into fixed-size lat/lon grid cells covering their circle, so
+routing an event only examines subscriptions registered in the event's cell.
+Circles whose bounding box spans too many cells (near the poles or across
+the antimeridian, where it widens to the whole globe) are kept in a
+separate set checked for every event instead.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import itertools
+import math
+import threading
+
+from src.geo import bounding_box, haversine_km
+
+# Grid cell size in degrees (~5.5 km of latitude)
+CELL_SIZE_DEG = 0.05
+
+# Most grid cells one subscription is registered in
+MAX_CELLS_PER_SUBSCRIPTION = 256
+
+
+def _cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    return (math.floor(latitude / CELL_SIZE_DEG), math.floor(longitude / CELL_SIZE_DEG))
+
+
+class Subscription:
+    """
+    A client's interest in listings within `radius_km` of a point
+
+    Events are delivered from any thread into an asyncio queue owned by the
+    subscriber's event loop. When the queue is full the oldest event is
+    discarded, so a slow client cannot hold up the broker.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        maxsize: int = 100
+    ):
+        self.id = next(self._ids)
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius_km = radius_km
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped_count = 0
+
+    def matches(self, latitude: float, longitude: float) -> bool:
+        """True if the point lies within this subscription's radius"""
+        return haversine_km(self.latitude, self.longitude, latitude, longitude) <= self.radius_km
+
+    def deliver(self, event: dict):
+        """Hand an event to the subscriber's loop (safe to call from any thread)"""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped_count += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Wait for the next event, returning None on timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class SubscriptionIndex:
+    """Thread-safe grid index of subscriptions"""
+
+    def __init__(self):
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._subscriptions: Dict[int, Subscription] = {}
+        self._subscription_cells: Dict[int, List[Tuple[int, int]]] = {}
+        # Subscriptions covering more than MAX_CELLS_PER_SUBSCRIPTION cells
+        self._wide: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    @staticmethod
+    def _covering_cells(subscription: Subscription) -> Optional[List[Tuple[int, int]]]:
+        """Grid cells overlapping the subscription circle's bounding box (None when too many)"""
+        min_lat, min_lon, max_lat, max_lon = bounding_box(
+            subscription.latitude, subscription.longitude, subscription.radius_km
+        )
+        min_cell = _cell(min_lat, min_lon)
+        max_cell = _cell(max_lat, max_lon)
+        count = (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1)
+        if count > MAX_CELLS_PER_SUBSCRIPTION:
+            return None
+        return [
+            (lat_cell, lon_cell)
+            for lat_cell in range(min_cell[0], max_cell[0] + 1)
+            for lon_cell in range(min_cell[1], max_cell[1] + 1)
+        ]
+
+    def add(self, subscription: Subscription):
+        """Register a subscription"""
+        cells = self._covering_cells(subscription)
+        with self._lock:
+            self._subscriptions[subscription.id] = subscription
+            if cells is None:
+                self._wide.add(subscription.id)
+                cells = []
+            self._subscription_cells[subscription.id] = cells
+            for cell in cells:
+                self._cells.setdefault(cell, set()).add(subscription.id)
+
+    def remove(self, subscription: Subscription):
+        """Unregister a subscription"""
+        with self._lock:
+            self._subscriptions.pop(subscription.id, None)
+            self._wide.discard(subscription.id)
+            for cell in self._subscription_cells.pop(subscription.id, []):
+                members = self._cells.get(cell)
+                if members is not None:
+                    members.discard(subscription.id)
+                    if not members:
+                        del self._cells[cell]
+
+    def match(self, latitude: float, longitude: float) -> List[Subscription]:
+        """Subscriptions whose circle contains the given point"""
+        with self._lock:
+            candidates = [
+                self._subscriptions[subscription_id]
+                for subscription_id in itertools.chain(
+                    self._cells.get(_cell(latitude, longitude), ()), self._wide
+                )
+            ]
+        return [
+            subscription for subscription in candidates
+            if subscription.matches(latitude, longitude)
+        ]
@@ -5,5 +5,8 @@ from src.routes.auth_routes import auth_bp
 from src.routes.listing_routes import listing_bp
 from src.routes.claim_routes import claim_bp
 from src.routes.user_routes import user_bp
+from src.routes.debug_routes import debug_bp
+from src.routes.impact_routes import impact_bp
+from src.routes.export_routes import export_bp
 
-__all__ = ['auth_bp', 'listing_bp', 'claim_bp', 'user_bp']
+__all__ = ['auth_bp', 'listing_bp', 'claim_bp', 'user_bp', 'debug_bp', 'impact_bp', 'export_bp']
@@ -1,9 +1,11 @@
 """
 Authentication routes
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
 from flask_jwt_extended import create_access_token
-from src.models import db, User, UserRole
+from src.models import db, User
+from src.services.auth_service import token_claims
+from src.validation import LOGIN, REGISTER, validate_json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,7 +14,8 @@ auth_bp = Blueprint('auth', __name__)
 
 
 @auth_bp.route('/register', methods=['POST'])
-def register():
+@validate_json(REGISTER)
+def register(data):
     """
     Register a new user
     ---
@@ -62,29 +65,15 @@ def register():
         description: Invalid request or user already exists
     """
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['email', 'password', 'name', 'role']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
-        
         # Check if user already exists
         if User.query.filter_by(email=data['email']).first():
             return jsonify({"error": "User already exists"}), 400
         
-        # Validate role
-        try:
-            role = UserRole(data['role'])
-        except ValueError:
-            return jsonify({"error": "Invalid role"}), 400
-        
         # Create user
         user = User(
             email=data['email'],
             name=data['name'],
-            role=role,
+            role=data['role'],
             phone=data.get('phone'),
             address=data.get('address'),
             latitude=data.get('latitude'),
@@ -93,7 +82,7 @@ def register():
         user.set_password(data['password'])
         
         # Set location if coordinates provided
-        if user.latitude and user.longitude:
+        if user.latitude is not None and user.longitude is not None:
             user.location = f"POINT({user.longitude} {user.latitude})"
         
         db.session.add(user)
@@ -113,7 +102,8 @@ def register():
 
 
 @auth_bp.route('/login', methods=['POST'])
-def login():
+@validate_json(LOGIN)
+def login(data):
     """
     Login and get JWT token
     ---
@@ -138,24 +128,28 @@ def login():
     responses:
       200:
         description: Login successful
+      400:
+        description: Missing or invalid fields
       401:
         description: Invalid credentials
+      403:
+        description: Account is deactivated
     """
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        if 'email' not in data or 'password' not in data:
-            return jsonify({"error": "Email and password required"}), 400
-        
         # Find user
         user = User.query.filter_by(email=data['email']).first()
         
         if not user or not user.check_password(data['password']):
             return jsonify({"error": "Invalid credentials"}), 401
         
-        # Create access token
-        access_token = create_access_token(identity=user.id)
+        # Tokens of inactive users are revoked on use; don't issue new ones
+        if not user.is_active:
+            return jsonify({"error": "Account is deactivated"}), 403
+        
+        # Create access token; role and verification travel in the token
+        access_token = create_access_token(
+            identity=str(user.id), additional_claims=token_claims(user)
+        )
         
         logger.info(f"User logged in: {user.email}")
         
@@ -1,11 +1,318 @@
 """
-Claim routes
+Claim routes - API endpoints for claiming food listings
 """
-from flask import Blueprint
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.services.claim_service import ClaimService, ClaimError
+from src.services.listing_service import ListingService
+from src.models import ClaimStatus, UserRole
+from src.services.auth_service import role_required
+from src.validation import CLAIM_CREATE, validate_json
+import logging
+
+logger = logging.getLogger(__name__)
 
 claim_bp = Blueprint('claims', __name__)
 
 
+@claim_bp.route('/', methods=['POST'])
+@jwt_required()
+@role_required(UserRole.CHARITY, UserRole.INDIVIDUAL)
+@validate_json(CLAIM_CREATE)
+def create_claim(data):
+    """
+    Claim some or all of a food listing
+    ---
+    tags:
+      - Claims
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - listing_id
+          properties:
+            listing_id:
+              type: integer
+              example: 1
+            quantity:
+              type: number
+              description: Amount to claim; claims everything remaining if omitted
+              example: 5
+            notes:
+              type: string
+              example: "Picking up at 6pm"
+    responses:
+      201:
+        description: Claim created successfully
+      400:
+        description: Invalid request data
+      403:
+        description: User is not allowed to claim food
+      404:
+        description: Listing not found
+      409:
+        description: Listing is no longer available in the requested quantity
+    """
+    try:
+        claimer_id = int(get_jwt_identity())
+
+        claim = ClaimService.create_claim(
+            claimer_id=claimer_id,
+            listing_id=data['listing_id'],
+            quantity=data.get('quantity'),
+            notes=data.get('notes')
+        )
+
+        return jsonify({
+            "message": "Claim created successfully",
+            "claim": claim.to_dict()
+        }), 201
+
+    except ClaimError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except Exception as e:
+        logger.error(f"Error creating claim: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
 @claim_bp.route('/', methods=['GET'])
+@jwt_required()
 def get_claims():
-    return {"message": "Claims endpoint - to be implemented"}
+    """
+    Get all claims made by the authenticated user
+    ---
+    tags:
+      - Claims
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: status
+        type: string
+        enum: [pending, confirmed, picked_up, cancelled]
+    responses:
+      200:
+        description: List of the user's claims
+      400:
+        description: Invalid status
+      401:
+        description: Unauthorized
+    """
+    try:
+        claimer_id = int(get_jwt_identity())
+        status = request.args.get('status', type=str)
+
+        claims = ClaimService.get_user_claims(claimer_id, status)
+
+        return jsonify({
+            "count": len(claims),
+            "claims": [claim.to_dict() for claim in claims]
+        }), 200
+
+    except ValueError:
+        return jsonify({"error": "Invalid status"}), 400
+    except Exception as e:
+        logger.error(f"Error getting claims: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@claim_bp.route('/<int:claim_id>', methods=['GET'])
+@jwt_required()
+def get_claim(claim_id):
+    """
+    Get a specific claim (claimer or listing vendor only)
+    ---
+    tags:
+      - Claims
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: claim_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Claim details
+      403:
+        description: Not authorized to view this claim
+      404:
+        description: Claim not found
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        claim = ClaimService.get_claim(claim_id)
+
+        if not claim:
+            return jsonify({"error": "Claim not found"}), 404
+
+        if user_id not in (claim.claimer_id, claim.listing.vendor_id):
+            return jsonify({"error": "Not authorized to view this claim"}), 403
+
+        return jsonify({"claim": claim.to_dict()}), 200
+
+    except Exception as e:
+        logger.error(f"Error getting claim: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@claim_bp.route('/listing/<int:listing_id>', methods=['GET'])
+@jwt_required()
+def get_listing_claims(listing_id):
+    """
+    Get all claims on one of the authenticated vendor's listings
+    ---
+    tags:
+      - Claims
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: listing_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: List of claims on the listing
+      403:
+        description: Not authorized to view claims on this listing
+      404:
+        description: Listing not found
+    """
+    try:
+        vendor_id = int(get_jwt_identity())
+        listing = ListingService.get_listing(listing_id)
+
+        if not listing:
+            return jsonify({"error": "Listing not found"}), 404
+
+        if listing.vendor_id != vendor_id:
+            return jsonify({"error": "Not authorized to view claims on this listing"}), 403
+
+        claims = ClaimService.get_listing_claims(listing_id)
+
+        return jsonify({
+            "count": len(claims),
+            "claims": [claim.to_dict() for claim in claims]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error getting listing claims: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+def _transition(claim_id: int, new_status: ClaimStatus, allow_claimer: bool):
+    """Authorize and apply a claim status change"""
+    try:
+        user_id = int(get_jwt_identity())
+        claim = ClaimService.get_claim(claim_id)
+
+        if not claim:
+            return jsonify({"error": "Claim not found"}), 404
+
+        is_vendor = claim.listing.vendor_id == user_id
+        is_claimer = allow_claimer and claim.claimer_id == user_id
+        if not (is_vendor or is_claimer):
+            return jsonify({"error": "Not authorized to update this claim"}), 403
+
+        claim = ClaimService.transition_claim(claim_id, new_status)
+
+        return jsonify({
+            "message": f"Claim {new_status.value}",
+            "claim": claim.to_dict()
+        }), 200
+
+    except ClaimError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except Exception as e:
+        logger.error(f"Error updating claim: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@claim_bp.route('/<int:claim_id>/confirm', methods=['POST'])
+@jwt_required()
+def confirm_claim(claim_id):
+    """
+    Confirm a pending claim (listing vendor only)
+    ---
+    tags:
+      - Claims
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: claim_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Claim confirmed
+      403:
+        description: Not authorized to update this claim
+      404:
+        description: Claim not found
+      409:
+        description: Claim is not pending
+    """
+    return _transition(claim_id, ClaimStatus.CONFIRMED, allow_claimer=False)
+
+
+@claim_bp.route('/<int:claim_id>/pickup', methods=['POST'])
+@jwt_required()
+def pickup_claim(claim_id):
+    """
+    Mark a claim as picked up (listing vendor only)
+    ---
+    tags:
+      - Claims
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: claim_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Claim picked up
+      403:
+        description: Not authorized to update this claim
+      404:
+        description: Claim not found
+      409:
+        description: Claim has already been picked up or cancelled
+    """
+    return _transition(claim_id, ClaimStatus.PICKED_UP, allow_claimer=False)
+
+
+@claim_bp.route('/<int:claim_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_claim(claim_id):
+    """
+    Cancel a claim and return its quantity to the listing
+    ---
+    tags:
+      - Claims
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: claim_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Claim cancelled
+      403:
+        description: Not authorized to update this claim
+      404:
+        description: Claim not found
+      409:
+        description: Claim has already been picked up or cancelled
+    """
+    return _transition(claim_id, ClaimStatus.CANCELLED, allow_claimer=True)
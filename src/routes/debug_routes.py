@@ -0,0 +1,55 @@
+"""
+Debug routes - diagnostics for administrators
+"""
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from src.models import UserRole
+from src.services.auth_service import role_required
+import logging
+
+logger = logging.getLogger(__name__)
+
+debug_bp = Blueprint('debug', __name__)
+
+
+@debug_bp.route('/slow-queries', methods=['GET'])
+@jwt_required()
+@role_required(UserRole.ADMIN)
+def get_slow_queries():
+    """
+    Recent SQL statements that exceeded the slow-query threshold
+    ---
+    tags:
+      - Debug
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        default: 50
+    responses:
+      200:
+        description: Slow statements with parameters, newest first
+      403:
+        description: Admin role required
+      404:
+        description: Slow-query log is disabled
+    """
+    try:
+        slow_query_log = current_app.extensions.get('slow_query_log')
+        if slow_query_log is None:
+            return jsonify({"error": "Slow-query log is disabled"}), 404
+
+        limit = request.args.get('limit', 50, type=int)
+        entries = slow_query_log.entries(limit=limit)
+
+        return jsonify({
+            "threshold_ms": slow_query_log.threshold * 1000,
+            "count": len(entries),
+            "queries": entries
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error getting slow queries: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
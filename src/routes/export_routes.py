@@ -0,0 +1,101 @@
+"""
+Export routes - Streaming downloads of listing and claim history
+"""
+from datetime import datetime, timezone
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models import UserRole
+from src.services.auth_service import current_role, role_required
+from src.services.export_service import CONTENT_TYPES, EXPORT_FORMATS, EXPORT_KINDS, ExportService
+import logging
+
+logger = logging.getLogger(__name__)
+
+export_bp = Blueprint('exports', __name__)
+
+
+def _parse_time(name: str):
+    value = request.args.get(name, type=str)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@export_bp.route('/<kind>', methods=['GET'])
+@jwt_required()
+@role_required(UserRole.VENDOR, UserRole.ADMIN)
+def export(kind):
+    """
+    Download listing or claim history as CSV or NDJSON
+    ---
+    tags:
+      - Exports
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: kind
+        type: string
+        required: true
+        enum: [listings, claims]
+      - in: query
+        name: format
+        type: string
+        enum: [csv, ndjson]
+        default: csv
+      - in: query
+        name: gzip
+        type: boolean
+        default: false
+        description: Gzip the file on the fly
+      - in: query
+        name: start
+        type: string
+        format: date-time
+        description: Only rows created (claimed) at or after this time
+      - in: query
+        name: end
+        type: string
+        format: date-time
+        description: Only rows created (claimed) before this time
+      - in: query
+        name: vendor_id
+        type: integer
+        description: Admins only; restrict to one vendor's listings
+    responses:
+      200:
+        description: Streamed export file, oldest rows first
+      400:
+        description: Invalid parameters
+      403:
+        description: Vendor or admin role required
+    """
+    try:
+        fmt = request.args.get('format', default='csv', type=str)
+        if kind not in EXPORT_KINDS or fmt not in EXPORT_FORMATS:
+            return jsonify({"error": "Export must be listings or claims, as csv or ndjson"}), 400
+
+        try:
+            start, end = _parse_time('start'), _parse_time('end')
+        except ValueError:
+            return jsonify({"error": "start and end must be ISO 8601 times"}), 400
+
+        # Vendors only ever export their own history
+        if current_role() == UserRole.ADMIN:
+            vendor_id = request.args.get('vendor_id', type=int)
+        else:
+            vendor_id = int(get_jwt_identity())
+
+        compress = request.args.get('gzip', default='false').lower() in ('1', 'true', 'yes')
+        filename = f"{kind}.{fmt}" + (".gz" if compress else "")
+        response = Response(
+            stream_with_context(ExportService.stream(kind, fmt, compress, vendor_id, start, end)),
+            mimetype='application/gzip' if compress else CONTENT_TYPES[fmt]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    except Exception as e:
+        logger.error(f"Error exporting {kind}: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
@@ -0,0 +1,168 @@
+"""
+Impact routes - Dashboard of food saved, meals provided and emissions avoided
+Every endpoint reads only the pre-aggregated impact rollups.
+"""
+from datetime import date
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from src.models import RollupDimension
+from src.services.impact_service import ImpactService
+import logging
+
+logger = logging.getLogger(__name__)
+
+impact_bp = Blueprint('impact', __name__)
+
+# Longest range a single request may cover, in days
+MAX_RANGE_DAYS = 366
+
+
+def _date_range():
+    """Parse ?start=&end= (YYYY-MM-DD); defaults to the last 30 days"""
+    default_start, default_end = ImpactService.default_range()
+    start = request.args.get('start', type=date.fromisoformat) or default_start
+    end = request.args.get('end', type=date.fromisoformat) or default_end
+    if start > end:
+        raise ValueError("start must not be after end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"Date range cannot exceed {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+@impact_bp.route('/summary', methods=['GET'])
+@jwt_required()
+def get_summary():
+    """
+    Platform-wide impact totals and daily series
+    ---
+    tags:
+      - Impact
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: start
+        type: string
+        format: date
+        description: First day (defaults to 29 days before end)
+      - in: query
+        name: end
+        type: string
+        format: date
+        description: Last day, inclusive (defaults to today)
+    responses:
+      200:
+        description: Pickups, food saved (kg), meals and CO2e avoided (kg)
+      400:
+        description: Invalid date range
+    """
+    try:
+        start, end = _date_range()
+        return jsonify(ImpactService.summary(start, end)), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting impact summary: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@impact_bp.route('/vendors/<int:vendor_id>', methods=['GET'])
+@jwt_required()
+def get_vendor_impact(vendor_id):
+    """
+    Impact totals and daily series for one vendor
+    ---
+    tags:
+      - Impact
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: vendor_id
+        type: integer
+        required: true
+      - in: query
+        name: start
+        type: string
+        format: date
+      - in: query
+        name: end
+        type: string
+        format: date
+    responses:
+      200:
+        description: The vendor's pickups, food saved, meals and CO2e avoided
+      400:
+        description: Invalid date range
+    """
+    try:
+        start, end = _date_range()
+        summary = ImpactService.summary(start, end, RollupDimension.VENDOR, str(vendor_id))
+        return jsonify({"vendor_id": vendor_id, **summary}), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting vendor impact: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@impact_bp.route('/breakdown', methods=['GET'])
+@jwt_required()
+def get_breakdown():
+    """
+    Impact ranked by vendor, area cell or food type
+    ---
+    tags:
+      - Impact
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: by
+        type: string
+        required: true
+        enum: [vendor, area_cell, food_type]
+      - in: query
+        name: start
+        type: string
+        format: date
+      - in: query
+        name: end
+        type: string
+        format: date
+      - in: query
+        name: limit
+        type: integer
+        default: 20
+    responses:
+      200:
+        description: Buckets ranked by food saved
+      400:
+        description: Invalid dimension or date range
+    """
+    try:
+        by = request.args.get('by', type=str)
+        if by not in {d.value for d in RollupDimension if d != RollupDimension.TOTAL}:
+            return jsonify({"error": "by must be one of vendor, area_cell, food_type"}), 400
+
+        start, end = _date_range()
+        limit = min(
+            request.args.get('limit', default=current_app.config['DEFAULT_PAGE_SIZE'], type=int),
+            current_app.config['MAX_PAGE_SIZE']
+        )
+        buckets = ImpactService.breakdown(RollupDimension(by), start, end, limit)
+
+        return jsonify({
+            "by": by,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "buckets": buckets
+        }), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting impact breakdown: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
@@ -1,11 +1,14 @@
 """
 Listing routes - API endpoints for food listings
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.services.listing_service import ListingService
-from src.models import FoodType
-from datetime import datetime
+from src.services.listing_service import ListingError, ListingService
+from src.models import ListingStatus, UserRole
+from src.services.auth_service import role_required
+from src.services.import_service import IMPORT_FORMATS, ImportService, format_for_filename
+from src.services.response_cache import cache_control, conditional_json, make_etag
+from src.validation import LISTING_CREATE, LISTING_STATUS_BATCH, LISTING_UPDATE, validate_json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,7 +18,9 @@ listing_bp = Blueprint('listings', __name__)
 
 @listing_bp.route('/', methods=['POST'])
 @jwt_required()
-def create_listing():
+@role_required(UserRole.VENDOR)
+@validate_json(LISTING_CREATE)
+def create_listing(data):
     """
     Create a new food listing
     ---
@@ -75,39 +80,11 @@ def create_listing():
         description: Invalid request data
       401:
         description: Unauthorized
+      403:
+        description: Only vendors can create listings
     """
     try:
-        vendor_id = get_jwt_identity()
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = [
-            'title', 'quantity', 'unit', 'food_type', 
-            'expiry_time', 'pickup_address', 'latitude', 'longitude'
-        ]
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
-        
-        # Parse expiry time
-        try:
-            data['expiry_time'] = datetime.fromisoformat(data['expiry_time'].replace('Z', '+00:00'))
-        except ValueError:
-            return jsonify({"error": "Invalid expiry_time format"}), 400
-        
-        # Parse optional datetime fields
-        for field in ['pickup_start_time', 'pickup_end_time']:
-            if field in data and data[field]:
-                try:
-                    data[field] = datetime.fromisoformat(data[field].replace('Z', '+00:00'))
-                except ValueError:
-                    return jsonify({"error": f"Invalid {field} format"}), 400
-        
-        # Validate food type
-        try:
-            data['food_type'] = FoodType(data['food_type'])
-        except ValueError:
-            return jsonify({"error": "Invalid food_type"}), 400
+        vendor_id = int(get_jwt_identity())
         
         # Create listing (this will trigger Observer pattern notifications)
         listing = ListingService.create_listing(vendor_id, data)
@@ -124,6 +101,68 @@ def create_listing():
         return jsonify({"error": "Internal server error"}), 500
 
 
+@listing_bp.route('/import', methods=['POST'])
+@jwt_required()
+@role_required(UserRole.VENDOR)
+def import_listings():
+    """
+    Bulk import listings from a CSV or NDJSON file
+    ---
+    tags:
+      - Listings
+    security:
+      - Bearer: []
+    consumes:
+      - multipart/form-data
+    parameters:
+      - in: formData
+        name: file
+        type: file
+        required: true
+        description: CSV with a header row, or one JSON object per line; fields as for creating a listing
+      - in: query
+        name: format
+        type: string
+        enum: [csv, ndjson]
+        description: File format (default from the file extension, else csv)
+      - in: query
+        name: batch_size
+        type: integer
+        description: Rows inserted per transaction (default IMPORT_BATCH_SIZE)
+    responses:
+      200:
+        description: Import finished; counts and per-row errors
+      400:
+        description: Missing file or invalid parameters
+      401:
+        description: Unauthorized
+      403:
+        description: Only vendors can import listings
+    """
+    try:
+        vendor_id = int(get_jwt_identity())
+        
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({"error": "Missing file"}), 400
+        
+        fmt = request.args.get('format') or format_for_filename(upload.filename) or 'csv'
+        if fmt not in IMPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
+        
+        batch_size = request.args.get('batch_size', type=int)
+        if batch_size is not None and batch_size < 1:
+            return jsonify({"error": "batch_size must be positive"}), 400
+        
+        result = ImportService.import_listings(vendor_id, upload.stream, fmt, batch_size)
+        
+        return jsonify(result.to_dict()), 200
+        
+    except Exception as e:
+        logger.error(f"Error importing listings: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
 @listing_bp.route('/search', methods=['GET'])
 @jwt_required()
 def search_listings():
@@ -162,9 +201,17 @@ def search_listings():
         name: offset
         type: integer
         default: 0
+      - in: query
+        name: sort
+        type: string
+        enum: [newest, rank]
+        default: newest
+        description: rank orders by distance, expiry urgency and quantity and includes distance_km
     responses:
       200:
         description: List of nearby food listings
+      304:
+        description: Not modified (If-None-Match matched the result-set ETag)
       400:
         description: Invalid parameters
       401:
@@ -178,11 +225,15 @@ def search_listings():
         food_type = request.args.get('food_type', type=str)
         limit = request.args.get('limit', default=20, type=int)
         offset = request.args.get('offset', default=0, type=int)
+        sort = request.args.get('sort', default='newest', type=str)
         
         # Validate required parameters
         if latitude is None or longitude is None:
             return jsonify({"error": "latitude and longitude are required"}), 400
         
+        if sort not in ('newest', 'rank'):
+            return jsonify({"error": "sort must be 'newest' or 'rank'"}), 400
+        
         # Search listings
         listings = ListingService.search_listings(
             latitude=latitude,
@@ -190,13 +241,26 @@ def search_listings():
             radius_km=radius_km,
             food_type=food_type,
             limit=limit,
-            offset=offset
+            offset=offset,
+            sort=sort
         )
         
-        return jsonify({
-            "count": len(listings),
-            "listings": [listing.to_dict() for listing in listings]
-        }), 200
+        # The result-set version: the query plus the ID and version of every row
+        etag = make_etag(
+            'search', request.query_string,
+            *(f"{listing.id}@{listing.updated_at}" for listing in listings)
+        )
+        return conditional_json(
+            etag,
+            cache_control(
+                (listing.expiry_time for listing in listings),
+                current_app.config['SEARCH_CACHE_MAX_AGE']
+            ),
+            lambda: {
+                "count": len(listings),
+                "listings": [listing.to_dict() for listing in listings]
+            }
+        )
         
     except Exception as e:
         logger.error(f"Error searching listings: {str(e)}")
@@ -221,18 +285,26 @@ def get_listing(listing_id):
     responses:
       200:
         description: Listing details
+      304:
+        description: Not modified (If-None-Match matched the ETag)
       404:
         description: Listing not found
       401:
         description: Unauthorized
     """
     try:
-        listing = ListingService.get_listing(listing_id)
+        # Check the version first so a revalidation never loads the listing
+        version = ListingService.get_listing_version(listing_id)
         
-        if not listing:
+        if version is None:
             return jsonify({"error": "Listing not found"}), 404
         
-        return jsonify({"listing": listing.to_dict()}), 200
+        etag = make_etag('listing', listing_id, version.updated_at, version.vendor_updated_at)
+        return conditional_json(
+            etag,
+            cache_control([version.expiry_time], current_app.config['LISTING_CACHE_MAX_AGE']),
+            lambda: {"listing": ListingService.get_listing_record(listing_id).to_dict()}
+        )
         
     except Exception as e:
         logger.error(f"Error getting listing: {str(e)}")
@@ -241,7 +313,8 @@ def get_listing(listing_id):
 
 @listing_bp.route('/<int:listing_id>', methods=['PUT'])
 @jwt_required()
-def update_listing(listing_id):
+@validate_json(LISTING_UPDATE)
+def update_listing(listing_id, data):
     """
     Update a listing (vendor only)
     ---
@@ -267,38 +340,106 @@ def update_listing(listing_id):
               type: number
             status:
               type: string
+              enum: [cancelled]
+              description: Cancelling also cancels the listing's pending claims
+            updated_at:
+              type: string
+              format: date-time
+              description: The listing's updated_at as last read; the update fails with 409 if it changed since
     responses:
       200:
         description: Listing updated successfully
+      400:
+        description: Invalid request data
       403:
         description: Not authorized to update this listing
       404:
         description: Listing not found
+      409:
+        description: Listing changed since updated_at, or cannot move to the new status
     """
+    expected_updated_at = data.pop('updated_at', None)
+    if not data:
+        return jsonify({"error": "No updatable fields in request"}), 400
+    
     try:
-        vendor_id = get_jwt_identity()
-        listing = ListingService.get_listing(listing_id)
-        
-        if not listing:
-            return jsonify({"error": "Listing not found"}), 404
-        
-        # Check if user is the owner
-        if listing.vendor_id != vendor_id:
-            return jsonify({"error": "Not authorized to update this listing"}), 403
-        
-        data = request.get_json()
-        updated_listing = ListingService.update_listing(listing_id, data)
+        # Ownership and version are checked by the UPDATE itself
+        updated_listing = ListingService.update_listing(
+            listing_id,
+            data,
+            vendor_id=int(get_jwt_identity()),
+            expected_updated_at=expected_updated_at
+        )
         
         return jsonify({
             "message": "Listing updated successfully",
             "listing": updated_listing.to_dict()
         }), 200
         
+    except ListingError as e:
+        return jsonify({"error": str(e)}), e.status_code
     except Exception as e:
         logger.error(f"Error updating listing: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
 
+@listing_bp.route('/status', methods=['POST'])
+@jwt_required()
+@role_required(UserRole.VENDOR)
+@validate_json(LISTING_STATUS_BATCH)
+def update_listing_statuses(data):
+    """
+    Cancel many of your listings at once (vendor only)
+    ---
+    tags:
+      - Listings
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - listing_ids
+            - status
+          properties:
+            listing_ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 3]
+            status:
+              type: string
+              enum: [cancelled]
+    responses:
+      200:
+        description: Updated listings, and the ids that were left unchanged
+      400:
+        description: Invalid request data
+      403:
+        description: Only vendors can update listings
+    """
+    try:
+        listings = ListingService.update_listing_statuses(
+            int(get_jwt_identity()), data['listing_ids'], data['status']
+        )
+        updated_ids = {listing.id for listing in listings}
+        
+        return jsonify({
+            "message": f"{len(listings)} listings marked {data['status'].value}",
+            "listings": [listing.to_dict() for listing in listings],
+            "skipped": sorted(set(data['listing_ids']) - updated_ids)
+        }), 200
+        
+    except ListingError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except Exception as e:
+        logger.error(f"Error updating listing statuses: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
 @listing_bp.route('/<int:listing_id>', methods=['DELETE'])
 @jwt_required()
 def delete_listing(listing_id):
@@ -321,22 +462,17 @@ def delete_listing(listing_id):
         description: Not authorized to delete this listing
       404:
         description: Listing not found
+      409:
+        description: Listing is already closed
     """
     try:
-        vendor_id = get_jwt_identity()
-        listing = ListingService.get_listing(listing_id)
-        
-        if not listing:
-            return jsonify({"error": "Listing not found"}), 404
-        
-        # Check if user is the owner
-        if listing.vendor_id != vendor_id:
-            return jsonify({"error": "Not authorized to delete this listing"}), 403
-        
-        ListingService.delete_listing(listing_id)
+        # Ownership is checked by the cancelling UPDATE itself
+        ListingService.delete_listing(listing_id, int(get_jwt_identity()))
         
         return jsonify({"message": "Listing deleted successfully"}), 200
         
+    except ListingError as e:
+        return jsonify({"error": str(e)}), e.status_code
     except Exception as e:
         logger.error(f"Error deleting listing: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
@@ -357,17 +493,28 @@ def get_my_listings():
         name: status
         type: string
         enum: [available, claimed, completed, expired, cancelled]
+      - in: query
+        name: include_archived
+        type: boolean
+        description: Also return old completed, expired and cancelled listings from the archive
     responses:
       200:
         description: List of vendor's listings
+      400:
+        description: Invalid status
       401:
         description: Unauthorized
     """
     try:
-        vendor_id = get_jwt_identity()
+        vendor_id = int(get_jwt_identity())
         status = request.args.get('status', type=str)
         
-        listings = ListingService.get_vendor_listings(vendor_id, status)
+        if status and status not in {s.value for s in ListingStatus}:
+            return jsonify({"error": f"Invalid status: {status}"}), 400
+        
+        include_archived = request.args.get('include_archived', default='false').lower() in ('1', 'true', 'yes')
+        
+        listings = ListingService.get_vendor_listings(vendor_id, status, include_archived)
         
         return jsonify({
             "count": len(listings),
@@ -1,7 +1,14 @@
 """
 User routes
 """
-from flask import Blueprint
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models import db, User
+from src.services.rating_service import RatingService, RatingError
+from src.validation import RATING, validate_json
+import logging
+
+logger = logging.getLogger(__name__)
 
 user_bp = Blueprint('users', __name__)
 
@@ -9,3 +16,132 @@ user_bp = Blueprint('users', __name__)
 @user_bp.route('/profile', methods=['GET'])
 def get_profile():
     return {"message": "User profile endpoint - to be implemented"}
+
+
+@user_bp.route('/<int:user_id>/ratings', methods=['POST'])
+@jwt_required()
+@validate_json(RATING)
+def rate_user(user_id, data):
+    """
+    Rate a vendor or claimer you dealt with over a listing
+    ---
+    tags:
+      - Users
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: user_id
+        type: integer
+        required: true
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - listing_id
+            - score
+          properties:
+            listing_id:
+              type: integer
+              example: 1
+            score:
+              type: integer
+              minimum: 1
+              maximum: 5
+              example: 5
+            comment:
+              type: string
+              example: "Friendly and on time"
+    responses:
+      201:
+        description: Rating submitted; returns the rated user's updated aggregates
+      400:
+        description: Invalid request data
+      403:
+        description: The users are not counterparties on the listing
+      404:
+        description: User or listing not found
+      409:
+        description: Already rated for this listing
+    """
+    try:
+        rater_id = int(get_jwt_identity())
+
+        if db.session.get(User, user_id) is None:
+            return jsonify({"error": "User not found"}), 404
+
+        rating = RatingService.submit_rating(
+            rater_id=rater_id,
+            rated_id=user_id,
+            listing_id=data['listing_id'],
+            score=data['score'],
+            comment=data.get('comment')
+        )
+        rated = db.session.get(User, user_id)
+
+        return jsonify({
+            "message": "Rating submitted successfully",
+            "rating": rating.to_dict(),
+            "user_rating": round(rated.rating, 2),
+            "user_rating_count": rated.rating_count
+        }), 201
+
+    except RatingError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except Exception as e:
+        logger.error(f"Error rating user: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+@user_bp.route('/<int:user_id>/ratings', methods=['GET'])
+@jwt_required()
+def get_user_ratings(user_id):
+    """
+    Get a user's rating summary and the ratings they received
+    ---
+    tags:
+      - Users
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: user_id
+        type: integer
+        required: true
+      - in: query
+        name: limit
+        type: integer
+        default: 20
+      - in: query
+        name: offset
+        type: integer
+        default: 0
+    responses:
+      200:
+        description: Rating summary and ratings, newest first
+      404:
+        description: User not found
+    """
+    try:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return jsonify({"error": "User not found"}), 404
+
+        limit = min(
+            request.args.get('limit', default=current_app.config['DEFAULT_PAGE_SIZE'], type=int),
+            current_app.config['MAX_PAGE_SIZE']
+        )
+        offset = request.args.get('offset', default=0, type=int)
+        ratings = RatingService.get_user_ratings(user_id, limit, offset)
+
+        return jsonify({
+            "rating": round(user.rating or 0.0, 2),
+            "rating_count": user.rating_count or 0,
+            "ratings": [rating.to_dict() for rating in ratings]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error getting ratings: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
@@ -1,6 +1,8 @@
 """
 Services package initialization
 """
-from src.services.listing_service import ListingService
+from src.services.listing_service import ListingService, ListingError
+from src.services.claim_service import ClaimService, ClaimError
+from src.services.rating_service import RatingService, RatingError
 
-__all__ = ['ListingService']
+__all__ = ['ListingService', 'ListingError', 'ClaimService', 'ClaimError', 'RatingService', 'RatingError']
@@ -0,0 +1,115 @@
+"""
+Archive service - Moves old terminal-state listings out of the hot table
+Completed, expired and cancelled listings are never searched again, but
+cancelling is a soft delete, so without archival they would pile up in
+food_listings next to the rows every search reads. Listings that reached a
+terminal state more than ARCHIVE_AFTER_DAYS ago are moved, with their
+claims, into archived_food_listings and archived_claims. Ids are kept, so
+ratings and vendor history still resolve.
+
+Each batch is moved with set-based INSERT ... SELECT and DELETE statements
+in one transaction, so a listing is always in exactly one of the tables.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, insert, literal
+from src.models import (
+    db, ArchivedClaim, ArchivedListing, Claim, FoodListing, ListingRecord, ListingStatus
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (ListingStatus.COMPLETED, ListingStatus.EXPIRED, ListingStatus.CANCELLED)
+
+_LISTING_COLUMNS = ListingRecord.FIELDS
+_CLAIM_COLUMNS = (
+    "id", "listing_id", "claimer_id", "quantity", "status", "notes", "claimed_at",
+    "confirmed_at", "picked_up_at", "cancelled_at", "reserved_until",
+)
+
+
+class ArchiveService:
+    """Service class for archiving terminal listings"""
+
+    @staticmethod
+    def archive_listings(older_than_days: int = 90, batch_size: int = 500) -> int:
+        """
+        Move terminal listings last updated before the cutoff to the archive
+
+        Listings are walked once in primary-key order; each batch of matches
+        is copied and deleted in its own transaction.
+
+        Args:
+            older_than_days: Only listings last updated at least this many days ago
+            batch_size: Listings moved per transaction
+
+        Returns:
+            Number of listings archived
+        """
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=older_than_days)
+
+        total = 0
+        last_id = 0
+        while True:
+            ids = db.session.scalars(
+                db.select(FoodListing.id)
+                .where(
+                    FoodListing.id > last_id,
+                    FoodListing.status.in_(TERMINAL_STATUSES),
+                    FoodListing.updated_at < cutoff
+                )
+                .order_by(FoodListing.id)
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            try:
+                ArchiveService._move(ids, now)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error("Error archiving listings %s-%s: %s", ids[0], ids[-1], e)
+                raise
+            total += len(ids)
+
+        logger.info("Archived %s terminal listings older than %s days", total, older_than_days)
+        return total
+
+    @staticmethod
+    def _move(ids: List[int], archived_at: datetime):
+        db.session.execute(
+            insert(ArchivedListing).from_select(
+                [*_LISTING_COLUMNS, "archived_at"],
+                db.select(
+                    *(getattr(FoodListing, column) for column in _LISTING_COLUMNS),
+                    literal(archived_at, ArchivedListing.archived_at.type)
+                ).where(FoodListing.id.in_(ids))
+            )
+        )
+        db.session.execute(
+            insert(ArchivedClaim).from_select(
+                list(_CLAIM_COLUMNS),
+                db.select(*(getattr(Claim, column) for column in _CLAIM_COLUMNS))
+                .where(Claim.listing_id.in_(ids))
+            )
+        )
+        db.session.execute(
+            delete(Claim).where(Claim.listing_id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            delete(FoodListing).where(FoodListing.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def get_archived_listings(vendor_id: int, status: Optional[ListingStatus] = None) -> List[ListingRecord]:
+        """Archived listings of a vendor, newest first, as read-only records"""
+        query = ListingRecord.select(source=ArchivedListing).where(ArchivedListing.vendor_id == vendor_id)
+        if status:
+            query = query.where(ArchivedListing.status == status)
+        rows = db.session.execute(query.order_by(ArchivedListing.created_at.desc()))
+        return [ListingRecord(row) for row in rows]
@@ -0,0 +1,354 @@
+"""
+Async listing service - Listing search, reads, creation and claims on asyncio
+The same operations as ListingService and the reservation engine, run over
+an async SQLAlchemy engine (asyncpg on PostgreSQL, aiosqlite on SQLite) so a
+single event loop can keep thousands of connections in flight while it
+waits on the database. Validation, query building, ranking and quantity
+allocation are shared with the synchronous services; only the I/O differs.
+
+Claims take quantity with the same conditional UPDATE as the reservation
+engine, retried on conflict, but are not group-committed and do not sweep
+lapsed reservations (the periodic sweeper still returns them). Searches
+always read the database: the hot set refreshes through the synchronous
+session and is left to the threaded API.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import asyncio
+
+from geoalchemy2.functions import ST_DWithin, ST_Distance, ST_MakePoint
+from sqlalchemy.engine import make_url
+from src.models import db, Claim, ClaimStatus, FoodListing, ListingRecord, User
+from src.observers.notification_observer import notification_service
+from src.services.auth_service import PrincipalCache, Principal
+from src.services.listing_service import ListingService
+from src.services.listing_queries import (
+    arrange_page, bounding_box_query, keep_within_radius, page_candidates, region_filter, search_filters
+)
+from src.services.ranking import rank_listings
+from src.services.reservation_service import ClaimError, ClaimRequest, ReservationEngine
+from src.realtime.broker import listing_feed, LISTING_CREATED
+import logging
+
+try:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError:  # pragma: no cover - SQLAlchemy < 2.0
+    async_sessionmaker = create_async_engine = None
+
+logger = logging.getLogger(__name__)
+
+# Async drivers used for each synchronous database dialect
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_uri(app_config: dict) -> str:
+    """
+    Database URI for the async engine
+
+    ASYNC_DATABASE_URI wins when set; otherwise SQLALCHEMY_DATABASE_URI is
+    switched to the async driver of its dialect.
+    """
+    if app_config.get('ASYNC_DATABASE_URI'):
+        return app_config['ASYNC_DATABASE_URI']
+    url = make_url(app_config['SQLALCHEMY_DATABASE_URI'])
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for database: {url.get_backend_name()}")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+class AsyncListingService:
+    """Listing operations over an async SQLAlchemy engine"""
+
+    def __init__(self, app, database_uri: Optional[str] = None):
+        """
+        Args:
+            app: Flask application, used for config and app-level extensions
+            database_uri: Async database URI (defaults to async_database_uri())
+        """
+        if create_async_engine is None:
+            raise RuntimeError("The async listing service requires SQLAlchemy 2.0")
+        self.app = app
+        # Same pool settings as the synchronous engine
+        self.engine = create_async_engine(
+            database_uri or async_database_uri(app.config),
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        )
+        # Results are serialized after commit, so keep loaded attributes
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.reservation_ttl = timedelta(minutes=app.config.get('CLAIM_RESERVATION_TTL_MINUTES', 30))
+
+    async def dispose(self):
+        """Close the engine's pooled connections"""
+        await self.engine.dispose()
+
+    @property
+    def _has_postgis(self) -> bool:
+        return self.engine.dialect.name == 'postgresql'
+
+    async def search_listings(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float = 5.0,
+        food_type: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        sort: str = 'newest'
+    ) -> List[ListingRecord]:
+        """
+        Search for available food listings near a location
+
+        Same arguments and results as ListingService.search_listings.
+        """
+        filters = search_filters(latitude, longitude, radius_km, food_type)
+        async with self.sessions() as session:
+            if not self._has_postgis:
+                rows = (await session.execute(
+                    bounding_box_query(
+                        FoodListing, filters, latitude, longitude, radius_km, FoodListing.created_at
+                    )
+                )).all()
+                rows, distances = keep_within_radius(rows, latitude, longitude, radius_km)
+                distance_by_id = page_candidates(
+                    rows, distances, limit, offset, sort, ListingService.RANK_CANDIDATE_LIMIT
+                )
+                listings = await self._load_records(session, list(distance_by_id))
+                listings = arrange_page(listings, distance_by_id, radius_km, limit, offset, sort)
+            else:
+                point = ST_MakePoint(longitude, latitude)
+                within = ST_DWithin(FoodListing.location, point, radius_km * 1000)
+                if sort == 'rank':
+                    distance = ST_Distance(FoodListing.location, point)
+                    rows = (await session.execute(
+                        ListingRecord.select(distance)
+                        .where(*filters, within)
+                        .order_by(distance)
+                        .limit(ListingService.RANK_CANDIDATE_LIMIT)
+                    )).all()
+                    ranked = rank_listings(
+                        [(ListingRecord(row[:-1]), row[-1] / 1000) for row in rows], radius_km
+                    )
+                    listings = ranked[offset:offset + limit]
+                else:
+                    rows = await session.execute(
+                        ListingRecord.select()
+                        .where(*filters, within)
+                        .order_by(FoodListing.created_at.desc())
+                        .limit(limit)
+                        .offset(offset)
+                    )
+                    listings = [ListingRecord(row) for row in rows]
+
+        logger.debug("Found %s listings within %skm (async)", len(listings), radius_km)
+        return listings
+
+    @staticmethod
+    async def _load_records(session, ids: List[int]) -> List[ListingRecord]:
+        """Load listing records by ID, preserving the order of `ids`"""
+        if not ids:
+            return []
+        rows = await session.execute(ListingRecord.select().where(FoodListing.id.in_(ids)))
+        by_id = {row.id: ListingRecord(row) for row in rows}
+        return [by_id[listing_id] for listing_id in ids if listing_id in by_id]
+
+    async def get_listing_record(self, listing_id: int) -> Optional[ListingRecord]:
+        """Get a listing by ID as a read-only record"""
+        async with self.sessions() as session:
+            records = await self._load_records(session, [listing_id])
+        return records[0] if records else None
+
+    async def create_listing(self, vendor_id: int, listing_data: dict) -> dict:
+        """
+        Validate and create a listing, then publish and notify as ListingService does
+
+        The caller is responsible for checking that vendor_id belongs to a vendor.
+
+        Args:
+            vendor_id: ID of the vendor creating the listing
+            listing_data: Raw listing fields (request body)
+
+        Returns:
+            The created listing, serialized
+
+        Raises:
+            ValueError: If a field is missing or invalid
+        """
+        listing = ListingService.build_listing(
+            vendor_id, ListingService.validate_listing_data(listing_data)
+        )
+        async with self.sessions() as session:
+            vendor = await session.get(User, vendor_id)
+            if vendor is None:
+                raise ValueError("Vendor not found")
+            listing.vendor = vendor
+            session.add(listing)
+            await session.commit()
+            payload = listing.to_dict()
+
+        logger.info(
+            "Created listing: %s - %s", payload['id'], payload['title'],
+            extra={"listing_id": payload['id']}
+        )
+
+        hot_set = self.app.extensions.get('listing_hot_set')
+        if hot_set is not None:
+            hot_set.mark_dirty([payload['id']])
+        listing_feed.publish_listing(LISTING_CREATED, payload)
+        await self._notify_nearby_users(payload)
+        return payload
+
+    async def _notify_nearby_users(self, payload: dict):
+        """Notify verified users around a new listing without blocking the loop"""
+        try:
+            users_data = await self.find_nearby_users(
+                payload['latitude'], payload['longitude'], 5.0, exclude_user_id=payload['vendor_id']
+            )
+            if not users_data:
+                logger.info("No nearby users found to notify")
+                return
+            users_data = ListingService.limit_recipients(users_data, f"listing {payload['id']}")
+            # Channel sends are blocking I/O
+            await asyncio.to_thread(notification_service.notify, payload, users_data)
+        except Exception as e:
+            logger.error("Error notifying nearby users: %s", e)
+
+    async def find_nearby_users(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float = 5.0,
+        exclude_user_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Verified users within a radius, as dictionaries
+
+        Same selection as ListingService.find_nearby_users.
+        """
+        filters = [
+            User.verified == True,
+            *region_filter(User, latitude, longitude, radius_km)
+        ]
+        if exclude_user_id:
+            filters.append(User.id != exclude_user_id)
+
+        async with self.sessions() as session:
+            if not self._has_postgis:
+                rows = (await session.execute(
+                    bounding_box_query(User, filters, latitude, longitude, radius_km)
+                )).all()
+                rows, _ = keep_within_radius(rows, latitude, longitude, radius_km)
+                ids = [row.id for row in rows]
+                if not ids:
+                    return []
+                users = {user.id: user for user in await session.scalars(
+                    db.select(User).where(User.id.in_(ids))
+                )}
+                return [users[user_id].to_dict() for user_id in ids if user_id in users]
+
+            point = ST_MakePoint(longitude, latitude)
+            users = await session.scalars(
+                db.select(User).where(
+                    *filters,
+                    User.location.isnot(None),
+                    ST_DWithin(User.location, point, radius_km * 1000)
+                )
+            )
+            return [user.to_dict() for user in users]
+
+    async def claim_listing(
+        self,
+        claimer_id: int,
+        listing_id: int,
+        quantity: Optional[float] = None,
+        notes: Optional[str] = None
+    ) -> dict:
+        """
+        Reserve quantity on a listing and create a pending claim
+
+        The caller is responsible for checking the claimer's role.
+
+        Args:
+            claimer_id: ID of the charity or individual claiming the food
+            listing_id: ID of the listing to claim
+            quantity: Amount to claim; claims everything left if omitted
+            notes: Optional message for the vendor
+
+        Returns:
+            The created claim, serialized
+
+        Raises:
+            ClaimError: If the quantity is invalid or the listing cannot
+                satisfy the claim
+        """
+        if quantity is not None and quantity <= 0:
+            raise ClaimError("quantity must be positive")
+        request = ClaimRequest(claimer_id, quantity, notes)
+
+        async with self.sessions() as session:
+            for _ in range(ReservationEngine.MAX_BATCH_ATTEMPTS):
+                # Loaded before the UPDATE so the listing's row lock is held as briefly as possible
+                claimer = await session.get(User, claimer_id)
+                if claimer is None:
+                    raise ClaimError("Claimer not found", 404)
+                row = (await session.execute(
+                    db.select(
+                        FoodListing.remaining_quantity,
+                        FoodListing.status,
+                        FoodListing.expiry_time,
+                        FoodListing.unit
+                    ).where(FoodListing.id == listing_id)
+                )).one_or_none()
+                if row is None:
+                    raise ClaimError("Listing not found", 404)
+
+                if not ReservationEngine.allocate([request], row):
+                    raise request.error
+
+                result = await session.execute(
+                    ReservationEngine.take_statement(listing_id, request.quantity)
+                )
+                if result.rowcount == 1:
+                    claim = Claim(
+                        listing_id=listing_id,
+                        claimer=claimer,
+                        quantity=request.quantity,
+                        notes=notes,
+                        status=ClaimStatus.PENDING,
+                        reserved_until=datetime.now(timezone.utc) + self.reservation_ttl
+                    )
+                    session.add(claim)
+                    await session.commit()
+                    payload = claim.to_dict()
+                    break
+
+                # Another writer changed the listing between our read and write
+                await session.rollback()
+            else:
+                raise ClaimError("Listing is busy, please try again", 409)
+
+        logger.info("Created claim: %s for listing %s (%s)", payload['id'], listing_id, payload['quantity'])
+        hot_set = self.app.extensions.get('listing_hot_set')
+        if hot_set is not None:
+            hot_set.mark_dirty([listing_id])
+        return payload
+
+    async def get_principal(self, cache: PrincipalCache, user_id: int) -> Optional[Principal]:
+        """
+        Principal for the revocation check, through the shared principal cache
+
+        Misses are loaded on the async engine instead of the cache's
+        synchronous session.
+        """
+        found, principal = cache.peek(user_id)
+        if found:
+            return principal
+        async with self.sessions() as session:
+            principal = PrincipalCache.from_row(
+                (await session.execute(PrincipalCache.query(user_id))).one_or_none()
+            )
+        cache.put(user_id, principal)
+        return principal
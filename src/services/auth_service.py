@@ -0,0 +1,201 @@
+"""
+Authentication service - Stateless authorization from JWT claims
+Tokens issued at login carry the user's role, verification flag and token
+version, so routes can authorize without loading the user. A small TTL cache
+of principals backs the revocation check made on every request: a token is
+rejected when its user is deactivated or its version is stale. Changing a
+user's role, verification or active flag bumps the version, which both
+invalidates the cached principal and revokes tokens carrying the old claims.
+"""
+from dataclasses import dataclass
+from functools import wraps
+from typing import Dict, Optional, Tuple
+import threading
+import time
+
+from flask import current_app, has_app_context, jsonify
+from flask_jwt_extended import get_jwt
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from src.models import db, User, UserRole
+import logging
+
+logger = logging.getLogger(__name__)
+
+# User attributes embedded in tokens; changing any of them revokes old tokens
+_CLAIM_ATTRIBUTES = ('role', 'verified', 'is_active')
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by authorization checks"""
+    id: int
+    role: UserRole
+    verified: bool
+    is_active: bool
+    token_version: int
+
+
+class PrincipalCache:
+    """Thread-safe TTL cache of principals keyed by user ID"""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 10000):
+        """
+        Args:
+            ttl_seconds: How long a loaded principal is trusted
+            max_entries: Oldest entries are evicted beyond this size
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[int, Tuple[float, Optional[Principal]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        """Return the principal for a user, loading it on a miss or expiry"""
+        found, principal = self.peek(user_id)
+        if found:
+            return principal
+
+        principal = self._load(user_id)
+        self.put(user_id, principal)
+        return principal
+
+    def peek(self, user_id: int) -> Tuple[bool, Optional[Principal]]:
+        """Cached principal without loading: (found, principal)"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return True, entry[1]
+        return False, None
+
+    def put(self, user_id: int, principal: Optional[Principal]):
+        """Cache a principal loaded elsewhere (None caches an unknown user)"""
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, principal)
+
+    def invalidate(self, user_id: int):
+        """Drop a user's cached principal"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Drop every cached principal"""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _load(user_id: int) -> Optional[Principal]:
+        return PrincipalCache.from_row(
+            db.session.execute(PrincipalCache.query(user_id)).one_or_none()
+        )
+
+    @staticmethod
+    def query(user_id: int):
+        """SELECT of the columns a principal is built from"""
+        return db.select(
+            User.id, User.role, User.verified, User.is_active, User.token_version
+        ).where(User.id == user_id)
+
+    @staticmethod
+    def from_row(row) -> Optional[Principal]:
+        """Principal of a row selected by query(), or None when no row was found"""
+        if row is None:
+            return None
+        return Principal(
+            id=row.id,
+            role=row.role,
+            verified=bool(row.verified),
+            is_active=row.is_active is not False,
+            token_version=row.token_version or 0
+        )
+
+
+def is_revoked(principal: Optional[Principal], jwt_payload: dict) -> bool:
+    """True when a token's user is gone or deactivated, or its claims are stale"""
+    if principal is None or not principal.is_active:
+        return True
+    # Tokens issued before claims were embedded carry no version
+    return jwt_payload.get('ver', principal.token_version) != principal.token_version
+
+
+def token_claims(user: User) -> dict:
+    """Additional claims embedded in a user's access token"""
+    return {
+        "role": user.role.value,
+        "verified": bool(user.verified),
+        "ver": user.token_version or 0,
+    }
+
+
+def get_principal_cache() -> PrincipalCache:
+    """The principal cache of the current application"""
+    return current_app.extensions['principal_cache']
+
+
+def init_auth(app, jwt):
+    """
+    Install the principal cache and JWT callbacks on an application
+
+    Args:
+        app: Flask application
+        jwt: The application's JWTManager
+    """
+    app.extensions['principal_cache'] = PrincipalCache(
+        ttl_seconds=app.config.get('PRINCIPAL_CACHE_TTL_SECONDS', 60)
+    )
+
+    @jwt.token_in_blocklist_loader
+    def is_token_revoked(jwt_header, jwt_payload):
+        return is_revoked(get_principal_cache().get(int(jwt_payload['sub'])), jwt_payload)
+
+
+def current_role() -> Optional[UserRole]:
+    """Role of the authenticated user, read from the token"""
+    role = get_jwt().get('role')
+    if role is None:
+        # Tokens issued before roles were embedded: fall back to the cache
+        principal = get_principal_cache().get(int(get_jwt()['sub']))
+        return principal.role if principal else None
+    return UserRole(role)
+
+
+def role_required(*roles: UserRole):
+    """
+    Restrict a route to users with one of the given roles
+
+    Must be applied below @jwt_required(). The check reads the role claim
+    from the token and issues no database query.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if current_role() not in roles:
+                allowed = ", ".join(role.value for role in roles)
+                return jsonify({"error": f"This action requires role: {allowed}"}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@event.listens_for(User, 'before_update')
+def _revoke_tokens_on_claim_change(mapper, connection, target):
+    """Bump the token version when an embedded claim changes"""
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _CLAIM_ATTRIBUTES):
+        target.token_version = (target.token_version or 0) + 1
+        state.session.info.setdefault('revoked_user_ids', set()).add(target.id)
+        logger.info(f"Revoked existing tokens for user {target.id}")
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_revoked_principals(session):
+    """Evict principals only once the new token version is visible to other sessions"""
+    user_ids = session.info.pop('revoked_user_ids', None)
+    if not user_ids or not has_app_context():
+        return
+    cache = current_app.extensions.get('principal_cache')
+    if cache is not None:
+        for user_id in user_ids:
+            cache.invalidate(user_id)
@@ -0,0 +1,177 @@
+"""
+Claim service - Business logic for claiming food listings
+Quantity is reserved through the reservation engine, which decrements a
+listing's remaining quantity with conditional UPDATEs so concurrent
+claimers can never allocate more than is available.
+"""
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import update
+from src.models import db, Claim, ClaimStatus, FoodListing, ListingStatus
+from src.services.reservation_service import ClaimError, reservation_engine
+from src.services.impact_service import ImpactService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Claim statuses from which each transition is allowed
+_ALLOWED_TRANSITIONS = {
+    ClaimStatus.CONFIRMED: (ClaimStatus.PENDING,),
+    ClaimStatus.PICKED_UP: (ClaimStatus.PENDING, ClaimStatus.CONFIRMED),
+    ClaimStatus.CANCELLED: (ClaimStatus.PENDING, ClaimStatus.CONFIRMED),
+}
+
+
+class ClaimService:
+    """Service class for managing claims"""
+
+    @staticmethod
+    def create_claim(
+        claimer_id: int,
+        listing_id: int,
+        quantity: Optional[float] = None,
+        notes: Optional[str] = None
+    ) -> Claim:
+        """
+        Claim some or all of a listing's remaining quantity
+
+        The claim starts out PENDING and holds its quantity until the
+        reservation TTL lapses, unless the vendor confirms it first. The
+        caller is responsible for checking the claimer's role.
+
+        Args:
+            claimer_id: ID of the charity or individual claiming the food
+            listing_id: ID of the listing to claim
+            quantity: Amount to claim; claims everything left if omitted
+            notes: Optional message for the vendor
+
+        Returns:
+            Created Claim object
+
+        Raises:
+            ClaimError: If the quantity is invalid or the listing cannot
+                satisfy the claim
+        """
+        try:
+            if quantity is not None and quantity <= 0:
+                raise ClaimError("quantity must be positive")
+
+            # Reservation is batched with concurrent claims on the same listing
+            claim_id = reservation_engine.reserve(listing_id, claimer_id, quantity, notes)
+            claim = Claim.query.get(claim_id)
+
+            logger.info("Created claim: %s for listing %s (%s)", claim.id, listing_id, claim.quantity)
+
+            return claim
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Error creating claim: %s", e)
+            raise
+
+    @staticmethod
+    def get_claim(claim_id: int) -> Optional[Claim]:
+        """Get a claim by ID"""
+        return Claim.query.get(claim_id)
+
+    @staticmethod
+    def get_user_claims(claimer_id: int, status: Optional[str] = None) -> List[Claim]:
+        """Get all claims made by a user"""
+        query = Claim.query.filter(Claim.claimer_id == claimer_id)
+
+        if status:
+            query = query.filter(Claim.status == ClaimStatus(status))
+
+        return query.order_by(Claim.claimed_at.desc()).all()
+
+    @staticmethod
+    def get_listing_claims(listing_id: int) -> List[Claim]:
+        """Get all claims on a listing"""
+        return (
+            Claim.query.filter(Claim.listing_id == listing_id)
+            .order_by(Claim.claimed_at.desc())
+            .all()
+        )
+
+    @staticmethod
+    def transition_claim(claim_id: int, new_status: ClaimStatus) -> Claim:
+        """
+        Move a claim to a new status
+
+        The status change is a conditional UPDATE on the current status, so two
+        concurrent transitions (e.g. cancel and pickup) cannot both succeed.
+
+        Args:
+            claim_id: ID of the claim
+            new_status: Target status (confirmed, picked_up or cancelled)
+
+        Returns:
+            Updated Claim object
+        """
+        try:
+            allowed_from = _ALLOWED_TRANSITIONS.get(new_status)
+            if not allowed_from:
+                raise ClaimError(f"Cannot move claim to {new_status.value}")
+
+            now = datetime.now(timezone.utc)
+            timestamp_column = {
+                ClaimStatus.CONFIRMED: "confirmed_at",
+                ClaimStatus.PICKED_UP: "picked_up_at",
+                ClaimStatus.CANCELLED: "cancelled_at",
+            }[new_status]
+
+            # Confirmed and collected claims no longer expire
+            result = db.session.execute(
+                update(Claim)
+                .where(Claim.id == claim_id, Claim.status.in_(allowed_from))
+                .values({"status": new_status, timestamp_column: now, "reserved_until": None})
+                .execution_options(synchronize_session=False)
+            )
+
+            claim = Claim.query.get(claim_id)
+            if not claim:
+                raise ClaimError("Claim not found", 404)
+            if result.rowcount != 1:
+                raise ClaimError(
+                    f"Claim is {claim.status.value} and cannot be {new_status.value}", 409
+                )
+
+            if new_status == ClaimStatus.CANCELLED:
+                reservation_engine.release(claim.listing_id, claim.quantity)
+            elif new_status == ClaimStatus.PICKED_UP:
+                ClaimService._complete_listing_if_collected(claim.listing_id)
+                ImpactService.record_pickup(claim_id)
+
+            db.session.commit()
+
+            logger.info("Claim %s moved to %s", claim_id, new_status.value)
+
+            return claim
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Error updating claim: %s", e)
+            raise
+
+    @staticmethod
+    def _complete_listing_if_collected(listing_id: int):
+        """Mark a fully claimed listing completed once every claim is picked up"""
+        outstanding = (
+            db.select(Claim.id)
+            .where(
+                Claim.listing_id == listing_id,
+                Claim.status.in_((ClaimStatus.PENDING, ClaimStatus.CONFIRMED))
+            )
+            .exists()
+        )
+        db.session.execute(
+            update(FoodListing)
+            .where(
+                FoodListing.id == listing_id,
+                FoodListing.status == ListingStatus.CLAIMED,
+                ~outstanding
+            )
+            .values(status=ListingStatus.COMPLETED)
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,206 @@
+"""
+Export service - Streaming CSV/NDJSON exports of listings and claims
+Rows are read with a column projection through a server-side cursor
+(`yield_per`), in keyset-paginated chunks that each use their own short
+connection and transaction, and are encoded and optionally gzip-compressed
+as they arrive. Memory stays flat regardless of history size, and no
+transaction stays open on the database for the length of a download.
+
+Archived listings and claims keep their ids, so exports read the live and
+archive tables as one UNION ALL and a vendor's history stays complete after
+the archival job has run.
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Iterator, Optional
+import csv
+import io
+import json
+import zlib
+
+from sqlalchemy import union_all
+from src.models import db, ArchivedClaim, ArchivedListing, Claim, FoodListing, User
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_KINDS = ('listings', 'claims')
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+def _listing_columns(listing):
+    return (
+        listing.id, listing.vendor_id, listing.title, listing.food_type,
+        listing.quantity, listing.remaining_quantity, listing.unit,
+        listing.status, listing.expiry_time, listing.pickup_address,
+        listing.latitude, listing.longitude, listing.created_at,
+    )
+
+
+def _claim_columns(claim, listing):
+    return (
+        claim.id, claim.listing_id, listing.title.label("listing_title"), listing.vendor_id,
+        claim.claimer_id, User.name.label("claimer_name"), claim.quantity, listing.unit,
+        claim.status, claim.claimed_at, claim.confirmed_at, claim.picked_up_at, claim.cancelled_at,
+    )
+
+
+# Live and archive tables, read together
+_SOURCES = ((FoodListing, Claim), (ArchivedListing, ArchivedClaim))
+
+
+def _plain(value):
+    """JSON/CSV-friendly form of a column value"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class ExportService:
+    """Service class for streaming exports"""
+
+    # Rows read per connection/transaction, and fetched per cursor round trip
+    CHUNK_ROWS = 10000
+    YIELD_PER = 1000
+
+    @staticmethod
+    def _source_query(
+        kind: str,
+        listing,
+        claim,
+        vendor_id: Optional[int],
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ):
+        """Export SELECT over one pair of listing and claim tables"""
+        if kind == 'listings':
+            timestamp = listing.created_at
+            query = db.select(*_listing_columns(listing))
+        else:
+            timestamp = claim.claimed_at
+            query = (
+                db.select(*_claim_columns(claim, listing))
+                .join(listing, listing.id == claim.listing_id)
+                .join(User, User.id == claim.claimer_id)
+            )
+        if vendor_id is not None:
+            query = query.where(listing.vendor_id == vendor_id)
+        if start is not None:
+            query = query.where(timestamp >= start)
+        if end is not None:
+            query = query.where(timestamp < end)
+        return query
+
+    @staticmethod
+    def _query(kind: str, vendor_id: Optional[int], start: Optional[datetime], end: Optional[datetime]):
+        rows = union_all(*(
+            ExportService._source_query(kind, listing, claim, vendor_id, start, end)
+            for listing, claim in _SOURCES
+        )).subquery()
+        return db.select(rows), rows.c.id
+
+    @staticmethod
+    def iter_rows(
+        kind: str,
+        vendor_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[dict]:
+        """
+        Yield export rows as dictionaries, oldest first
+
+        Args:
+            kind: 'listings' or 'claims'
+            vendor_id: Only rows of this vendor's listings, if given
+            start: Only rows created (claimed) at or after this time
+            end: Only rows created (claimed) before this time
+        """
+        if kind not in EXPORT_KINDS:
+            raise ValueError(f"Unknown export: {kind}")
+        query, key = ExportService._query(kind, vendor_id, start, end)
+
+        last_id = 0
+        while True:
+            count = 0
+            # A fresh connection per chunk keeps each read transaction short
+            with db.engine.connect() as connection:
+                result = connection.execution_options(yield_per=ExportService.YIELD_PER).execute(
+                    query.where(key > last_id).order_by(key).limit(ExportService.CHUNK_ROWS)
+                )
+                for row in result:
+                    count += 1
+                    last_id = row.id
+                    yield {name: _plain(value) for name, value in row._mapping.items()}
+            if count < ExportService.CHUNK_ROWS:
+                return
+
+    @staticmethod
+    def columns(kind: str) -> list:
+        """Column names of an export, in output order"""
+        columns = _listing_columns(FoodListing) if kind == 'listings' else _claim_columns(Claim, FoodListing)
+        return [column.key for column in columns]
+
+    @staticmethod
+    def stream(
+        kind: str,
+        fmt: str = 'csv',
+        compress: bool = False,
+        vendor_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[bytes]:
+        """
+        Encode an export as CSV or NDJSON, optionally gzip-compressed
+
+        Output is produced in pieces of roughly YIELD_PER rows, so it can be
+        written to a response or file as it is read.
+
+        Args:
+            kind: 'listings' or 'claims'
+            fmt: 'csv' or 'ndjson'
+            compress: Gzip the output
+            vendor_id: Only rows of this vendor's listings, if given
+            start: Only rows created (claimed) at or after this time
+            end: Only rows created (claimed) before this time
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        # wbits=31 writes a gzip header and trailer
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        def emit(text: str) -> bytes:
+            data = text.encode('utf-8')
+            return compressor.compress(data) if compressor else data
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(ExportService.columns(kind))
+
+        rows = 0
+        for row in ExportService.iter_rows(kind, vendor_id, start, end):
+            if writer:
+                writer.writerow(["" if value is None else value for value in row.values()])
+            else:
+                buffer.write(json.dumps(row))
+                buffer.write("\n")
+            rows += 1
+            if rows % ExportService.YIELD_PER == 0:
+                piece = emit(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                if piece:
+                    yield piece
+
+        tail = emit(buffer.getvalue())
+        if compressor:
+            tail += compressor.flush()
+        if tail:
+            yield tail
+        logger.info(f"Exported {rows} {kind} as {fmt}{' (gzip)' if compress else ''}")
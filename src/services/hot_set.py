@@ -0,0 +1,496 @@
+"""
+Listing hot set - in-process read model of the listings search can return
+Only AVAILABLE, unexpired listings with quantity left are held, so the set
+stays small even when the listings table is large. Coordinates, times and
+quantities live in parallel arrays indexed by slot, and a lat/lon grid maps
+cells to slots, so a search touches only the cells its circle covers and
+never queries the database.
+
+The set is kept current by ListingService (create, update, delete), by claim
+commits (listings whose quantity changed are refreshed on the next search),
+by dropping listings as they expire, and by a periodic full reconcile with
+the database that also picks up writes made by other processes.
+"""
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import heapq
+import math
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.geo import HAS_NUMPY, bounding_box, within_radius
+from src.models import db, FoodListing, FoodType, ListingRecord, ListingStatus
+from src.services.ranking import score_listing
+import logging
+
+if HAS_NUMPY:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Grid cell size in degrees (~2.2 km of latitude)
+CELL_SIZE_DEG = 0.02
+
+_FOOD_TYPE_CODES = {food_type: code for code, food_type in enumerate(FoodType)}
+
+
+def _cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    return (math.floor(latitude / CELL_SIZE_DEG), math.floor(longitude / CELL_SIZE_DEG))
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _top(values, count: int, largest: bool) -> list:
+    """Positions of the `count` largest (or smallest) values, in order"""
+    if count <= 0:
+        return []
+    if HAS_NUMPY and isinstance(values, np.ndarray):
+        keys = -values if largest else values
+        if count < len(keys):
+            positions = np.argpartition(keys, count - 1)[:count]
+        else:
+            positions = np.arange(len(keys))
+        return positions[np.argsort(keys[positions], kind='stable')].tolist()
+    select = heapq.nlargest if largest else heapq.nsmallest
+    return select(count, range(len(values)), key=values.__getitem__)
+
+
+class _Entry(NamedTuple):
+    """Everything the store keeps about one listing, read outside any lock"""
+    id: int
+    latitude: float
+    longitude: float
+    expires_at: float
+    created_at: float
+    remaining: float
+    food_type: int
+    status: ListingStatus
+    payload: dict
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_listing(cls, listing) -> "_Entry":
+        remaining = listing.remaining_quantity
+        if remaining is None:
+            remaining = listing.quantity
+        return cls(
+            listing.id,
+            listing.latitude,
+            listing.longitude,
+            _timestamp(listing.expiry_time),
+            _timestamp(listing.created_at),
+            remaining,
+            _FOOD_TYPE_CODES[listing.food_type],
+            listing.status,
+            listing.to_dict(),
+            listing.updated_at
+        )
+
+    def searchable(self, now: float) -> bool:
+        return (
+            self.status == ListingStatus.AVAILABLE
+            and self.remaining > 0
+            and self.expires_at > now
+        )
+
+
+class HotListing:
+    """A search result served from the hot set"""
+
+    __slots__ = ('id', 'data', 'expires_at', 'updated_at', 'distance_km')
+
+    def __init__(
+        self,
+        data: dict,
+        expires_at: float,
+        updated_at: Optional[datetime],
+        distance_km: Optional[float] = None
+    ):
+        self.id = data['id']
+        self.data = data
+        self.expires_at = expires_at
+        self.updated_at = updated_at
+        self.distance_km = distance_km
+
+    @property
+    def expiry_time(self) -> datetime:
+        return datetime.fromtimestamp(self.expires_at, timezone.utc)
+
+    def to_dict(self) -> dict:
+        """Same shape as FoodListing.to_dict()"""
+        data = dict(self.data)
+        if self.distance_km is not None:
+            data["distance_km"] = round(self.distance_km, 3)
+        return data
+
+
+class _Store:
+    """Slot-indexed arrays plus the grid index over them"""
+
+    def __init__(self):
+        self.ids = array('q')
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.expires_at = array('d')
+        self.created_at = array('d')
+        self.remaining = array('d')
+        self.food_types = array('b')
+        self.payloads: List[Optional[dict]] = []
+        self.updated_at: List[Optional[datetime]] = []
+        self.slot_of: Dict[int, int] = {}
+        self.free: List[int] = []
+        self.grid: Dict[Tuple[int, int], Set[int]] = {}
+        # (expires_at, listing_id) min-heap; stale entries are skipped on pop
+        self.expiry_heap: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.slot_of)
+
+    def apply(self, entry: _Entry, now: float):
+        """Store a listing, or drop it when it is no longer searchable"""
+        self.discard(entry.id)
+        if not entry.searchable(now):
+            return
+
+        values = entry[:7]
+        columns = (
+            self.ids, self.latitudes, self.longitudes, self.expires_at,
+            self.created_at, self.remaining, self.food_types
+        )
+        if self.free:
+            slot = self.free.pop()
+            for column, value in zip(columns, values):
+                column[slot] = value
+            self.payloads[slot] = entry.payload
+            self.updated_at[slot] = entry.updated_at
+        else:
+            slot = len(self.ids)
+            for column, value in zip(columns, values):
+                column.append(value)
+            self.payloads.append(entry.payload)
+            self.updated_at.append(entry.updated_at)
+
+        self.slot_of[entry.id] = slot
+        self.grid.setdefault(_cell(entry.latitude, entry.longitude), set()).add(slot)
+        heapq.heappush(self.expiry_heap, (entry.expires_at, entry.id))
+
+    def discard(self, listing_id: int) -> bool:
+        slot = self.slot_of.pop(listing_id, None)
+        if slot is None:
+            return False
+        cell = _cell(self.latitudes[slot], self.longitudes[slot])
+        slots = self.grid.get(cell)
+        if slots is not None:
+            slots.discard(slot)
+            if not slots:
+                del self.grid[cell]
+        self.payloads[slot] = None
+        self.updated_at[slot] = None
+        self.free.append(slot)
+        return True
+
+    def expire(self, now: float) -> int:
+        expired = 0
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, listing_id = heapq.heappop(heap)
+            slot = self.slot_of.get(listing_id)
+            if slot is not None and self.expires_at[slot] == expires_at:
+                self.discard(listing_id)
+                expired += 1
+        return expired
+
+    def match(self, latitude: float, longitude: float, radius_km: float, now: float, food_code: Optional[int]):
+        """
+        Slots within the radius, unexpired and of the food type
+
+        Returns:
+            (slots, distances_km, created_at); NumPy arrays when numpy is
+            installed, lists otherwise
+        """
+        slots = self.slots_near(latitude, longitude, radius_km)
+        if HAS_NUMPY:
+            # Zero-copy views; they must not outlive this call or the arrays could not grow
+            slots = np.fromiter(slots, dtype=np.int64, count=len(slots))
+            keep = np.frombuffer(self.expires_at, dtype=np.float64)[slots] > now
+            if food_code is not None:
+                keep &= np.frombuffer(self.food_types, dtype=np.int8)[slots] == food_code
+            slots = slots[keep]
+            indices, distances = within_radius(
+                latitude, longitude, radius_km,
+                np.frombuffer(self.latitudes, dtype=np.float64)[slots],
+                np.frombuffer(self.longitudes, dtype=np.float64)[slots],
+                backend='numpy'
+            )
+            slots = slots[indices]
+            return slots, distances, np.frombuffer(self.created_at, dtype=np.float64)[slots]
+
+        slots = [
+            slot for slot in slots
+            if self.expires_at[slot] > now
+            and (food_code is None or self.food_types[slot] == food_code)
+        ]
+        indices, distances = within_radius(
+            latitude, longitude, radius_km,
+            [self.latitudes[slot] for slot in slots],
+            [self.longitudes[slot] for slot in slots],
+            backend='python'
+        )
+        slots = [slots[i] for i in indices]
+        return slots, distances, [self.created_at[slot] for slot in slots]
+
+    def slots_near(self, latitude: float, longitude: float, radius_km: float) -> List[int]:
+        min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+        min_cell = _cell(min_lat, min_lon)
+        max_cell = _cell(max_lat, max_lon)
+        cells = (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1)
+
+        if cells > len(self.grid):
+            # Huge radius: scanning occupied cells is cheaper than enumerating the box
+            return [
+                slot for (lat_cell, lon_cell), slots in self.grid.items()
+                if min_cell[0] <= lat_cell <= max_cell[0] and min_cell[1] <= lon_cell <= max_cell[1]
+                for slot in slots
+            ]
+
+        found = []
+        for lat_cell in range(min_cell[0], max_cell[0] + 1):
+            for lon_cell in range(min_cell[1], max_cell[1] + 1):
+                slots = self.grid.get((lat_cell, lon_cell))
+                if slots:
+                    found.extend(slots)
+        return found
+
+
+class ListingHotSet:
+    """Thread-safe in-memory index of searchable listings"""
+
+    def __init__(self, reconcile_seconds: float = 60.0):
+        """
+        Args:
+            reconcile_seconds: Interval between full reloads from the database
+        """
+        self.reconcile_seconds = reconcile_seconds
+        self.ready = False
+        self.last_reconciled: Optional[float] = None
+        self._store = _Store()
+        self._dirty: Set[int] = set()
+        self._lock = threading.RLock()
+        # Changes made while a reload is reading the database, replayed onto the new store
+        self._reload_log: Optional[List[Tuple[str, object]]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def upsert(self, listing: FoodListing):
+        """Add or replace a listing, or drop it if it is no longer searchable"""
+        entry = _Entry.from_listing(listing)
+        with self._lock:
+            if self._reload_log is not None:
+                self._reload_log.append(('upsert', entry))
+            self._store.apply(entry, time.time())
+
+    def remove(self, listing_id: int):
+        """Drop a listing"""
+        with self._lock:
+            if self._reload_log is not None:
+                self._reload_log.append(('remove', listing_id))
+            self._store.discard(listing_id)
+
+    def mark_dirty(self, listing_ids: Iterable[int]):
+        """Refresh these listings from the database before the next search"""
+        with self._lock:
+            self._dirty.update(listing_ids)
+
+    def reload(self):
+        """Rebuild the set from the database (requires an app context)"""
+        with self._lock:
+            self._reload_log = []
+            self._dirty.clear()
+        try:
+            store = _Store()
+            now = time.time()
+            for listing in self._query(
+                FoodListing.status == ListingStatus.AVAILABLE,
+                FoodListing.expiry_time > datetime.now(timezone.utc),
+                FoodListing.remaining_quantity > 0
+            ):
+                store.apply(_Entry.from_listing(listing), now)
+        except Exception:
+            with self._lock:
+                self._reload_log = None
+            raise
+
+        with self._lock:
+            now = time.time()
+            for action, item in self._reload_log:
+                if action == 'remove':
+                    store.discard(item)
+                else:
+                    store.apply(item, now)
+            self._reload_log = None
+            self._store = store
+            self.ready = True
+            self.last_reconciled = time.time()
+        logger.info("Listing hot set reloaded with %s listings", len(store))
+
+    @staticmethod
+    def _query(*conditions) -> List[ListingRecord]:
+        rows = db.session.execute(ListingRecord.select().where(*conditions))
+        return [ListingRecord(row) for row in rows]
+
+    def _refresh_dirty(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            listing_ids = list(self._dirty)
+            self._dirty.clear()
+        listings = {listing.id: listing for listing in self._query(FoodListing.id.in_(listing_ids))}
+        for listing_id in listing_ids:
+            listing = listings.get(listing_id)
+            if listing is None:
+                self.remove(listing_id)
+            else:
+                self.upsert(listing)
+
+    def search(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float = 5.0,
+        food_type: Optional[FoodType] = None,
+        limit: int = 20,
+        offset: int = 0,
+        sort: str = 'newest',
+        candidate_limit: int = 500
+    ) -> List[HotListing]:
+        """
+        Search the hot set; same semantics as ListingService.search_listings
+
+        Args:
+            candidate_limit: Nearest matches scored when sort is 'rank'
+
+        Returns:
+            HotListing results; ranked results carry `distance_km`
+        """
+        self._refresh_dirty()
+        now = time.time()
+        food_code = _FOOD_TYPE_CODES[food_type] if food_type is not None else None
+
+        with self._lock:
+            store = self._store
+            store.expire(now)
+            slots, distances, created_at = store.match(latitude, longitude, radius_km, now, food_code)
+            if not len(slots):
+                return []
+
+            if sort == 'rank':
+                nearest = [
+                    (int(slots[i]), float(distances[i]))
+                    for i in _top(distances, candidate_limit, largest=False)
+                ]
+                nearest.sort(
+                    key=lambda match: score_listing(
+                        match[1],
+                        (store.expires_at[match[0]] - now) / 60.0,
+                        store.remaining[match[0]],
+                        radius_km
+                    ),
+                    reverse=True
+                )
+                page = nearest[offset:offset + limit]
+                return [
+                    HotListing(
+                        store.payloads[slot], store.expires_at[slot], store.updated_at[slot], distance
+                    )
+                    for slot, distance in page
+                ]
+
+            # Newest first; only the rows up to the end of the page are ever sorted
+            positions = _top(created_at, offset + limit, largest=True)[offset:]
+            slots = [int(slots[i]) for i in positions]
+            return [
+                HotListing(store.payloads[slot], store.expires_at[slot], store.updated_at[slot])
+                for slot in slots
+            ]
+
+    def start(self, app):
+        """Reconcile with the database every `reconcile_seconds` in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(self.reconcile_seconds):
+                try:
+                    with app.app_context():
+                        self.reload()
+                except Exception as e:
+                    logger.error(f"Error reconciling listing hot set: {str(e)}")
+
+        self._thread = threading.Thread(target=run, name="listing-hot-set", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the reconcile thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def get_listing_hot_set() -> Optional[ListingHotSet]:
+    """The current application's hot set, if enabled and loaded"""
+    if not has_app_context():
+        return None
+    hot_set = current_app.extensions.get('listing_hot_set')
+    return hot_set if hot_set is not None and hot_set.ready else None
+
+
+def mark_listing_changed(listing_id: int):
+    """Refresh a listing in the hot set once the current transaction commits"""
+    db.session.info.setdefault('hot_set_changed', set()).add(listing_id)
+
+
+def init_hot_set(app) -> Optional[ListingHotSet]:
+    """
+    Install, load and start reconciling the hot set when enabled in config
+
+    Args:
+        app: Flask application
+    """
+    if not app.config.get('HOT_SET_ENABLED'):
+        return None
+    hot_set = ListingHotSet(reconcile_seconds=app.config.get('HOT_SET_RECONCILE_SECONDS', 60))
+    app.extensions['listing_hot_set'] = hot_set
+    with app.app_context():
+        hot_set.reload()
+    if app.config.get('HOT_SET_RECONCILE_SECONDS', 60) > 0:
+        hot_set.start(app)
+    return hot_set
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_changed_listings(session):
+    """Queue committed quantity changes for the hot set"""
+    listing_ids = session.info.pop('hot_set_changed', None)
+    if not listing_ids or not has_app_context():
+        return
+    hot_set = current_app.extensions.get('listing_hot_set')
+    if hot_set is not None:
+        hot_set.mark_dirty(listing_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_listings(session):
+    session.info.pop('hot_set_changed', None)
@@ -0,0 +1,290 @@
+"""
+Impact service - Pre-aggregated food saved, meals and emissions avoided
+Collected claims are rolled up per day into impact_rollups, once in total
+and once per vendor, area cell and food type. A claim reaching PICKED_UP
+adds its contribution with an INSERT ... ON CONFLICT DO UPDATE increment in
+the same transaction as the status change, so the dashboard reads only a
+handful of small rollup rows and never scans claims or listings.
+
+Food weight, meals and CO2e are estimates: quantities are converted to
+kilograms by unit, then to meals and emissions with fixed factors.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+
+from sqlalchemy import delete, func, text
+from src.models import (
+    db, ArchivedClaim, ArchivedListing, Claim, ClaimStatus, FoodListing, ImpactRollup,
+    RollupDimension
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Kilograms per listing unit; other units (pieces, loaves, ...) count as one item
+KG_PER_UNIT = {
+    "kg": 1.0, "kgs": 1.0, "kilograms": 1.0,
+    "g": 0.001, "grams": 0.001,
+    "lb": 0.4536, "lbs": 0.4536, "pounds": 0.4536,
+    "oz": 0.02835,
+    "l": 1.0, "liters": 1.0, "litres": 1.0,
+    "servings": 0.42, "meals": 0.42, "portions": 0.42,
+}
+KG_PER_ITEM = 0.25
+# WRAP's average meal weight and CO2e of avoided food waste
+KG_PER_MEAL = 0.42
+CO2E_KG_PER_FOOD_KG = 2.5
+
+# Area cells for the geographic breakdown (~5.5 km of latitude)
+AREA_CELL_DEG = 0.05
+
+_METRICS = ('pickups', 'food_kg', 'meals', 'co2e_kg')
+
+
+def impact_of(quantity: float, unit: str) -> Tuple[float, float, float]:
+    """
+    Estimated impact of collecting a quantity of food
+
+    Returns:
+        (food_kg, meals, co2e_kg)
+    """
+    food_kg = quantity * KG_PER_UNIT.get((unit or "").strip().lower(), KG_PER_ITEM)
+    return food_kg, food_kg / KG_PER_MEAL, food_kg * CO2E_KG_PER_FOOD_KG
+
+
+def area_cell(latitude: float, longitude: float) -> str:
+    """Key of the area cell containing a point"""
+    return f"{math.floor(latitude / AREA_CELL_DEG)}:{math.floor(longitude / AREA_CELL_DEG)}"
+
+
+def _pickup_rows(claim=Claim, listing=FoodListing):
+    """Columns of a collected claim and its listing needed for the rollups"""
+    return (
+        db.select(
+            claim.id,
+            claim.quantity,
+            claim.picked_up_at,
+            listing.vendor_id,
+            listing.unit,
+            listing.food_type,
+            listing.latitude,
+            listing.longitude
+        )
+        .join(listing, listing.id == claim.listing_id)
+    )
+
+
+def _increments(rows: Iterable) -> List[dict]:
+    """Sum pickups into one increment per (dimension, key, day)"""
+    totals: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for row in rows:
+        food_kg, meals, co2e_kg = impact_of(row.quantity, row.unit)
+        day = row.picked_up_at.date()
+        for bucket in (
+            (RollupDimension.TOTAL, ""),
+            (RollupDimension.VENDOR, str(row.vendor_id)),
+            (RollupDimension.AREA_CELL, area_cell(row.latitude, row.longitude)),
+            (RollupDimension.FOOD_TYPE, row.food_type.value),
+        ):
+            sums = totals[bucket + (day,)]
+            sums[0] += 1
+            sums[1] += food_kg
+            sums[2] += meals
+            sums[3] += co2e_kg
+    return [
+        {
+            "dimension": dimension,
+            "bucket_key": key,
+            "day": day,
+            **dict(zip(_METRICS, sums)),
+        }
+        for (dimension, key, day), sums in totals.items()
+    ]
+
+
+def _apply_increments(increments: List[dict]):
+    """Add increments to the rollups, creating missing rows (one executemany upsert)"""
+    if not increments:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Impact rollups need INSERT ... ON CONFLICT, which {dialect} lacks")
+
+    table = ImpactRollup.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=['dimension', 'bucket_key', 'day'],
+        set_={metric: table.c[metric] + statement.excluded[metric] for metric in _METRICS}
+    )
+    db.session.execute(statement, increments)
+
+
+class ImpactService:
+    """Service class for maintaining and reading impact rollups"""
+
+    @staticmethod
+    def record_pickup(claim_id: int):
+        """
+        Add a collected claim to the rollups
+
+        Runs inside the caller's transaction, so the increment commits or
+        rolls back together with the claim's move to PICKED_UP.
+        """
+        row = db.session.execute(_pickup_rows().where(Claim.id == claim_id)).one()
+        _apply_increments(_increments([row]))
+
+    @staticmethod
+    def backfill(batch_size: int = 5000, days_per_range: int = 7) -> int:
+        """
+        Rebuild the rollups from every collected claim, live or archived
+
+        Days are rebuilt a range at a time. Each range's rollups are deleted
+        and recomputed in one transaction, so the dashboard never sees the
+        range empty and a crash leaves every range either fully old or fully
+        rebuilt; re-running the backfill repairs it. On PostgreSQL the range
+        transaction locks impact_rollups against live increments first, so
+        a pickup committed mid-rebuild is counted exactly once: either the
+        recompute sees its claim or its increment lands after the commit.
+        SQLite serializes writers, which gives the same guarantee.
+
+        Args:
+            batch_size: Claims read and summed per upsert
+            days_per_range: Days rebuilt per transaction
+
+        Returns:
+            Number of claims rolled up
+        """
+        sources = ((Claim, FoodListing), (ArchivedClaim, ArchivedListing))
+        bounds = [
+            db.session.execute(
+                db.select(func.min(claim.picked_up_at), func.max(claim.picked_up_at))
+                .where(claim.status == ClaimStatus.PICKED_UP)
+            ).one()
+            for claim, _ in sources
+        ]
+        bounds.append(db.session.execute(
+            db.select(func.min(ImpactRollup.day), func.max(ImpactRollup.day))
+        ).one())
+        days = [_as_date(value) for pair in bounds for value in pair if value is not None]
+        db.session.commit()
+        if not days:
+            return 0
+
+        total = 0
+        first = min(days)
+        while first <= max(days):
+            last = first + timedelta(days=days_per_range - 1)
+            try:
+                total += ImpactService._rebuild_days(sources, first, last, batch_size)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error("Error rebuilding impact rollups for %s..%s: %s", first, last, e)
+                raise
+            first = last + timedelta(days=1)
+
+        logger.info("Backfilled impact rollups from %s collected claims", total)
+        return total
+
+    @staticmethod
+    def _rebuild_days(sources, first: date, last: date, batch_size: int) -> int:
+        """Replace the rollups of days first..last in the current transaction"""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # Conflicts with the ROW EXCLUSIVE lock live upserts take
+            db.session.execute(text("LOCK TABLE impact_rollups IN SHARE ROW EXCLUSIVE MODE"))
+        db.session.execute(delete(ImpactRollup).where(ImpactRollup.day.between(first, last)))
+
+        start = datetime.combine(first, time.min)
+        end = datetime.combine(last + timedelta(days=1), time.min)
+        total = 0
+        for claim, listing in sources:
+            result = db.session.execute(
+                _pickup_rows(claim, listing)
+                .where(
+                    claim.status == ClaimStatus.PICKED_UP,
+                    claim.picked_up_at >= start,
+                    claim.picked_up_at < end
+                )
+                .execution_options(yield_per=batch_size)
+            )
+            for rows in result.partitions(batch_size):
+                _apply_increments(_increments(rows))
+                total += len(rows)
+        return total
+
+    @staticmethod
+    def summary(
+        start: date,
+        end: date,
+        dimension: RollupDimension = RollupDimension.TOTAL,
+        key: str = ""
+    ) -> dict:
+        """
+        Totals and a daily series for one bucket between two days (inclusive)
+
+        Returns:
+            Dictionary with `totals` and `days` (only days with pickups)
+        """
+        rollups = (
+            ImpactRollup.query.filter(
+                ImpactRollup.dimension == dimension,
+                ImpactRollup.bucket_key == key,
+                ImpactRollup.day.between(start, end)
+            )
+            .order_by(ImpactRollup.day)
+            .all()
+        )
+        totals = {metric: sum(getattr(rollup, metric) for rollup in rollups) for metric in _METRICS}
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "totals": _rounded(totals),
+            "days": [rollup.to_dict() for rollup in rollups],
+        }
+
+    @staticmethod
+    def breakdown(dimension: RollupDimension, start: date, end: date, limit: int = 20) -> List[dict]:
+        """Buckets of a dimension ranked by food saved between two days (inclusive)"""
+        food_kg = func.sum(ImpactRollup.food_kg)
+        rows = db.session.execute(
+            db.select(
+                ImpactRollup.bucket_key,
+                func.sum(ImpactRollup.pickups).label("pickups"),
+                food_kg.label("food_kg"),
+                func.sum(ImpactRollup.meals).label("meals"),
+                func.sum(ImpactRollup.co2e_kg).label("co2e_kg")
+            )
+            .where(ImpactRollup.dimension == dimension, ImpactRollup.day.between(start, end))
+            .group_by(ImpactRollup.bucket_key)
+            .order_by(food_kg.desc())
+            .limit(limit)
+        ).all()
+        return [
+            {"key": row.bucket_key, **_rounded({metric: getattr(row, metric) for metric in _METRICS})}
+            for row in rows
+        ]
+
+    @staticmethod
+    def default_range(days: int = 30, today: Optional[date] = None) -> Tuple[date, date]:
+        """The last `days` days up to and including today (UTC)"""
+        today = today or datetime.now(timezone.utc).date()
+        return today - timedelta(days=days - 1), today
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _rounded(metrics: dict) -> dict:
+    return {
+        "pickups": int(metrics["pickups"] or 0),
+        "food_kg": round(metrics["food_kg"] or 0.0, 3),
+        "meals": round(metrics["meals"] or 0.0, 1),
+        "co2e_kg": round(metrics["co2e_kg"] or 0.0, 3),
+    }
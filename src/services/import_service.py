@@ -0,0 +1,276 @@
+"""
+Import service - Bulk listing import from CSV/NDJSON files
+Files are parsed one row at a time and every row is checked with the same
+rules as a single create (ListingService.validate_listing_data). Valid rows
+are inserted in batches, each batch in its own transaction, so memory and
+lock time stay bounded whatever the file size and a bad row only costs its
+own line. Side effects run once per committed batch: the hot set is marked
+dirty with the batch's ids, feed events are published, and nearby users get
+one digest notification instead of one per listing.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Iterator, List, Optional, Tuple, Union
+import csv
+import io
+import json
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from src.models import db, FoodListing
+from src.observers.notification_observer import notification_service
+from src.services.listing_service import ListingService
+from src.services.hot_set import get_listing_hot_set
+from src.realtime.broker import listing_feed, LISTING_CREATED
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Nearby users are looked up once per distinct pickup point (~100 m grid)
+_LOCATION_DECIMALS = 3
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import"""
+
+    imported: int = 0
+    failed: int = 0
+    batches: int = 0
+    max_errors: int = 100
+    errors: List[dict] = field(default_factory=list)
+
+    def add_error(self, line: int, message: str):
+        """Count a rejected row, keeping the first max_errors messages"""
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def to_dict(self) -> dict:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "batches": self.batches,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _text(stream: IO) -> IO[str]:
+    """Text view of an uploaded (binary) or already decoded stream"""
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    # utf-8-sig drops the byte order mark spreadsheet tools like to write
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def format_for_filename(filename: Optional[str]) -> Optional[str]:
+    """Import format implied by a file name, if any"""
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if extension == 'csv':
+        return 'csv'
+    return None
+
+
+class ImportService:
+    """Service class for bulk listing imports"""
+
+    @staticmethod
+    def iter_rows(stream: IO, fmt: str) -> Iterator[Tuple[int, Union[dict, str]]]:
+        """
+        Parse a file one row at a time
+
+        Args:
+            stream: Binary or text stream
+            fmt: 'csv' (with a header row) or 'ndjson'
+
+        Yields:
+            (line number, field dictionary) or (line number, error message)
+        """
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unknown import format: {fmt}")
+        text = _text(stream)
+
+        if fmt == 'csv':
+            reader = csv.DictReader(text)
+            try:
+                for row in reader:
+                    # Surplus values land under the None key
+                    row.pop(None, None)
+                    yield reader.line_num, row
+            except csv.Error as e:
+                yield reader.line_num, f"Invalid CSV: {e}"
+            return
+
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_number, "Invalid JSON"
+                continue
+            if not isinstance(row, dict):
+                yield line_number, "Each line must be a JSON object"
+                continue
+            yield line_number, row
+
+    @staticmethod
+    def import_listings(
+        vendor_id: int,
+        stream: IO,
+        fmt: str = 'csv',
+        batch_size: Optional[int] = None
+    ) -> ImportResult:
+        """
+        Import listings for a vendor from a CSV or NDJSON file
+
+        Columns (keys) are the fields accepted by the create listing endpoint.
+
+        Args:
+            vendor_id: ID of the vendor the listings belong to
+            stream: Binary or text stream of the file
+            fmt: 'csv' or 'ndjson'
+            batch_size: Rows inserted per transaction (default IMPORT_BATCH_SIZE)
+
+        Returns:
+            ImportResult with counts and per-row errors
+        """
+        batch_size = batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 500)
+        result = ImportResult(max_errors=current_app.config.get('IMPORT_MAX_ERRORS', 100))
+
+        batch: List[Tuple[int, dict]] = []
+        for line, row in ImportService.iter_rows(stream, fmt):
+            if isinstance(row, str):
+                result.add_error(line, row)
+                continue
+            try:
+                batch.append((line, ListingService.validate_listing_data(row)))
+            except ValueError as e:
+                result.add_error(line, str(e))
+                continue
+            if len(batch) >= batch_size:
+                ImportService._insert_batch(vendor_id, batch, result)
+                batch = []
+        if batch:
+            ImportService._insert_batch(vendor_id, batch, result)
+
+        logger.info(
+            f"Imported {result.imported} listings for vendor {vendor_id} in "
+            f"{result.batches} batches ({result.failed} rows rejected)"
+        )
+        return result
+
+    @staticmethod
+    def _save(listings: List[FoodListing]) -> List[dict]:
+        """Insert and commit listings, returning their serialized form"""
+        db.session.add_all(listings)
+        db.session.flush()
+        # Serialize before commit expires the instances (avoids a reload per row)
+        payloads = [listing.to_dict() for listing in listings]
+        db.session.commit()
+        return payloads
+
+    @staticmethod
+    def _insert_batch(vendor_id: int, batch: List[Tuple[int, dict]], result: ImportResult):
+        """
+        Insert one batch in a single transaction
+
+        If the database rejects the batch, its rows are retried one per
+        transaction so only the offending rows are reported.
+        """
+        try:
+            payloads = ImportService._save(
+                [ListingService.build_listing(vendor_id, data) for _, data in batch]
+            )
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.warning(f"Import batch rejected, retrying rows one by one: {str(e)}")
+            payloads = []
+            for line, data in batch:
+                try:
+                    payloads += ImportService._save([ListingService.build_listing(vendor_id, data)])
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    result.add_error(line, "Listing could not be saved")
+
+        if not payloads:
+            return
+        result.imported += len(payloads)
+        result.batches += 1
+        ImportService._after_batch(vendor_id, payloads)
+
+    @staticmethod
+    def _after_batch(vendor_id: int, payloads: List[dict]):
+        """Hot set, feed and notification side effects of a committed batch"""
+        hot_set = get_listing_hot_set()
+        if hot_set is not None:
+            hot_set.mark_dirty(payload['id'] for payload in payloads)
+
+        for payload in payloads:
+            listing_feed.publish_listing(LISTING_CREATED, payload)
+
+        ImportService._notify_batch(vendor_id, payloads)
+
+    @staticmethod
+    def _notify_batch(vendor_id: int, payloads: List[dict]):
+        """
+        Send nearby users one digest notification for a batch of listings
+
+        Args:
+            vendor_id: ID of the vendor who imported the listings
+            payloads: Serialized listings of the batch
+        """
+        try:
+            recipients = {}
+            points = {
+                (round(payload['latitude'], _LOCATION_DECIMALS), round(payload['longitude'], _LOCATION_DECIMALS))
+                for payload in payloads
+            }
+            for latitude, longitude in points:
+                for user in ListingService.find_nearby_users(
+                    latitude=latitude,
+                    longitude=longitude,
+                    radius_km=5.0,
+                    exclude_user_id=vendor_id
+                ):
+                    recipients.setdefault(user.id, user)
+
+            if not recipients:
+                logger.info("No nearby users found to notify")
+                return
+
+            users_data = ListingService.limit_recipients(
+                [user.to_dict() for user in recipients.values()],
+                f"import of {len(payloads)} listings"
+            )
+            notification_service.notify(_digest(payloads), users_data)
+
+        except Exception as e:
+            logger.error(f"Error notifying nearby users of imported listings: {str(e)}")
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _digest(payloads: List[dict]) -> dict:
+    """Listing-shaped summary of a batch, understood by every notifier"""
+    if len(payloads) == 1:
+        return payloads[0]
+    first = payloads[0]
+    addresses = {payload['pickup_address'] for payload in payloads}
+    latest_expiry = max(_utc(datetime.fromisoformat(payload['expiry_time'])) for payload in payloads)
+    return {
+        **first,
+        "title": f"{len(payloads)} new listings from {first['vendor_name']}",
+        "quantity": len(payloads),
+        "unit": "listings",
+        "pickup_address": first['pickup_address'] if len(addresses) == 1 else "several pickup points",
+        "expiry_time": latest_expiry.isoformat(),
+        "listing_ids": [payload['id'] for payload in payloads],
+    }
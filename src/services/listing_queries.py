@@ -0,0 +1,117 @@
+"""
+Listing queries - Search building blocks shared by the listing services
+ListingService and AsyncListingService build the same statements and
+post-process rows the same way; only how they execute them differs. The
+statement builders here return SQLAlchemy selects and clauses, and the row
+helpers are plain Python, so either service can run them on its own session.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+
+from src.geo import bounding_box, region_cells, within_radius
+from src.models import db, FoodListing, FoodType, ListingStatus
+from src.services.ranking import rank_listings
+
+
+def search_filters(latitude: float, longitude: float, radius_km: float, food_type: Optional[str]) -> list:
+    """WHERE clauses shared by every search path (sync and async)"""
+    filters = [
+        FoodListing.status == ListingStatus.AVAILABLE,
+        FoodListing.expiry_time > datetime.now(timezone.utc),
+    ]
+
+    # Filter by food type if provided
+    if food_type:
+        filters.append(FoodListing.food_type == FoodType(food_type))
+
+    # Only the region cells (partitions) the search circle overlaps
+    filters += region_filter(FoodListing, latitude, longitude, radius_km)
+    return filters
+
+
+def region_filter(model, latitude: float, longitude: float, radius_km: float) -> list:
+    """
+    Filter on the region cells a circle overlaps (none when it spans too many)
+
+    Rows without a cell yet (created before the column existed and not
+    rebalanced) always pass, so upgrading never hides them; the bounding
+    box and radius checks still apply to them.
+    """
+    cells = region_cells(latitude, longitude, radius_km)
+    if cells is None:
+        return []
+    return [or_(model.region_cell.in_(cells), model.region_cell.is_(None))]
+
+
+def bounding_box_query(model, filters: list, latitude: float, longitude: float, radius_km: float, *columns):
+    """SELECT of rows inside the circle's bounding box"""
+    min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+    return db.select(model.id, model.latitude, model.longitude, *columns).where(
+        *filters,
+        model.latitude.between(min_lat, max_lat),
+        model.longitude.between(min_lon, max_lon)
+    )
+
+
+def keep_within_radius(rows: list, latitude: float, longitude: float, radius_km: float) -> Tuple[list, List[float]]:
+    """Exact distance filter over bounding-box rows: (rows, distances_km)"""
+    if not rows:
+        return [], []
+
+    indices, distances = within_radius(
+        latitude, longitude, radius_km,
+        [row.latitude for row in rows],
+        [row.longitude for row in rows]
+    )
+    return [rows[i] for i in indices], [float(d) for d in distances]
+
+
+def page_candidates(
+    rows: list,
+    distances: list,
+    limit: int,
+    offset: int,
+    sort: str,
+    candidate_limit: int
+) -> Dict[int, float]:
+    """
+    Listings to load for a page of in-memory search results
+
+    Args:
+        rows: Rows within the radius, with id and created_at
+        distances: Distance of each row in kilometers
+        limit: Page size
+        offset: Page offset
+        sort: 'newest' or 'rank'
+        candidate_limit: Nearest listings considered when ranking
+
+    Returns:
+        Distance by listing ID, in load order: the nearest candidates to
+        rank, or the newest page
+    """
+    if sort == 'rank':
+        order = sorted(range(len(rows)), key=distances.__getitem__)
+        order = order[:candidate_limit]
+    else:
+        order = sorted(range(len(rows)), key=lambda i: rows[i].created_at, reverse=True)
+        order = order[offset:offset + limit]
+    return {rows[i].id: distances[i] for i in order}
+
+
+def arrange_page(
+    listings: list,
+    distance_by_id: Dict[int, float],
+    radius_km: float,
+    limit: int,
+    offset: int,
+    sort: str
+) -> list:
+    """Rank loaded candidates and slice the page, or keep the newest page as loaded"""
+    if sort != 'rank':
+        return listings
+    ranked = rank_listings(
+        [(listing, distance_by_id[listing.id]) for listing in listings], radius_km
+    )
+    return ranked[offset:offset + limit]
@@ -5,22 +5,70 @@ Integrates with Observer pattern for notifications
 from datetime import datetime, timezone
 from typing import List, Optional, Dict
 from sqlalchemy import func, and_
-from geoalchemy2.functions import ST_DWithin, ST_MakePoint
-from src.models import db, FoodListing, User, ListingStatus, UserRole
+from geoalchemy2.functions import ST_DWithin, ST_Distance, ST_MakePoint
+from src.models import (
+    db, Claim, ClaimStatus, FoodListing, ListingRecord, User, ListingStatus, UserRole, FoodType
+)
+from src.models.routing import replica_read
 from src.observers.notification_observer import notification_service
+from src.services.ranking import rank_listings
+from src.services.listing_queries import (
+    arrange_page, bounding_box_query, keep_within_radius, page_candidates, region_filter, search_filters
+)
+from src.services.hot_set import get_listing_hot_set
+from src.services.archive_service import ArchiveService, TERMINAL_STATUSES
+from src.realtime.broker import (
+    listing_feed, LISTING_CREATED, LISTING_UPDATED, LISTING_DELETED
+)
+from src.validation import LISTING_CREATE
+import heapq
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns a vendor may change through update_listing
+UPDATABLE_FIELDS = (
+    'title', 'description', 'quantity', 'unit', 'food_type',
+    'expiry_time', 'pickup_start_time', 'pickup_end_time',
+    'special_instructions', 'status'
+)
+
+# Statuses a vendor can set, in bulk or through update_listing, and the
+# statuses they can be set from. CLAIMED, AVAILABLE and COMPLETED are left
+# out: they follow from claims taking, returning and collecting quantity
+BATCH_STATUS_TRANSITIONS = {
+    ListingStatus.CANCELLED: (ListingStatus.AVAILABLE, ListingStatus.CLAIMED),
+}
+
+# RETURNING clause of listing updates: the record's columns plus its vendor's name
+_RETURNING = (
+    *(getattr(FoodListing, field) for field in ListingRecord.FIELDS),
+    db.select(User.name).where(User.id == FoodListing.vendor_id).scalar_subquery().label("vendor_name"),
+)
+
+
+class ListingError(ValueError):
+    """Raised when a listing cannot be changed"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
 
 class ListingService:
     """Service class for managing food listings"""
     
+    # Nearest listings considered when ranking; bounds the per-query scoring cost
+    RANK_CANDIDATE_LIMIT = 500
+    
     @staticmethod
     def create_listing(vendor_id: int, listing_data: dict) -> FoodListing:
         """
         Create a new food listing and notify nearby users (Observer pattern)
         
+        The caller is responsible for checking that vendor_id belongs to a
+        vendor (routes do this from the token's role claim).
+        
         Args:
             vendor_id: ID of the vendor creating the listing
             listing_data: Dictionary containing listing information
@@ -29,38 +77,23 @@ class ListingService:
             Created FoodListing object
         """
         try:
-            # Validate vendor exists and has correct role
-            vendor = User.query.get(vendor_id)
-            if not vendor or vendor.role != UserRole.VENDOR:
-                raise ValueError("Invalid vendor")
-            
-            # Create listing
-            listing = FoodListing(
-                vendor_id=vendor_id,
-                title=listing_data['title'],
-                description=listing_data.get('description'),
-                quantity=listing_data['quantity'],
-                unit=listing_data['unit'],
-                food_type=listing_data['food_type'],
-                expiry_time=listing_data['expiry_time'],
-                pickup_start_time=listing_data.get('pickup_start_time'),
-                pickup_end_time=listing_data.get('pickup_end_time'),
-                pickup_address=listing_data['pickup_address'],
-                latitude=listing_data['latitude'],
-                longitude=listing_data['longitude'],
-                image_url=listing_data.get('image_url'),
-                special_instructions=listing_data.get('special_instructions'),
-                status=ListingStatus.AVAILABLE
-            )
-            
-            # Set geospatial location
-            listing.location = f"POINT({listing.longitude} {listing.latitude})"
+            listing = ListingService.build_listing(vendor_id, listing_data)
             
             # Save to database
             db.session.add(listing)
             db.session.commit()
             
-            logger.info(f"Created listing: {listing.id} - {listing.title}")
+            hot_set = get_listing_hot_set()
+            if hot_set is not None:
+                hot_set.upsert(listing)
+            
+            logger.info(
+                "Created listing: %s - %s", listing.id, listing.title,
+                extra={"listing_id": listing.id}
+            )
+            
+            # Push to real-time feed subscribers around the listing
+            listing_feed.publish_listing(LISTING_CREATED, listing.to_dict())
             
             # Notify nearby users using Observer pattern
             ListingService._notify_nearby_users(listing)
@@ -72,6 +105,60 @@ class ListingService:
             logger.error(f"Error creating listing: {str(e)}")
             raise
     
+    @staticmethod
+    def build_listing(vendor_id: int, listing_data: dict) -> FoodListing:
+        """
+        Build an unsaved, available listing from validated data
+        
+        Args:
+            vendor_id: ID of the vendor creating the listing
+            listing_data: Dictionary containing listing information
+            
+        Returns:
+            New FoodListing object, not yet added to the session
+        """
+        listing = FoodListing(
+            vendor_id=vendor_id,
+            title=listing_data['title'],
+            description=listing_data.get('description'),
+            quantity=listing_data['quantity'],
+            unit=listing_data['unit'],
+            food_type=listing_data['food_type'],
+            expiry_time=listing_data['expiry_time'],
+            pickup_start_time=listing_data.get('pickup_start_time'),
+            pickup_end_time=listing_data.get('pickup_end_time'),
+            pickup_address=listing_data['pickup_address'],
+            latitude=listing_data['latitude'],
+            longitude=listing_data['longitude'],
+            image_url=listing_data.get('image_url'),
+            special_instructions=listing_data.get('special_instructions'),
+            status=ListingStatus.AVAILABLE
+        )
+        
+        # Set geospatial location
+        listing.location = f"POINT({listing.longitude} {listing.latitude})"
+        return listing
+    
+    @staticmethod
+    def validate_listing_data(data: dict) -> dict:
+        """
+        Check and convert raw listing fields (JSON body or import row)
+        
+        Empty strings count as missing, so CSV rows behave like JSON bodies;
+        fields that are not listing columns are dropped.
+        
+        Args:
+            data: Field values as received
+            
+        Returns:
+            New dictionary ready for create_listing, with numbers, datetimes
+            and FoodType converted
+            
+        Raises:
+            ValidationError: Describing the first invalid field
+        """
+        return LISTING_CREATE.validate(data)
+    
     @staticmethod
     def _notify_nearby_users(listing: FoodListing):
         """
@@ -82,6 +169,14 @@ class ListingService:
             listing: The newly created FoodListing
         """
         try:
+            # Never notify about food that has already expired
+            expiry_time = listing.expiry_time
+            if expiry_time.tzinfo is None:
+                expiry_time = expiry_time.replace(tzinfo=timezone.utc)
+            if expiry_time <= datetime.now(timezone.utc):
+                logger.info("Listing %s already expired, skipping notifications", listing.id)
+                return
+            
             # Find users within search radius (excluding the vendor)
             nearby_users = ListingService.find_nearby_users(
                 latitude=listing.latitude,
@@ -100,12 +195,29 @@ class ListingService:
             # Prepare user data for notification
             users_data = [user.to_dict() for user in nearby_users]
             
+            users_data = ListingService.limit_recipients(users_data, f"listing {listing.id}")
+            
             # Trigger Observer pattern - notify all observers
             notification_service.notify(listing_data, users_data)
             
         except Exception as e:
             logger.error(f"Error notifying nearby users: {str(e)}")
     
+    @staticmethod
+    def limit_recipients(users_data: List[dict], subject: str) -> List[dict]:
+        """Back off while channels are saturated: only charities are queued"""
+        if not notification_service.is_backpressured():
+            return users_data
+        users_data = [
+            user for user in users_data
+            if user['role'] == UserRole.CHARITY.value
+        ]
+        logger.warning(
+            "Notification queue under backpressure, limiting %s to %s charities",
+            subject, len(users_data)
+        )
+        return users_data
+    
     @staticmethod
     def find_nearby_users(
         latitude: float,
@@ -126,6 +238,23 @@ class ListingService:
             List of User objects within the radius
         """
         try:
+            if not ListingService._has_postgis():
+                filters = [
+                    User.verified == True,
+                    *region_filter(User, latitude, longitude, radius_km)
+                ]
+                if exclude_user_id:
+                    filters.append(User.id != exclude_user_id)
+                rows, _ = ListingService._within_radius(
+                    User, filters, latitude, longitude, radius_km
+                )
+                users = ListingService._load_ordered(User, [row.id for row in rows])
+                logger.info(
+                    "Found %s nearby users within %skm", len(users), radius_km,
+                    extra={"results": len(users), "radius_km": radius_km}
+                )
+                return users
+            
             # Create a point for the location
             point = ST_MakePoint(longitude, latitude)
             
@@ -144,10 +273,16 @@ class ListingService:
                 query = query.filter(User.id != exclude_user_id)
             
             # Only notify verified users
-            query = query.filter(User.verified == True)
+            query = query.filter(
+                User.verified == True,
+                *region_filter(User, latitude, longitude, radius_km)
+            )
             
             users = query.all()
-            logger.info(f"Found {len(users)} nearby users within {radius_km}km")
+            logger.info(
+                "Found %s nearby users within %skm", len(users), radius_km,
+                extra={"results": len(users), "radius_km": radius_km}
+            )
             
             return users
             
@@ -156,14 +291,16 @@ class ListingService:
             return []
     
     @staticmethod
+    @replica_read
     def search_listings(
         latitude: float,
         longitude: float,
         radius_km: float = 5.0,
         food_type: Optional[str] = None,
         limit: int = 20,
-        offset: int = 0
-    ) -> List[FoodListing]:
+        offset: int = 0,
+        sort: str = 'newest'
+    ) -> List[ListingRecord]:
         """
         Search for available food listings near a location
         
@@ -174,36 +311,74 @@ class ListingService:
             food_type: Optional filter by food type
             limit: Maximum number of results
             offset: Offset for pagination
+            sort: 'newest' (creation date) or 'rank' (distance, expiry urgency
+                and quantity; sets `distance_km` on each listing)
             
         Returns:
-            List of FoodListing objects
+            List of ListingRecord rows, or HotListing records when the
+            listing hot set is enabled
         """
         try:
+            hot_set = get_listing_hot_set()
+            if hot_set is not None:
+                return hot_set.search(
+                    latitude, longitude, radius_km,
+                    food_type=FoodType(food_type) if food_type else None,
+                    limit=limit, offset=offset, sort=sort,
+                    candidate_limit=ListingService.RANK_CANDIDATE_LIMIT
+                )
+            
+            filters = search_filters(latitude, longitude, radius_km, food_type)
+            
+            if not ListingService._has_postgis():
+                listings = ListingService._search_in_memory(
+                    filters, latitude, longitude, radius_km, limit, offset, sort
+                )
+                logger.info(
+                    "Found %s listings within %skm", len(listings), radius_km,
+                    extra={"results": len(listings), "radius_km": radius_km}
+                )
+                return listings
+            
             # Create a point for the location
             point = ST_MakePoint(longitude, latitude)
             
             # Build query
-            query = FoodListing.query.filter(
-                FoodListing.status == ListingStatus.AVAILABLE,
-                FoodListing.expiry_time > datetime.now(timezone.utc),
-                ST_DWithin(
-                    FoodListing.location,
-                    point,
-                    radius_km * 1000  # Convert km to meters
-                )
+            within = ST_DWithin(
+                FoodListing.location,
+                point,
+                radius_km * 1000  # Convert km to meters
             )
             
-            # Filter by food type if provided
-            if food_type:
-                query = query.filter(FoodListing.food_type == food_type)
-            
-            # Order by creation date (newest first)
-            query = query.order_by(FoodListing.created_at.desc())
-            
-            # Apply pagination
-            listings = query.limit(limit).offset(offset).all()
-            
-            logger.info(f"Found {len(listings)} listings within {radius_km}km")
+            if sort == 'rank':
+                # Fetch the nearest candidates with their distance, then score in Python
+                distance = ST_Distance(FoodListing.location, point)
+                rows = db.session.execute(
+                    ListingRecord.select(distance)
+                    .where(*filters, within)
+                    .order_by(distance)
+                    .limit(ListingService.RANK_CANDIDATE_LIMIT)
+                ).all()
+                ranked = rank_listings(
+                    [(ListingRecord(row[:-1]), row[-1] / 1000) for row in rows],
+                    radius_km
+                )
+                listings = ranked[offset:offset + limit]
+            else:
+                # Order by creation date (newest first) and paginate
+                rows = db.session.execute(
+                    ListingRecord.select()
+                    .where(*filters, within)
+                    .order_by(FoodListing.created_at.desc())
+                    .limit(limit)
+                    .offset(offset)
+                ).all()
+                listings = [ListingRecord(row) for row in rows]
+            
+            logger.info(
+                "Found %s listings within %skm", len(listings), radius_km,
+                extra={"results": len(listings), "radius_km": radius_km}
+            )
             
             return listings
             
@@ -211,65 +386,367 @@ class ListingService:
             logger.error(f"Error searching listings: {str(e)}")
             return []
     
+    @staticmethod
+    def _has_postgis() -> bool:
+        """True when the database can evaluate PostGIS functions such as ST_DWithin"""
+        return db.engine.dialect.name == 'postgresql'
+    
+    @staticmethod
+    def _within_radius(model, filters: list, latitude: float, longitude: float, radius_km: float, *columns):
+        """
+        Rows of a model within a radius, without PostGIS
+        
+        A bounding box on the latitude/longitude columns narrows the rows
+        fetched from the database; exact distances are then computed in bulk.
+        
+        Returns:
+            (rows, distances_km); each row has id, latitude, longitude and
+            any extra columns requested
+        """
+        rows = db.session.execute(
+            bounding_box_query(model, filters, latitude, longitude, radius_km, *columns)
+        ).all()
+        return keep_within_radius(rows, latitude, longitude, radius_km)
+    
+    @staticmethod
+    def _load_ordered(model, ids: List[int]) -> list:
+        """Load rows by ID, preserving the order of `ids`"""
+        if not ids:
+            return []
+        by_id = {row.id: row for row in model.query.filter(model.id.in_(ids))}
+        return [by_id[row_id] for row_id in ids if row_id in by_id]
+    
+    @staticmethod
+    def _load_records(ids: List[int]) -> List[ListingRecord]:
+        """Load listing records by ID, preserving the order of `ids`"""
+        if not ids:
+            return []
+        rows = db.session.execute(ListingRecord.select().where(FoodListing.id.in_(ids)))
+        by_id = {row.id: ListingRecord(row) for row in rows}
+        return [by_id[listing_id] for listing_id in ids if listing_id in by_id]
+    
+    @staticmethod
+    def _search_in_memory(
+        filters: list,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int,
+        offset: int,
+        sort: str
+    ) -> List[ListingRecord]:
+        """search_listings for databases without PostGIS"""
+        rows, distances = ListingService._within_radius(
+            FoodListing, filters, latitude, longitude, radius_km, FoodListing.created_at
+        )
+        distance_by_id = page_candidates(
+            rows, distances, limit, offset, sort, ListingService.RANK_CANDIDATE_LIMIT
+        )
+        listings = ListingService._load_records(list(distance_by_id))
+        return arrange_page(listings, distance_by_id, radius_km, limit, offset, sort)
+    
     @staticmethod
     def get_listing(listing_id: int) -> Optional[FoodListing]:
         """Get a listing by ID"""
         return FoodListing.query.get(listing_id)
     
     @staticmethod
-    def update_listing(listing_id: int, update_data: dict) -> FoodListing:
-        """Update an existing listing"""
-        try:
-            listing = FoodListing.query.get(listing_id)
-            if not listing:
-                raise ValueError("Listing not found")
-            
-            # Update allowed fields
-            allowed_fields = [
-                'title', 'description', 'quantity', 'unit', 'food_type',
-                'expiry_time', 'pickup_start_time', 'pickup_end_time',
-                'special_instructions', 'status'
-            ]
+    @replica_read
+    def get_listing_record(listing_id: int) -> Optional[ListingRecord]:
+        """Get a listing by ID as a read-only record"""
+        records = ListingService._load_records([listing_id])
+        return records[0] if records else None
+    
+    @staticmethod
+    @replica_read
+    def get_listing_version(listing_id: int):
+        """
+        Versions of a listing and its vendor, without loading either
+        
+        Returns:
+            Row with updated_at, vendor_updated_at and expiry_time, or None
+        """
+        return db.session.execute(
+            db.select(
+                FoodListing.updated_at,
+                User.updated_at.label("vendor_updated_at"),
+                FoodListing.expiry_time
+            )
+            .join(User, User.id == FoodListing.vendor_id)
+            .where(FoodListing.id == listing_id)
+        ).one_or_none()
+    
+    @staticmethod
+    def update_listing(
+        listing_id: int,
+        update_data: dict,
+        vendor_id: Optional[int] = None,
+        expected_updated_at: Optional[datetime] = None
+    ) -> ListingRecord:
+        """
+        Update an existing listing in one UPDATE ... RETURNING statement
+        
+        Only the columns present in update_data are written. Ownership, the
+        claimed-quantity floor, the status transition (see
+        BATCH_STATUS_TRANSITIONS) and the version check are conditions of the
+        UPDATE itself, so nothing is read first; the listing is only read
+        again to explain a failed update. Cancelling a listing cancels its
+        pending claims in the same transaction.
+        
+        Args:
+            listing_id: ID of the listing to update
+            update_data: Fields to change, already converted by LISTING_UPDATE
+            vendor_id: Only update if the listing belongs to this vendor
+            expected_updated_at: Only update if the listing is still at this
+                version (its updated_at as last seen by the client)
             
-            for field in allowed_fields:
-                if field in update_data:
-                    setattr(listing, field, update_data[field])
+        Returns:
+            The updated listing as a read-only record
             
+        Raises:
+            ListingError: If the listing is missing (404), owned by another
+                vendor (403), changed since expected_updated_at (409), cannot
+                move to the new status (400 or 409) or the new quantity is
+                below what was already claimed (400)
+        """
+        values = {field: update_data[field] for field in UPDATABLE_FIELDS if field in update_data}
+        conditions = [FoodListing.id == listing_id]
+        if 'status' in values:
+            conditions.append(FoodListing.status.in_(ListingService._status_sources(values['status'])))
+        if vendor_id is not None:
+            conditions.append(FoodListing.vendor_id == vendor_id)
+        if expected_updated_at is not None:
+            # Stored as naive UTC
+            if expected_updated_at.tzinfo is not None:
+                expected_updated_at = expected_updated_at.astimezone(timezone.utc).replace(tzinfo=None)
+            conditions.append(FoodListing.updated_at == expected_updated_at)
+        if 'quantity' in values:
+            # Keep the claimable remainder in step with the listed quantity
+            quantity = values['quantity']
+            conditions.append(
+                FoodListing.quantity - func.coalesce(FoodListing.remaining_quantity, 0) <= quantity
+            )
+            values['remaining_quantity'] = (
+                FoodListing.remaining_quantity + (quantity - FoodListing.quantity)
+            )
+        
+        try:
+            records = ListingService._update_returning(conditions, values)
+            if not records:
+                failure = ListingService._update_failure(
+                    listing_id, values, vendor_id, expected_updated_at
+                )
+                db.session.rollback()
+                raise failure
+            if values.get('status') == ListingStatus.CANCELLED:
+                ListingService._cancel_pending_claims([listing_id])
             db.session.commit()
-            logger.info(f"Updated listing: {listing_id}")
-            
-            return listing
-            
+        except ListingError:
+            raise
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Error updating listing: {str(e)}")
+            logger.error("Error updating listing: %s", e)
             raise
+        
+        logger.info("Updated listing: %s (%s)", listing_id, ', '.join(update_data))
+        ListingService._publish_updates(records)
+        return records[0]
     
     @staticmethod
-    def delete_listing(listing_id: int) -> bool:
-        """Delete a listing (soft delete by marking as cancelled)"""
-        try:
-            listing = FoodListing.query.get(listing_id)
-            if not listing:
-                raise ValueError("Listing not found")
-            
-            listing.status = ListingStatus.CANCELLED
-            db.session.commit()
+    def update_listing_statuses(
+        vendor_id: int,
+        listing_ids: List[int],
+        status: ListingStatus
+    ) -> List[ListingRecord]:
+        """
+        Cancel many of a vendor's listings in one statement
+        
+        Listings that do not exist, belong to another vendor or cannot make
+        the transition (see BATCH_STATUS_TRANSITIONS) are left unchanged.
+        Pending claims on the cancelled listings are cancelled in the same
+        transaction so they stop holding reservations.
+        
+        Args:
+            vendor_id: Vendor owning the listings
+            listing_ids: Listings to change
+            status: Target status
             
-            logger.info(f"Deleted listing: {listing_id}")
-            return True
+        Returns:
+            Records of the listings that were changed
             
+        Raises:
+            ListingError: If the status cannot be set in bulk
+        """
+        from_statuses = ListingService._status_sources(status)
+        
+        try:
+            records = ListingService._update_returning(
+                [
+                    FoodListing.id.in_(set(listing_ids)),
+                    FoodListing.vendor_id == vendor_id,
+                    FoodListing.status.in_(from_statuses)
+                ],
+                {'status': status}
+            )
+            if records:
+                ListingService._cancel_pending_claims([record.id for record in records])
+            db.session.commit()
         except Exception as e:
             db.session.rollback()
-            logger.error(f"Error deleting listing: {str(e)}")
+            logger.error("Error updating listing statuses: %s", e)
             raise
+        
+        logger.info(
+            "Vendor %s marked %s of %s listings %s",
+            vendor_id, len(records), len(listing_ids), status.value
+        )
+        ListingService._publish_updates(records)
+        return records
+    
+    @staticmethod
+    def _status_sources(status: ListingStatus) -> tuple:
+        """Statuses a vendor can move a listing to `status` from"""
+        from_statuses = BATCH_STATUS_TRANSITIONS.get(status)
+        if from_statuses is None:
+            allowed = ", ".join(target.value for target in BATCH_STATUS_TRANSITIONS)
+            raise ListingError(f"status must be one of: {allowed}")
+        return from_statuses
     
     @staticmethod
-    def get_vendor_listings(vendor_id: int, status: Optional[str] = None) -> List[FoodListing]:
-        """Get all listings for a vendor"""
-        query = FoodListing.query.filter(FoodListing.vendor_id == vendor_id)
+    def _cancel_pending_claims(listing_ids: List[int]):
+        """Cancel the pending claims on listings that were just cancelled"""
+        db.session.execute(
+            db.update(Claim)
+            .where(Claim.listing_id.in_(listing_ids), Claim.status == ClaimStatus.PENDING)
+            .values(
+                status=ClaimStatus.CANCELLED,
+                cancelled_at=datetime.now(timezone.utc),
+                reserved_until=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    def _update_returning(conditions: list, values: dict) -> List[ListingRecord]:
+        """
+        UPDATE the listings matching conditions and return their new state
+        
+        The vendor name is selected by a subquery in the RETURNING clause, so
+        serializing the records needs no further queries. Databases without
+        UPDATE ... RETURNING re-read the updated rows instead.
+        """
+        statement = (
+            db.update(FoodListing)
+            .where(*conditions)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if not db.session.get_bind().dialect.update_returning:
+            ids = db.session.scalars(db.select(FoodListing.id).where(*conditions)).all()
+            if not ids:
+                return []
+            db.session.execute(statement.where(FoodListing.id.in_(ids)))
+            return ListingService._load_records(ids)
+        
+        rows = db.session.execute(statement.returning(*_RETURNING))
+        return [ListingRecord(row) for row in rows]
+    
+    @staticmethod
+    def _update_failure(
+        listing_id: int,
+        values: dict,
+        vendor_id: Optional[int],
+        expected_updated_at: Optional[datetime]
+    ) -> "ListingError":
+        """Explain why a conditional update matched no row"""
+        row = db.session.execute(
+            db.select(
+                FoodListing.vendor_id,
+                FoodListing.updated_at,
+                FoodListing.quantity,
+                FoodListing.remaining_quantity,
+                FoodListing.status
+            ).where(FoodListing.id == listing_id)
+        ).one_or_none()
+        if row is None:
+            return ListingError("Listing not found", 404)
+        if vendor_id is not None and row.vendor_id != vendor_id:
+            return ListingError("Not authorized to update this listing", 403)
+        if expected_updated_at is not None and row.updated_at != expected_updated_at:
+            return ListingError("Listing was changed by another request; reload it and retry", 409)
+        if 'status' in values and row.status not in BATCH_STATUS_TRANSITIONS[values['status']]:
+            return ListingError(
+                f"Listing is {row.status.value} and cannot be {values['status'].value}", 409
+            )
+        if 'quantity' in values:
+            claimed = row.quantity - (row.remaining_quantity or 0)
+            if values['quantity'] < claimed:
+                return ListingError(f"quantity cannot be less than the {claimed} already claimed")
+        # Changed between the UPDATE and this read
+        return ListingError("Listing was changed by another request; reload it and retry", 409)
+    
+    @staticmethod
+    def _publish_updates(records: List[ListingRecord]):
+        """Refresh the hot set and feed subscribers after listings changed"""
+        hot_set = get_listing_hot_set()
+        for record in records:
+            if hot_set is not None:
+                hot_set.upsert(record)
+            event_type = LISTING_DELETED if record.status == ListingStatus.CANCELLED else LISTING_UPDATED
+            listing_feed.publish_listing(event_type, record.to_dict())
+    
+    @staticmethod
+    def delete_listing(listing_id: int, vendor_id: int) -> ListingRecord:
+        """
+        Delete a listing (soft delete by cancelling it)
+        
+        Runs the batch cancel for one listing, so the status change is a
+        conditional UPDATE and the listing's pending claims are cancelled
+        with it.
+        
+        Returns:
+            The cancelled listing as a read-only record
+            
+        Raises:
+            ListingError: If the listing is missing (404), owned by another
+                vendor (403) or already closed (409)
+        """
+        records = ListingService.update_listing_statuses(
+            vendor_id, [listing_id], ListingStatus.CANCELLED
+        )
+        if not records:
+            raise ListingService._update_failure(
+                listing_id, {'status': ListingStatus.CANCELLED}, vendor_id, None
+            )
+        
+        logger.info("Deleted listing: %s", listing_id)
+        return records[0]
+    
+    @staticmethod
+    @replica_read
+    def get_vendor_listings(
+        vendor_id: int,
+        status: Optional[str] = None,
+        include_archived: bool = False
+    ) -> List[ListingRecord]:
+        """
+        Get all listings for a vendor, newest first, as read-only records
+        
+        Args:
+            vendor_id: ID of the vendor
+            status: Only listings with this status, if given
+            include_archived: Also return listings moved to the archive
+        """
+        status = ListingStatus(status) if status else None
+        query = ListingRecord.select().where(FoodListing.vendor_id == vendor_id)
         
         if status:
-            query = query.filter(FoodListing.status == status)
+            query = query.where(FoodListing.status == status)
+        
+        rows = db.session.execute(query.order_by(FoodListing.created_at.desc()))
+        listings = [ListingRecord(row) for row in rows]
         
-        return query.order_by(FoodListing.created_at.desc()).all()
+        if include_archived and (status is None or status in TERMINAL_STATUSES):
+            archived = ArchiveService.get_archived_listings(vendor_id, status)
+            listings = list(heapq.merge(listings, archived, key=lambda listing: listing.created_at, reverse=True))
+        return listings
@@ -0,0 +1,93 @@
+"""
+Search ranking - Scores candidate listings for the "rank" search mode
+A listing's score blends how close it is, how soon it expires and how much
+of it is left, so nearby food that is about to spoil comes first.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+
+from src.models import FoodListing
+
+# Relative weight of each ranking signal
+DEFAULT_WEIGHTS = {
+    "distance": 0.5,
+    "urgency": 0.35,
+    "quantity": 0.15,
+}
+
+# Listings expiring further out than this get no urgency boost
+URGENCY_HORIZON_MINUTES = 240.0
+
+# Quantities at or above this count as "plenty"
+QUANTITY_SATURATION = 50.0
+
+
+def score_listing(
+    distance_km: float,
+    minutes_to_expiry: float,
+    quantity: float,
+    radius_km: float,
+    weights: Optional[Dict[str, float]] = None
+) -> float:
+    """
+    Score one listing; higher is better
+
+    Args:
+        distance_km: Distance from the searcher
+        minutes_to_expiry: Minutes until the listing expires
+        quantity: Quantity still available
+        radius_km: Search radius, used to normalise distance
+        weights: Optional override of DEFAULT_WEIGHTS
+
+    Returns:
+        Score between 0 and 1
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    proximity = max(0.0, 1.0 - distance_km / radius_km) if radius_km > 0 else 0.0
+    urgency = max(0.0, 1.0 - max(minutes_to_expiry, 0.0) / URGENCY_HORIZON_MINUTES)
+    plenty = min(1.0, math.log1p(max(quantity, 0.0)) / math.log1p(QUANTITY_SATURATION))
+    return (
+        weights["distance"] * proximity
+        + weights["urgency"] * urgency
+        + weights["quantity"] * plenty
+    )
+
+
+def rank_listings(
+    candidates: Sequence[Tuple[FoodListing, float]],
+    radius_km: float,
+    now: Optional[datetime] = None,
+    weights: Optional[Dict[str, float]] = None
+) -> List[FoodListing]:
+    """
+    Order candidate listings by score and attach their distance
+
+    Args:
+        candidates: (listing, distance_km) pairs, typically from a bounded SQL query
+        radius_km: Search radius in kilometres
+        now: Reference time (defaults to the current UTC time)
+        weights: Optional override of DEFAULT_WEIGHTS
+
+    Returns:
+        Listings sorted best first, each with `distance_km` set
+    """
+    now = now or datetime.now(timezone.utc)
+    scored = []
+    for listing, distance_km in candidates:
+        expiry_time = listing.expiry_time
+        if expiry_time.tzinfo is None:
+            expiry_time = expiry_time.replace(tzinfo=timezone.utc)
+        minutes_to_expiry = (expiry_time - now).total_seconds() / 60.0
+        quantity = listing.remaining_quantity
+        if quantity is None:
+            quantity = listing.quantity
+
+        listing.distance_km = distance_km
+        scored.append((
+            score_listing(distance_km, minutes_to_expiry, quantity, radius_km, weights),
+            listing
+        ))
+
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return [listing for _, listing in scored]
@@ -0,0 +1,197 @@
+"""
+Rating service - Ratings between vendors and the people who collected their food
+User.rating and User.rating_count are denormalized aggregates so profile
+reads stay O(1). Each submission inserts the Rating row and folds its score
+into the aggregates with a single relative UPDATE in the same transaction,
+so concurrent submissions for the same user serialize on the row lock
+instead of overwriting each other. A batch reconciliation recomputes the
+aggregates from Rating rows to repair drift.
+"""
+from typing import List, Optional
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.exc import IntegrityError
+from src.models import db, Claim, ClaimStatus, FoodListing, Rating, User
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Claim statuses that make a claimer and the vendor counterparties
+_RATEABLE_CLAIM_STATUSES = (ClaimStatus.CONFIRMED, ClaimStatus.PICKED_UP)
+
+
+class RatingError(ValueError):
+    """Raised when a rating cannot be submitted"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RatingService:
+    """Service class for submitting ratings and maintaining rating aggregates"""
+
+    @staticmethod
+    def submit_rating(
+        rater_id: int,
+        rated_id: int,
+        listing_id: int,
+        score: int,
+        comment: Optional[str] = None
+    ) -> Rating:
+        """
+        Rate the other party of a listing
+
+        A vendor can rate anyone whose claim on the listing was confirmed or
+        picked up, and such a claimer can rate the vendor. Each rater can rate
+        a user once per listing.
+
+        Args:
+            rater_id: ID of the user giving the rating
+            rated_id: ID of the user being rated
+            listing_id: Listing the two users dealt over
+            score: Integer from 1 to 5
+            comment: Optional comment
+
+        Returns:
+            Created Rating object
+
+        Raises:
+            RatingError: If the score is invalid, the users are not
+                counterparties on the listing, or the rating already exists
+        """
+        if isinstance(score, bool) or not isinstance(score, int) or not 1 <= score <= 5:
+            raise RatingError("score must be an integer from 1 to 5")
+        if rater_id == rated_id:
+            raise RatingError("You cannot rate yourself")
+
+        vendor_id = db.session.scalar(
+            db.select(FoodListing.vendor_id).where(FoodListing.id == listing_id)
+        )
+        if vendor_id is None:
+            raise RatingError("Listing not found", 404)
+
+        claimer_id = rater_id if rated_id == vendor_id else rated_id
+        if vendor_id not in (rater_id, rated_id) or not RatingService._collected(listing_id, claimer_id):
+            raise RatingError("Only a vendor and a claimer of the listing can rate each other", 403)
+
+        try:
+            rating = Rating(
+                rater_id=rater_id,
+                rated_id=rated_id,
+                listing_id=listing_id,
+                score=score,
+                comment=comment
+            )
+            db.session.add(rating)
+            db.session.flush()
+
+            # Relative update: the new average is computed from the row's current values
+            count = func.coalesce(User.rating_count, 0)
+            db.session.execute(
+                update(User)
+                .where(User.id == rated_id)
+                .values(
+                    rating=(func.coalesce(User.rating, 0.0) * count + score) / (count + 1.0),
+                    rating_count=count + 1
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+        except IntegrityError:
+            db.session.rollback()
+            raise RatingError("You have already rated this user for this listing", 409)
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Error submitting rating: %s", e)
+            raise
+
+        logger.info("User %s rated user %s %s/5 for listing %s", rater_id, rated_id, score, listing_id)
+        return rating
+
+    @staticmethod
+    def _collected(listing_id: int, claimer_id: int) -> bool:
+        return db.session.scalar(
+            db.select(Claim.id).where(
+                Claim.listing_id == listing_id,
+                Claim.claimer_id == claimer_id,
+                Claim.status.in_(_RATEABLE_CLAIM_STATUSES)
+            ).limit(1)
+        ) is not None
+
+    @staticmethod
+    def get_user_ratings(rated_id: int, limit: int = 20, offset: int = 0) -> List[Rating]:
+        """Get ratings received by a user, newest first"""
+        return (
+            Rating.query.filter(Rating.rated_id == rated_id)
+            .order_by(Rating.created_at.desc(), Rating.id.desc())
+            .limit(limit)
+            .offset(offset)
+            .all()
+        )
+
+    @staticmethod
+    def reconcile_ratings(batch_size: int = 1000) -> int:
+        """
+        Recompute rating aggregates from Rating rows and fix any that drifted
+
+        Users are walked in primary-key batches; each batch costs one grouped
+        aggregate query and one executemany UPDATE of the users that differ.
+        Every UPDATE is conditional on the rating_count read earlier, so a
+        rating submitted concurrently is never overwritten - that user is
+        left for the next run instead.
+
+        Args:
+            batch_size: Users checked per batch
+
+        Returns:
+            Number of users whose aggregates were corrected
+        """
+        # Core UPDATE on the table: an executemany with a custom WHERE, not an ORM bulk update
+        users_table = User.__table__
+        fix = (
+            update(users_table)
+            .where(
+                users_table.c.id == bindparam('user_id'),
+                func.coalesce(users_table.c.rating_count, 0) == bindparam('seen_count')
+            )
+            .values(rating=bindparam('new_rating'), rating_count=bindparam('new_count'))
+        )
+        corrected = 0
+        last_id = 0
+        while True:
+            users = db.session.execute(
+                db.select(User.id, User.rating, User.rating_count)
+                .where(User.id > last_id)
+                .order_by(User.id)
+                .limit(batch_size)
+            ).all()
+            if not users:
+                break
+            last_id = users[-1].id
+
+            actual = {
+                rated_id: (float(average), count)
+                for rated_id, average, count in db.session.execute(
+                    db.select(Rating.rated_id, func.avg(Rating.score), func.count(Rating.id))
+                    .where(Rating.rated_id.between(users[0].id, last_id))
+                    .group_by(Rating.rated_id)
+                )
+            }
+            changes = []
+            for user in users:
+                average, count = actual.get(user.id, (0.0, 0))
+                if user.rating_count != count or abs((user.rating or 0.0) - average) > 1e-9:
+                    changes.append({
+                        "user_id": user.id,
+                        "seen_count": user.rating_count or 0,
+                        "new_rating": average,
+                        "new_count": count,
+                    })
+            if changes:
+                corrected += db.session.execute(fix, changes).rowcount
+            db.session.commit()
+
+        if corrected:
+            logger.info("Reconciled rating aggregates for %s users", corrected)
+        return corrected
@@ -0,0 +1,99 @@
+"""
+Region service - Maintenance of the region cell partition key
+Rows get their region cell on insert and whenever their coordinates change
+through the ORM. `rebalance` recomputes every row's cell in primary-key
+batches - needed after adding the column to an existing database, after
+coordinates were changed with raw SQL, and when a release changes
+REGION_CELL_DEG to split crowded regions. `load` reports how listings and
+users are spread over cells, to spot regions that have grown too dense.
+"""
+from typing import Dict, List
+from sqlalchemy import bindparam, func, update
+from src.geo.regions import region_cell, region_cell_bounds
+from src.models import db, FoodListing, ListingStatus, User
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RegionService:
+    """Service class for the region cell partition key"""
+
+    @staticmethod
+    def rebalance(batch_size: int = 5000) -> Dict[str, int]:
+        """
+        Recompute the region cell of every user and listing
+
+        Each batch costs one SELECT and one executemany UPDATE of the rows
+        whose cell differs, and is committed on its own.
+
+        Args:
+            batch_size: Rows read per batch
+
+        Returns:
+            Number of rows moved, keyed by table name
+        """
+        moved = {}
+        for model in (User, FoodListing):
+            table = model.__table__
+            fix = (
+                update(table)
+                .where(table.c.id == bindparam('row_id'))
+                .values(region_cell=bindparam('new_cell'))
+            )
+            count = 0
+            last_id = 0
+            while True:
+                rows = db.session.execute(
+                    db.select(model.id, model.latitude, model.longitude, model.region_cell)
+                    .where(model.id > last_id)
+                    .order_by(model.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                changes = []
+                for row in rows:
+                    cell = region_cell(row.latitude, row.longitude)
+                    if cell != row.region_cell:
+                        changes.append({"row_id": row.id, "new_cell": cell})
+                if changes:
+                    count += db.session.execute(fix, changes).rowcount
+                db.session.commit()
+            moved[table.name] = count
+
+        logger.info(f"Rebalanced region cells: {moved}")
+        return moved
+
+    @staticmethod
+    def load(limit: int = 20) -> List[dict]:
+        """
+        Region cells with the most available listings
+
+        Returns:
+            Dictionaries with the cell key, its bounds, and its available
+            listing and user counts, densest first
+        """
+        listings = db.session.execute(
+            db.select(FoodListing.region_cell, func.count(FoodListing.id).label("count"))
+            .where(FoodListing.status == ListingStatus.AVAILABLE)
+            .group_by(FoodListing.region_cell)
+            .order_by(func.count(FoodListing.id).desc())
+            .limit(limit)
+        ).all()
+        cells = [row.region_cell for row in listings if row.region_cell is not None]
+        users = dict(db.session.execute(
+            db.select(User.region_cell, func.count(User.id))
+            .where(User.region_cell.in_(cells))
+            .group_by(User.region_cell)
+        ).all())
+        return [
+            {
+                "cell": row.region_cell,
+                "bounds": region_cell_bounds(row.region_cell) if row.region_cell is not None else None,
+                "listings": row.count,
+                "users": users.get(row.region_cell, 0),
+            }
+            for row in listings
+        ]
@@ -0,0 +1,367 @@
+"""
+Reservation engine - Atomic quantity reservations for partial claims
+Concurrent claims on the same listing are group-committed: the first
+claimer to arrive becomes the leader and applies everything queued behind
+it with a single conditional decrement of the listing's remaining quantity,
+instead of every claimer fighting over the same row lock. Reservations
+expire after a TTL unless the vendor confirms them, and a sweeper returns
+abandoned quantities to their listings.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, case, literal, update
+from src.models import db, Claim, ClaimStatus, FoodListing, ListingStatus
+from src.services.hot_set import mark_listing_changed
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimError(ValueError):
+    """Raised when a claim cannot be made or changed"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _listing_status(status: ListingStatus):
+    """Bind a listing status as a typed literal for use inside CASE expressions"""
+    return literal(status, FoodListing.__table__.c.status.type)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes read back from the database as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class ClaimRequest:
+    """A claim waiting to be applied, by the leader of its listing's batch or the async service"""
+    __slots__ = (
+        'claimer_id', 'requested', 'quantity', 'notes',
+        'done', 'finished', 'claim_id', 'error', 'lead'
+    )
+
+    def __init__(self, claimer_id: int, quantity: Optional[float], notes: Optional[str]):
+        self.claimer_id = claimer_id
+        self.requested = quantity
+        self.quantity = quantity
+        self.notes = notes
+        self.done = threading.Event()
+        self.finished = False
+        self.claim_id = None
+        self.error = None
+        self.lead = False
+
+
+class ReservationEngine:
+    """Batches concurrent reservations per listing and expires abandoned ones"""
+
+    # Re-reads allowed when another process changes the listing mid-batch
+    MAX_BATCH_ATTEMPTS = 5
+
+    def __init__(self, ttl: timedelta = timedelta(minutes=30), max_batch: int = 100):
+        """
+        Args:
+            ttl: How long a pending claim holds its quantity
+            max_batch: Maximum number of claims applied in one transaction
+        """
+        self.ttl = ttl
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._queues: Dict[Tuple[int, int], List[ClaimRequest]] = {}
+        self._leaders = set()
+
+    def configure(self, app_config: dict):
+        """Apply reservation settings from application config"""
+        self.ttl = timedelta(minutes=app_config.get('CLAIM_RESERVATION_TTL_MINUTES', 30))
+        self.max_batch = app_config.get('CLAIM_BATCH_SIZE', self.max_batch)
+
+    def reserve(
+        self,
+        listing_id: int,
+        claimer_id: int,
+        quantity: Optional[float] = None,
+        notes: Optional[str] = None
+    ) -> int:
+        """
+        Reserve quantity on a listing and create a pending claim for it
+
+        Args:
+            listing_id: ID of the listing to claim
+            claimer_id: ID of the user claiming
+            quantity: Amount to reserve; everything remaining if omitted
+            notes: Optional message for the vendor
+
+        Returns:
+            ID of the created claim
+
+        Raises:
+            ClaimError: If the listing cannot satisfy the reservation
+        """
+        request = ClaimRequest(claimer_id, quantity, notes)
+        key = (id(db.engine), listing_id)
+
+        with self._lock:
+            self._queues.setdefault(key, []).append(request)
+            request.lead = key not in self._leaders
+            if request.lead:
+                self._leaders.add(key)
+
+        if not request.lead:
+            request.done.wait()
+
+        # Leadership is handed to a waiting claimer once the leader's own claim is done
+        if request.lead:
+            self._lead(key, listing_id, request)
+
+        if request.error is not None:
+            raise request.error
+        return request.claim_id
+
+    def _lead(self, key: Tuple[int, int], listing_id: int, own: ClaimRequest):
+        """Apply queued batches until this thread's own request is finished"""
+        while True:
+            with self._lock:
+                queue = self._queues.get(key, [])
+                if own.finished and queue:
+                    successor = queue[0]
+                    successor.lead = True
+                    successor.done.set()
+                    return
+                if not queue:
+                    self._queues.pop(key, None)
+                    self._leaders.discard(key)
+                    return
+                batch = queue[:self.max_batch]
+                del queue[:self.max_batch]
+
+            try:
+                self._apply_batch(listing_id, batch)
+            except Exception as e:
+                db.session.rollback()
+                logger.error("Error applying claim batch for listing %s: %s", listing_id, e)
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.finished = True
+                    request.lead = False
+                    request.done.set()
+
+    def _apply_batch(self, listing_id: int, batch: List[ClaimRequest]):
+        """Allocate quantity to a batch of requests in arrival order and commit once"""
+        swept = False
+        for _ in range(self.MAX_BATCH_ATTEMPTS):
+            row = db.session.execute(
+                db.select(
+                    FoodListing.remaining_quantity,
+                    FoodListing.status,
+                    FoodListing.expiry_time,
+                    FoodListing.unit
+                ).where(FoodListing.id == listing_id)
+            ).one_or_none()
+
+            if row is None:
+                for request in batch:
+                    request.error = ClaimError("Listing not found", 404)
+                return
+
+            remaining = row.remaining_quantity or 0
+            demand = sum(request.requested or 0 for request in batch)
+            if not swept and (row.status == ListingStatus.CLAIMED or demand > remaining):
+                # Abandoned reservations may be holding the quantity we need
+                swept = True
+                if self.release_expired(listing_id=listing_id, commit=False):
+                    continue
+
+            granted = self.allocate(batch, row)
+            if not granted:
+                # Keep any reservations the sweep above released
+                db.session.commit()
+                return
+
+            total = sum(request.quantity for request in granted)
+            if self._take(listing_id, total):
+                reserved_until = datetime.now(timezone.utc) + self.ttl
+                claims = [
+                    Claim(
+                        listing_id=listing_id,
+                        claimer_id=request.claimer_id,
+                        quantity=request.quantity,
+                        notes=request.notes,
+                        status=ClaimStatus.PENDING,
+                        reserved_until=reserved_until
+                    )
+                    for request in granted
+                ]
+                db.session.add_all(claims)
+                db.session.flush()
+                for request, claim in zip(granted, claims):
+                    request.claim_id = claim.id
+                db.session.commit()
+
+                logger.info(
+                    "Reserved %s on listing %s for %s claims", total, listing_id, len(granted)
+                )
+                return
+
+            # Another process changed the listing between our read and write
+            db.session.rollback()
+            swept = False
+            for request in batch:
+                request.error = None
+
+        for request in batch:
+            request.error = ClaimError("Listing is busy, please try again", 409)
+
+    @staticmethod
+    def allocate(batch: List[ClaimRequest], row) -> List[ClaimRequest]:
+        """Grant requests in order while quantity lasts; reject the rest"""
+        if row.status != ListingStatus.AVAILABLE:
+            error = ClaimError("Listing is no longer available", 409)
+            available = 0
+        elif _as_utc(row.expiry_time) <= datetime.now(timezone.utc):
+            error = ClaimError("Listing has expired", 409)
+            available = 0
+        else:
+            error = None
+            available = row.remaining_quantity or 0
+
+        granted = []
+        for request in batch:
+            request.quantity = request.requested
+            if request.quantity is None:
+                request.quantity = available
+            if 0 < request.quantity <= available:
+                available -= request.quantity
+                granted.append(request)
+            else:
+                request.error = error or ClaimError(
+                    f"Only {available} {row.unit} remaining", 409
+                )
+        return granted
+
+    @staticmethod
+    def _take(listing_id: int, quantity: float) -> bool:
+        """
+        Atomically take `quantity` from a listing
+
+        The WHERE clause re-checks availability inside the UPDATE itself, so a
+        competing writer in another process makes this match zero rows rather
+        than over-allocate.
+        """
+        result = db.session.execute(ReservationEngine.take_statement(listing_id, quantity))
+        if result.rowcount != 1:
+            return False
+        mark_listing_changed(listing_id)
+        return True
+
+    @staticmethod
+    def take_statement(listing_id: int, quantity: float):
+        """The conditional UPDATE behind _take (also run by the async service)"""
+        remaining = FoodListing.remaining_quantity - quantity
+        return (
+            update(FoodListing)
+            .where(
+                FoodListing.id == listing_id,
+                FoodListing.status == ListingStatus.AVAILABLE,
+                FoodListing.expiry_time > datetime.now(timezone.utc),
+                FoodListing.remaining_quantity >= quantity
+            )
+            .values(
+                remaining_quantity=remaining,
+                status=case(
+                    (remaining <= 0, _listing_status(ListingStatus.CLAIMED)),
+                    else_=FoodListing.status
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def release(listing_id: int, quantity: float):
+        """
+        Return quantity to a listing, reopening it if it was fully claimed
+
+        Only a listing that claims ran down to zero is reopened, and only when
+        the returned quantity makes some available again; one the vendor closed
+        with quantity left keeps its status.
+        """
+        mark_listing_changed(listing_id)
+        restored = FoodListing.remaining_quantity + quantity
+        db.session.execute(
+            update(FoodListing)
+            .where(FoodListing.id == listing_id)
+            .values(
+                remaining_quantity=restored,
+                status=case(
+                    (
+                        and_(
+                            FoodListing.status == ListingStatus.CLAIMED,
+                            FoodListing.remaining_quantity <= 0,
+                            restored > 0
+                        ),
+                        _listing_status(ListingStatus.AVAILABLE)
+                    ),
+                    else_=FoodListing.status
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def release_expired(
+        self,
+        listing_id: Optional[int] = None,
+        batch_size: int = 500,
+        commit: bool = True
+    ) -> int:
+        """
+        Cancel pending claims whose reservation has lapsed and return their quantity
+
+        Args:
+            listing_id: Only sweep this listing, if given
+            batch_size: Maximum number of claims released per call
+            commit: Commit the transaction when done
+
+        Returns:
+            Number of claims released
+        """
+        now = datetime.now(timezone.utc)
+        query = db.select(Claim.id, Claim.listing_id, Claim.quantity).where(
+            Claim.status == ClaimStatus.PENDING,
+            Claim.reserved_until < now
+        )
+        if listing_id is not None:
+            query = query.where(Claim.listing_id == listing_id)
+
+        released: Dict[int, float] = defaultdict(float)
+        count = 0
+        for claim_id, claim_listing_id, quantity in db.session.execute(query.limit(batch_size)).all():
+            # Conditional on PENDING so a claim confirmed meanwhile is left alone
+            result = db.session.execute(
+                update(Claim)
+                .where(Claim.id == claim_id, Claim.status == ClaimStatus.PENDING)
+                .values(status=ClaimStatus.CANCELLED, cancelled_at=now, reserved_until=None)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                released[claim_listing_id] += quantity
+                count += 1
+
+        for claim_listing_id, quantity in released.items():
+            self.release(claim_listing_id, quantity)
+
+        if commit:
+            db.session.commit()
+
+        if count:
+            logger.info("Released %s expired reservations on %s listings", count, len(released))
+
+        return count
+
+
+# Singleton instance of the reservation engine
+reservation_engine = ReservationEngine()
@@ -0,0 +1,145 @@
+"""
+Response cache - Conditional GETs and cached bodies for listing reads
+Responses carry a strong ETag built from the versions (updated_at) of the
+rows they were rendered from, and a private Cache-Control max-age capped at
+the time left before the earliest listing in them expires.
+
+Two tiers sit in front of serialization:
+1. Clients revalidate with If-None-Match and get a bodyless 304 when the
+   version is unchanged.
+2. An in-process LRU keeps serialized bodies keyed by ETag, so a client
+   without the body is served the bytes already rendered for that version.
+   Keys embed the version, so entries never need invalidating; stale ones
+   simply age out.
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+import hashlib
+import threading
+
+from flask import current_app, request
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Thread-safe LRU of serialized response bodies keyed by ETag"""
+
+    def __init__(self, max_entries: int = 1000):
+        """
+        Args:
+            max_entries: Least recently used bodies are evicted beyond this size (0 disables)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, etag: str) -> Optional[bytes]:
+        """Return the body stored for an ETag, if any"""
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is not None:
+                self._entries.move_to_end(etag)
+            return body
+
+    def put(self, etag: str, body: bytes):
+        """Store a body, evicting the least recently used beyond max_entries"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[etag] = body
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached body"""
+        with self._lock:
+            self._entries.clear()
+
+
+def make_etag(*parts) -> str:
+    """Opaque strong ETag (unquoted) for the given version parts"""
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, datetime):
+            part = part.isoformat()
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def cache_control(expiry_times: Iterable[datetime], max_age: int) -> str:
+    """
+    Cache-Control value for a response built from listings
+
+    Args:
+        expiry_times: Expiry time of every listing in the response
+        max_age: Upper bound in seconds
+
+    Returns:
+        'private, max-age=N' with N capped at the earliest expiry, or
+        'private, no-cache' when a listing has already expired
+    """
+    now = datetime.now(timezone.utc)
+    seconds = max_age
+    for expiry_time in expiry_times:
+        if expiry_time.tzinfo is None:
+            expiry_time = expiry_time.replace(tzinfo=timezone.utc)
+        seconds = min(seconds, int((expiry_time - now).total_seconds()))
+    if seconds <= 0:
+        return "private, no-cache"
+    return f"private, max-age={seconds}"
+
+
+def get_response_cache() -> ResponseCache:
+    """The response cache of the current application"""
+    return current_app.extensions['response_cache']
+
+
+def conditional_json(etag: str, cache_control_value: str, build: Callable[[], dict]):
+    """
+    Respond 304 when the client holds `etag`, else the JSON body for it
+
+    `build` is only called when neither the client nor the body cache has
+    this version, so the caller can defer loading and serializing rows.
+
+    Args:
+        etag: Strong ETag of the representation (unquoted)
+        cache_control_value: Cache-Control header value
+        build: Returns the response payload
+
+    Returns:
+        Flask response
+    """
+    if request.if_none_match.contains(etag) or request.if_none_match.star_tag:
+        response = current_app.response_class(status=304)
+    else:
+        cache = get_response_cache()
+        body = cache.get(etag)
+        if body is None:
+            body = current_app.json.dumps(build()).encode()
+            cache.put(etag, body)
+        response = current_app.response_class(body, status=200, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control_value
+    # Bodies are the same for every user, but only authenticated users may see them
+    response.vary.add('Authorization')
+    return response
+
+
+def init_response_cache(app):
+    """
+    Install the response body cache on an application
+
+    Args:
+        app: Flask application
+    """
+    app.extensions['response_cache'] = ResponseCache(
+        max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1000)
+    )
@@ -0,0 +1,13 @@
+"""
+Validation package - Precompiled request schemas shared by all write endpoints
+"""
+from src.validation.schema import Field, Schema, ValidationError, validate_json
+from src.validation.schemas import (
+    CLAIM_CREATE, LISTING_CREATE, LISTING_STATUS_BATCH, LISTING_UPDATE, LOGIN, RATING, REGISTER
+)
+
+__all__ = [
+    'Field', 'Schema', 'ValidationError', 'validate_json',
+    'CLAIM_CREATE', 'LISTING_CREATE', 'LISTING_STATUS_BATCH', 'LISTING_UPDATE', 'LOGIN',
+    'RATING', 'REGISTER'
+]
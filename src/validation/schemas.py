@@ -0,0 +1,123 @@
+"""
+Request schemas for the API's write endpoints
+Messages match the ones the endpoints returned before validation moved
+here, so clients see the same errors.
+"""
+from datetime import datetime, timezone
+
+from src.models import FoodType, ListingStatus, UserRole
+from src.validation.schema import (
+    Field, Schema, choice, integer, integers, number, string, timestamp
+)
+
+
+def _positive(value: float) -> bool:
+    return value > 0
+
+
+def _in_future(value: datetime) -> bool:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value > datetime.now(timezone.utc)
+
+
+def _latitude(value: float) -> bool:
+    return -90 <= value <= 90
+
+
+def _longitude(value: float) -> bool:
+    return -180 <= value <= 180
+
+
+def _email(value: str) -> bool:
+    return '@' in value
+
+
+def _score(value: int) -> bool:
+    return 1 <= value <= 5
+
+
+# Listings a vendor can change in one batch request
+MAX_BATCH_LISTINGS = 500
+
+
+def _batch_size(value: list) -> bool:
+    return 1 <= len(value) <= MAX_BATCH_LISTINGS
+
+
+_QUANTITY = dict(check=_positive, failed="quantity must be positive")
+_FOOD_TYPE = dict(invalid="Invalid food_type")
+_EXPIRY = dict(invalid="Invalid expiry_time format", check=_in_future,
+               failed="expiry_time must be in the future")
+_LATITUDE = dict(check=_latitude, failed="latitude or longitude out of range")
+_LONGITUDE = dict(check=_longitude, failed="latitude or longitude out of range")
+
+# Single creates, async creates and bulk import rows
+LISTING_CREATE = Schema({
+    'title': Field(string, required=True),
+    'description': Field(string),
+    'quantity': Field(number, required=True, **_QUANTITY),
+    'unit': Field(string, required=True),
+    'food_type': Field(choice(FoodType), required=True, **_FOOD_TYPE),
+    'expiry_time': Field(timestamp, required=True, **_EXPIRY),
+    'pickup_start_time': Field(timestamp, invalid="Invalid pickup_start_time format"),
+    'pickup_end_time': Field(timestamp, invalid="Invalid pickup_end_time format"),
+    'pickup_address': Field(string, required=True),
+    'latitude': Field(number, required=True, **_LATITUDE),
+    'longitude': Field(number, required=True, **_LONGITUDE),
+    'image_url': Field(string),
+    'special_instructions': Field(string),
+})
+
+# Partial update: only the fields a vendor may change; optional text and
+# pickup times can be cleared with null. updated_at is not written: it is the
+# version the client last read, for optimistic concurrency
+LISTING_UPDATE = Schema({
+    'title': Field(string),
+    'description': Field(string, nullable=True),
+    'quantity': Field(number, **_QUANTITY),
+    'unit': Field(string),
+    'food_type': Field(choice(FoodType), **_FOOD_TYPE),
+    'expiry_time': Field(timestamp, **_EXPIRY),
+    'pickup_start_time': Field(timestamp, nullable=True, invalid="Invalid pickup_start_time format"),
+    'pickup_end_time': Field(timestamp, nullable=True, invalid="Invalid pickup_end_time format"),
+    'special_instructions': Field(string, nullable=True),
+    'status': Field(choice(ListingStatus), invalid="Invalid status"),
+    'updated_at': Field(timestamp, invalid="Invalid updated_at format"),
+})
+
+LISTING_STATUS_BATCH = Schema({
+    'listing_ids': Field(integers, required=True, check=_batch_size,
+                         failed=f"listing_ids must hold 1 to {MAX_BATCH_LISTINGS} ids"),
+    'status': Field(choice(ListingStatus), required=True, invalid="Invalid status"),
+})
+
+REGISTER = Schema({
+    'email': Field(string, required=True, check=_email, failed="Invalid email"),
+    'password': Field(string, required=True),
+    'name': Field(string, required=True),
+    'role': Field(choice(UserRole), required=True, invalid="Invalid role"),
+    'phone': Field(string),
+    'address': Field(string),
+    'latitude': Field(number, **_LATITUDE),
+    'longitude': Field(number, **_LONGITUDE),
+})
+
+LOGIN = Schema({
+    'email': Field(string, required=True),
+    'password': Field(string, required=True),
+})
+
+CLAIM_CREATE = Schema({
+    'listing_id': Field(integer, required=True),
+    'quantity': Field(number, **_QUANTITY),
+    'notes': Field(string),
+})
+
+RATING = Schema({
+    'listing_id': Field(integer, required=True),
+    'score': Field(integer, required=True, check=_score,
+                   invalid="score must be an integer from 1 to 5",
+                   failed="score must be an integer from 1 to 5"),
+    'comment': Field(string),
+})
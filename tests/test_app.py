@@ -2,11 +2,49 @@
 Test suite for Fresh-Share Platform
 Run with: pytest tests/ -v
 """
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
 import pytest
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from src.app import create_app
-from src.models import db, User, FoodListing, UserRole, FoodType, ListingStatus
-from src.observers.notification_observer import NotificationService, EmailNotifier
+from src.config import TestingConfig
+from src.models import (
+    db, User, FoodListing, ListingRecord, Claim, ClaimStatus, UserRole, FoodType, ListingStatus,
+    ImpactRollup, ArchivedClaim
+)
+from src.services.claim_service import ClaimService, ClaimError
+from src.services.rating_service import RatingService
+from src.services.impact_service import ImpactService
+from src.services.export_service import ExportService
+from src.services.archive_service import ArchiveService
+from src.services.import_service import ImportService
+from src.services.reservation_service import reservation_engine
+from src.services.ranking import rank_listings, score_listing
+from src.realtime.broker import LocalBroker, LISTING_CREATED
+from src.realtime.server import FeedServer
+from src.realtime.subscriptions import MAX_CELLS_PER_SUBSCRIPTION, Subscription, SubscriptionIndex
+from src.async_api import AsyncApiServer
+from src.services.auth_service import token_claims
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+from src.observers.notification_observer import (
+    NotificationService, EmailNotifier, SMSNotifier, notification_service
+)
+from src.observers.rate_limit import TokenBucket
+from src.monitoring import metrics_registry
+from src.db.synthetic import SyntheticDataGenerator, density_by_cell
+from src.geo import bounding_box, haversine_km, region_cell, region_cells, within_radius
+from src.services.region_service import RegionService
+from src.services.listing_service import ListingService
+from src.models.routing import READ_PRIMARY_COOKIE
+from src.monitoring.structured_logging import build_handlers
+from src.validation import LISTING_CREATE, LISTING_UPDATE, ValidationError
 
 
 @pytest.fixture
@@ -64,6 +102,13 @@ def charity_user(app):
         return user
 
 
+@pytest.fixture
+def synthetic_data(app):
+    """Clustered vendors, users and listings from a fixed seed"""
+    with app.app_context():
+        return SyntheticDataGenerator(seed=7).load(vendors=20, users=200, listings=1000)
+
+
 class TestAuthentication:
     """Test authentication endpoints"""
     
@@ -116,6 +161,84 @@ class TestAuthentication:
         })
         
         assert response.status_code == 401
+    
+    def test_token_carries_role_claims(self, app, client, vendor_user):
+        """Test login embeds role and verification in the access token"""
+        response = client.post('/api/auth/login', json={
+            "email": "vendor@test.com",
+            "password": "password123"
+        })
+        
+        with app.app_context():
+            claims = decode_token(response.get_json()['access_token'])
+        
+        assert claims['role'] == "vendor"
+        assert claims['verified'] is False
+    
+    def test_authorization_uses_cached_principal(self, app, client, charity_user):
+        """Test repeated authenticated requests do not reload the user"""
+        token = client.post('/api/auth/login', json={
+            "email": "charity@test.com",
+            "password": "password123"
+        }).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        client.get('/api/claims/', headers=headers)
+        
+        statements = []
+        
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                response = client.get('/api/claims/', headers=headers)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+        
+        assert response.status_code == 200
+        assert not any('FROM users' in statement for statement in statements)
+    
+    def test_role_change_revokes_tokens(self, app, client, charity_user):
+        """Test changing a user's role blocks tokens issued with the old role"""
+        token = client.post('/api/auth/login', json={
+            "email": "charity@test.com",
+            "password": "password123"
+        }).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        with app.app_context():
+            user = User.query.filter_by(email="charity@test.com").first()
+            user.role = UserRole.INDIVIDUAL
+            db.session.commit()
+        
+        response = client.get('/api/claims/', headers=headers)
+        
+        assert response.status_code == 401
+    
+    def test_deactivated_user_is_blocked(self, app, client, charity_user):
+        """Test deactivating a user revokes their tokens and blocks new logins"""
+        token = client.post('/api/auth/login', json={
+            "email": "charity@test.com",
+            "password": "password123"
+        }).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        assert client.get('/api/claims/', headers=headers).status_code == 200
+        
+        with app.app_context():
+            user = User.query.filter_by(email="charity@test.com").first()
+            user.is_active = False
+            db.session.commit()
+        
+        assert client.get('/api/claims/', headers=headers).status_code == 401
+        
+        relogin = client.post('/api/auth/login', json={
+            "email": "charity@test.com",
+            "password": "password123"
+        })
+        assert relogin.status_code == 403
+        assert 'access_token' not in relogin.get_json()
 
 
 class TestListings:
@@ -130,59 +253,1847 @@ class TestListings:
         })
         token = response.get_json()['access_token']
         return {'Authorization': f'Bearer {token}'}
+    
+    @pytest.fixture
+    def listings(self, app, vendor_user):
+        """A listing near the vendor, one 3 km away and one across town"""
+        with app.app_context():
+            vendor = User.query.filter_by(email="vendor@test.com").first()
+            expiry_time = datetime.now(timezone.utc) + timedelta(hours=2)
+            for title, latitude, food_type in (
+                ("Nearby bread", 40.7130, FoodType.BAKERY),
+                ("Walkable soup", 40.7400, FoodType.PREPARED_FOOD),
+                ("Far apples", 40.8500, FoodType.PRODUCE),
+            ):
+                db.session.add(FoodListing(
+                    vendor_id=vendor.id,
+                    title=title,
+                    quantity=5,
+                    unit="kg",
+                    food_type=food_type,
+                    expiry_time=expiry_time,
+                    pickup_address="Test Address",
+                    latitude=latitude,
+                    longitude=-74.0060
+                ))
+            db.session.commit()
+    
+    def test_search_without_postgis(self, client, auth_headers, listings):
+        """Test search falls back to in-memory distances on SQLite"""
+        response = client.get(
+            '/api/listings/search?latitude=40.7128&longitude=-74.0060&radius_km=5',
+            headers=auth_headers
+        )
+        titles = [listing['title'] for listing in response.get_json()['listings']]
+        
+        assert response.status_code == 200
+        assert sorted(titles) == ["Nearby bread", "Walkable soup"]
+    
+    def test_ranked_search_without_postgis(self, app, listings):
+        """Test ranked fallback search attaches distances and filters by food type"""
+        ranked = ListingService.search_listings(40.7128, -74.0060, radius_km=20, sort='rank')
+        bakery = ListingService.search_listings(40.7128, -74.0060, radius_km=20, food_type='bakery')
+        
+        assert len(ranked) == 3
+        assert ranked[0].title == "Nearby bread"
+        assert ranked[0].distance_km < 0.1
+        assert [listing.title for listing in bakery] == ["Nearby bread"]
+    
+    def test_get_listing_conditional(self, client, auth_headers, charity_user, listings):
+        """Test ETag revalidation answers 304 and claims change the version"""
+        listing = FoodListing.query.filter_by(title="Nearby bread").first()
+        url = f'/api/listings/{listing.id}'
+        
+        first = client.get(url, headers=auth_headers)
+        etag = first.headers['ETag']
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            revalidated = client.get(url, headers={**auth_headers, 'If-None-Match': etag})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        charity = User.query.filter_by(email="charity@test.com").first()
+        ClaimService.create_claim(charity.id, listing.id, quantity=1)
+        after_claim = client.get(url, headers={**auth_headers, 'If-None-Match': etag})
+        
+        assert first.status_code == 200
+        assert first.get_json()['listing']['title'] == "Nearby bread"
+        assert first.headers['Cache-Control'] == 'private, max-age=60'
+        assert revalidated.status_code == 304
+        assert revalidated.get_data() == b''
+        assert not any('description' in statement for statement in statements)
+        assert after_claim.status_code == 200
+        assert after_claim.headers['ETag'] != etag
+        assert after_claim.get_json()['listing']['remaining_quantity'] == 4
+    
+    def test_search_conditional(self, client, auth_headers, listings):
+        """Test unchanged search results revalidate to 304 and new listings change the ETag"""
+        url = '/api/listings/search?latitude=40.7128&longitude=-74.0060&radius_km=5'
+        etag = client.get(url, headers=auth_headers).headers['ETag']
+        
+        unchanged = client.get(url, headers={**auth_headers, 'If-None-Match': etag})
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        db.session.add(FoodListing(
+            vendor_id=vendor.id, title="Fresh rolls", quantity=3, unit="kg",
+            food_type=FoodType.BAKERY, pickup_address="Test Address",
+            expiry_time=datetime.now(timezone.utc) + timedelta(seconds=10),
+            latitude=40.7129, longitude=-74.0060
+        ))
+        db.session.commit()
+        changed = client.get(url, headers={**auth_headers, 'If-None-Match': etag})
+        
+        assert unchanged.status_code == 304
+        assert changed.status_code == 200
+        assert changed.get_json()['count'] == 3
+        # Capped by the new listing's expiry
+        assert 0 < int(changed.headers['Cache-Control'].split('=')[1]) <= 10
+    
+    def test_my_listings_served_from_records(self, app, client, auth_headers, listings):
+        """Test projected records serialize exactly like the ORM model"""
+        response = client.get('/api/listings/my-listings', headers=auth_headers)
+        records = ListingService.get_vendor_listings(User.query.first().id, 'available')
+        expected = [
+            listing.to_dict()
+            for listing in FoodListing.query.order_by(FoodListing.created_at.desc())
+        ]
+        
+        assert response.status_code == 200
+        assert response.get_json()['listings'] == expected
+        assert all(isinstance(record, ListingRecord) for record in records)
+        assert client.get(
+            '/api/listings/my-listings?status=bogus', headers=auth_headers
+        ).status_code == 400
 
 
-class TestObserverPattern:
-    """Test Observer pattern implementation"""
+class TestValidation:
+    """Test request schemas and their use by the endpoints"""
     
-    def test_notification_service_attach(self):
-        """Test attaching observers"""
-        service = NotificationService()
-        observer = EmailNotifier()
+    @pytest.fixture
+    def auth_headers(self, client, vendor_user):
+        token = client.post('/api/auth/login', json={
+            "email": "vendor@test.com",
+            "password": "password123"
+        }).get_json()['access_token']
+        return {'Authorization': f'Bearer {token}'}
+    
+    def test_schema_coerces_in_one_pass(self):
+        """Test raw strings are converted, blanks and unknown fields dropped"""
+        data = LISTING_CREATE.validate({
+            "title": "Bread", "quantity": "12.5", "unit": "kg", "food_type": "bakery",
+            "expiry_time": "2099-01-01T10:00:00Z", "pickup_address": "1 Test St",
+            "latitude": "40.7", "longitude": "-74.0", "description": "", "vendor_id": 99
+        })
         
-        initial_count = service.get_observer_count()
-        service.attach(observer)
+        assert data['quantity'] == 12.5
+        assert data['latitude'] == 40.7
+        assert data['food_type'] is FoodType.BAKERY
+        assert data['expiry_time'] == datetime(2099, 1, 1, 10, tzinfo=timezone.utc)
+        assert 'description' not in data
+        assert 'vendor_id' not in data
         
-        assert service.get_observer_count() == initial_count + 1
+        with pytest.raises(ValidationError, match="latitude or longitude out of range"):
+            LISTING_CREATE.validate({**data, "food_type": "bakery", "latitude": 95})
+        with pytest.raises(ValidationError, match="Request body must be a JSON object"):
+            LISTING_UPDATE.validate(["title"])
+        assert LISTING_UPDATE.validate({"description": None, "title": None}) == {"description": None}
     
-    def test_notification_service_detach(self):
-        """Test detaching observers"""
-        service = NotificationService()
-        observer = EmailNotifier()
+    def test_register_rejects_bad_payloads(self, client):
+        """Test registration validates role, types and body shape"""
+        base = {"email": "new@test.com", "password": "password123", "name": "New", "role": "vendor"}
         
-        service.attach(observer)
-        initial_count = service.get_observer_count()
-        service.detach(observer)
+        invalid_role = client.post('/api/auth/register', json={**base, "role": "pirate"})
+        bad_latitude = client.post('/api/auth/register', json={**base, "latitude": "north"})
+        missing = client.post('/api/auth/register', json={"email": "new@test.com"})
+        not_json = client.post('/api/auth/register', data="email=new@test.com")
         
-        assert service.get_observer_count() == initial_count - 1
+        assert invalid_role.status_code == 400
+        assert invalid_role.get_json()['error'] == "Invalid role"
+        assert bad_latitude.get_json()['error'] == "Invalid latitude"
+        assert missing.get_json()['error'] == "Missing required field: password"
+        assert not_json.status_code == 400
+        assert User.query.filter_by(email="new@test.com").first() is None
     
-    def test_notification_service_notify(self):
-        """Test notifying observers"""
-        service = NotificationService()
-        service.attach(EmailNotifier())
+    def test_update_rejected_before_database_work(self, app, client, auth_headers):
+        """Test invalid updates fail without listing queries and valid ones are converted"""
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        listing = FoodListing(
+            vendor_id=vendor.id, title="Bread", quantity=5, unit="kg",
+            food_type=FoodType.BAKERY, pickup_address="Test Address",
+            expiry_time=datetime.now(timezone.utc) + timedelta(hours=2),
+            latitude=40.7128, longitude=-74.0060
+        )
+        db.session.add(listing)
+        db.session.commit()
+        url = f'/api/listings/{listing.id}'
         
-        listing_data = {
-            'id': 1,
-            'vendor_id': 1,
-            'title': 'Test Food',
-            'quantity': 10,
-            'unit': 'kg',
-            'pickup_address': 'Test Address',
-            'expiry_time': datetime.now(timezone.utc).isoformat()
-        }
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            invalid = client.put(url, headers=auth_headers, json={"quantity": "lots"})
+            empty = client.put(url, headers=auth_headers, json={"vendor_id": 2})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        valid = client.put(url, headers=auth_headers, json={
+            "food_type": "produce", "quantity": "8", "description": None
+        })
         
-        users_data = [
-            {
-                'id': 2,
-                'name': 'Test User',
-                'email': 'test@example.com',
-                'phone': '+1234567890'
-            }
+        assert invalid.status_code == 400
+        assert invalid.get_json()['error'] == "Invalid quantity"
+        assert empty.status_code == 400
+        assert not any('food_listings' in statement for statement in statements)
+        assert valid.status_code == 200
+        assert valid.get_json()['listing']['food_type'] == "produce"
+        assert valid.get_json()['listing']['remaining_quantity'] == 8
+
+
+class TestListingUpdates:
+    """Test single-statement listing updates and batch status changes"""
+    
+    @pytest.fixture
+    def auth_headers(self, client, vendor_user):
+        token = client.post('/api/auth/login', json={
+            "email": "vendor@test.com",
+            "password": "password123"
+        }).get_json()['access_token']
+        return {'Authorization': f'Bearer {token}'}
+    
+    @pytest.fixture
+    def listing_ids(self, app, vendor_user):
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        listings = [
+            FoodListing(
+                vendor_id=vendor.id, title=f"Bread {i}", quantity=5, unit="kg",
+                food_type=FoodType.BAKERY, pickup_address="Test Address", status=status,
+                expiry_time=datetime.now(timezone.utc) + timedelta(hours=2),
+                latitude=40.7128, longitude=-74.0060
+            )
+            for i, status in enumerate((ListingStatus.AVAILABLE, ListingStatus.CLAIMED, ListingStatus.COMPLETED))
         ]
+        db.session.add_all(listings)
+        db.session.commit()
+        return [listing.id for listing in listings]
+    
+    def test_update_is_one_statement_of_changed_columns(self, app, client, auth_headers, listing_ids):
+        """Test a field change is a single UPDATE ... RETURNING of that column"""
+        url = f'/api/listings/{listing_ids[0]}'
+        client.get(url, headers=auth_headers)
         
-        # Should not raise any exceptions
-        notification_count = service.notify(listing_data, users_data)
-        assert notification_count >= 0
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = client.put(url, headers=auth_headers, json={"title": "Rye"})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        
+        listing_statements = [statement for statement in statements if 'food_listings' in statement]
+        assert response.status_code == 200
+        assert response.get_json()['listing']['title'] == "Rye"
+        assert response.get_json()['listing']['vendor_name'] == "Test Vendor"
+        assert len(listing_statements) == 1
+        assert listing_statements[0].startswith("UPDATE food_listings SET title=?, updated_at=?")
+        assert "RETURNING" in listing_statements[0]
+    
+    def test_update_checks_version_and_owner(self, app, client, auth_headers, listing_ids):
+        """Test stale versions conflict and other vendors are refused"""
+        url = f'/api/listings/{listing_ids[0]}'
+        version = client.get(url, headers=auth_headers).get_json()['listing']['updated_at']
+        
+        first = client.put(url, headers=auth_headers, json={"title": "Rye", "updated_at": version})
+        stale = client.put(url, headers=auth_headers, json={"title": "Spelt", "updated_at": version})
+        missing = client.put('/api/listings/9999', headers=auth_headers, json={"title": "Spelt"})
+        
+        other = User(email="other@test.com", name="Other Vendor", role=UserRole.VENDOR)
+        other.set_password("password123")
+        db.session.add(other)
+        db.session.commit()
+        other_token = client.post('/api/auth/login', json={
+            "email": "other@test.com", "password": "password123"
+        }).get_json()['access_token']
+        foreign = client.put(url, headers={'Authorization': f'Bearer {other_token}'}, json={"title": "Mine"})
+        
+        assert first.status_code == 200
+        assert first.get_json()['listing']['updated_at'] != version
+        assert stale.status_code == 409
+        assert missing.status_code == 404
+        assert foreign.status_code == 403
+        assert client.get(url, headers=auth_headers).get_json()['listing']['title'] == "Rye"
+    
+    def _pending_claim(self, listing_id):
+        charity = User.query.filter_by(email="charity@test.com").first()
+        claim = Claim(
+            listing_id=listing_id, claimer_id=charity.id, quantity=2,
+            reserved_until=datetime.now(timezone.utc) + timedelta(minutes=30)
+        )
+        db.session.add(claim)
+        db.session.commit()
+        return claim.id
+    
+    def test_update_limits_status_changes(self, app, client, auth_headers, listing_ids):
+        """Test PUT can only cancel, and only listings that are still open"""
+        claimed = client.put(f'/api/listings/{listing_ids[0]}', headers=auth_headers, json={"status": "claimed"})
+        reopened = client.put(f'/api/listings/{listing_ids[1]}', headers=auth_headers, json={"status": "available"})
+        closed = client.put(f'/api/listings/{listing_ids[2]}', headers=auth_headers, json={"status": "cancelled"})
+        
+        assert claimed.status_code == 400
+        assert reopened.status_code == 400
+        assert closed.status_code == 409
+        db.session.expire_all()
+        assert db.session.get(FoodListing, listing_ids[0]).status == ListingStatus.AVAILABLE
+        assert db.session.get(FoodListing, listing_ids[1]).status == ListingStatus.CLAIMED
+        assert db.session.get(FoodListing, listing_ids[2]).status == ListingStatus.COMPLETED
+    
+    @pytest.mark.parametrize('method', ['put', 'delete'])
+    def test_cancel_releases_pending_claims(self, app, client, auth_headers, listing_ids, charity_user, method):
+        """Test cancelling through PUT or DELETE cancels the listing's pending claims"""
+        claim_id = self._pending_claim(listing_ids[0])
+        url = f'/api/listings/{listing_ids[0]}'
+        if method == 'put':
+            response = client.put(url, headers=auth_headers, json={"status": "cancelled"})
+        else:
+            response = client.delete(url, headers=auth_headers)
+        again = client.delete(url, headers=auth_headers)
+        
+        db.session.expire_all()
+        claim = db.session.get(Claim, claim_id)
+        assert response.status_code == 200
+        assert again.status_code == 409
+        assert db.session.get(FoodListing, listing_ids[0]).status == ListingStatus.CANCELLED
+        assert claim.status == ClaimStatus.CANCELLED
+        assert claim.reserved_until is None
+    
+    def test_batch_status_change(self, app, client, auth_headers, listing_ids, charity_user):
+        """Test one request cancels every listing that can be cancelled, with its pending claims"""
+        claim_id = self._pending_claim(listing_ids[0])
+        
+        response = client.post('/api/listings/status', headers=auth_headers, json={
+            "listing_ids": [*listing_ids, 9999], "status": "cancelled"
+        })
+        invalid = client.post('/api/listings/status', headers=auth_headers, json={
+            "listing_ids": listing_ids, "status": "expired"
+        })
+        claimed = client.post('/api/listings/status', headers=auth_headers, json={
+            "listing_ids": listing_ids, "status": "claimed"
+        })
+        empty = client.post('/api/listings/status', headers=auth_headers, json={
+            "listing_ids": [], "status": "cancelled"
+        })
+        
+        body = response.get_json()
+        assert response.status_code == 200
+        assert sorted(listing['id'] for listing in body['listings']) == listing_ids[:2]
+        assert all(listing['status'] == "cancelled" for listing in body['listings'])
+        assert body['skipped'] == [listing_ids[2], 9999]
+        assert db.session.get(FoodListing, listing_ids[2]).status == ListingStatus.COMPLETED
+        db.session.expire_all()
+        cancelled_claim = db.session.get(Claim, claim_id)
+        assert cancelled_claim.status == ClaimStatus.CANCELLED
+        assert cancelled_claim.reserved_until is None
+        assert invalid.status_code == 400
+        assert claimed.status_code == 400
+        assert empty.status_code == 400
+    
+    def test_release_reopens_only_restored_listings(self, app, listing_ids):
+        """Test releasing quantity does not reopen a listing closed with quantity left"""
+        closed, drained_id = listing_ids[1], listing_ids[0]
+        drained = db.session.get(FoodListing, drained_id)
+        drained.status = ListingStatus.CLAIMED
+        drained.remaining_quantity = 0
+        db.session.commit()
+        
+        reservation_engine.release(closed, 1)
+        reservation_engine.release(drained_id, 2)
+        db.session.commit()
+        db.session.expire_all()
+        
+        assert db.session.get(FoodListing, closed).status == ListingStatus.CLAIMED
+        assert db.session.get(FoodListing, closed).remaining_quantity == 6
+        assert db.session.get(FoodListing, drained_id).status == ListingStatus.AVAILABLE
+        assert db.session.get(FoodListing, drained_id).remaining_quantity == 2
+
+
+class TestGeo:
+    """Test bulk distance computations"""
+    
+    def test_backends_agree(self):
+        """Test numpy and pure-Python backends return the same matches"""
+        generator = SyntheticDataGenerator(seed=5)
+        points = [generator.point() for _ in range(2000)]
+        latitudes = [lat for lat, _ in points]
+        longitudes = [lon for _, lon in points]
+        
+        fast = within_radius(40.75, -73.98, 2.0, latitudes, longitudes, backend='numpy')
+        slow = within_radius(40.75, -73.98, 2.0, latitudes, longitudes, backend='python')
+        
+        assert list(fast[0]) == slow[0]
+        assert list(fast[1]) == pytest.approx(slow[1])
+        assert all(haversine_km(40.75, -73.98, latitudes[i], longitudes[i]) <= 2.0 for i in slow[0])
+    
+    def test_bounding_box_contains_circle(self):
+        """Test the prefilter box never cuts off points inside the radius"""
+        min_lat, min_lon, max_lat, max_lon = bounding_box(60.0, 10.0, 50.0)
+        
+        assert haversine_km(60.0, 10.0, max_lat, 10.0) == pytest.approx(50.0, rel=1e-3)
+        assert haversine_km(60.0, 10.0, 60.0, max_lon) >= 50.0
+        assert bounding_box(89.9, 0.0, 50.0)[1:4:2] == (-180.0, 180.0)
+
+    
+    def test_region_cells_cover_circle(self):
+        """Test the cells of a circle include every point within it, across cell edges"""
+        cells = region_cells(40.999, -73.8, 5.0)
+        
+        assert len(cells) == 2
+        assert region_cell(40.999, -73.8) in cells and region_cell(41.03, -73.8) in cells
+        assert region_cells(0.0, 179.9, 20.0) is None
+    
+    def test_search_prunes_by_region_and_rebalance_restores_cells(self, app, vendor_user, charity_user):
+        """Test searches only read overlapping cells and rebalance repairs stale cells"""
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        listing = ListingService.create_listing(vendor.id, {
+            "title": "Edge case", "quantity": 3, "unit": "kg", "food_type": FoodType.PRODUCE,
+            "expiry_time": datetime.now(timezone.utc) + timedelta(hours=2),
+            "pickup_address": "1 Edge St", "latitude": 41.001, "longitude": -74.0
+        })
+        assert listing.region_cell == region_cell(41.001, -74.0)
+        assert [found.id for found in ListingService.search_listings(40.999, -74.0, radius_km=1)] == [listing.id]
+        
+        listing.latitude, listing.longitude = 40.7128, -74.0060
+        db.session.commit()
+        assert listing.region_cell == region_cell(40.7128, -74.0060)
+        
+        # Rows without a cell (created before the column existed) are still found
+        db.session.execute(db.update(FoodListing.__table__).values(region_cell=None))
+        db.session.execute(db.update(User.__table__).values(region_cell=None))
+        db.session.commit()
+        assert len(ListingService.search_listings(40.7128, -74.0060, radius_km=5)) == 1
+        assert [user.email for user in ListingService.find_nearby_users(
+            40.7128, -74.0060, exclude_user_id=vendor.id
+        )] == ["charity@test.com"]
+        
+        # Rows with a stale cell (coordinates edited with raw SQL) are invisible until rebalanced
+        db.session.execute(db.update(FoodListing.__table__).values(region_cell=region_cell(0.0, 0.0)))
+        db.session.commit()
+        assert ListingService.search_listings(40.7128, -74.0060, radius_km=5) == []
+        
+        assert RegionService.rebalance(batch_size=1) == {"users": 2, "food_listings": 1}
+        assert len(ListingService.search_listings(40.7128, -74.0060, radius_km=5)) == 1
+        assert RegionService.load()[0]["listings"] == 1
+
+
+class TestHotSet:
+    """Test search served from the in-memory listing hot set"""
+    
+    @pytest.fixture
+    def hot_app(self):
+        class HotSetConfig(TestingConfig):
+            HOT_SET_ENABLED = True
+            HOT_SET_RECONCILE_SECONDS = 0
+        
+        app = create_app(HotSetConfig)
+        with app.app_context():
+            vendor = User(
+                email="vendor@test.com", name="Test Vendor", role=UserRole.VENDOR,
+                latitude=40.7128, longitude=-74.0060
+            )
+            vendor.set_password("password123")
+            charity = User(
+                email="charity@test.com", name="Test Charity", role=UserRole.CHARITY,
+                latitude=40.7138, longitude=-74.0070, verified=True
+            )
+            charity.set_password("password123")
+            db.session.add_all([vendor, charity])
+            db.session.commit()
+            yield app
+            db.session.remove()
+            db.drop_all()
+    
+    @staticmethod
+    def _create(title, latitude, quantity=5, hours=2):
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        return ListingService.create_listing(vendor.id, {
+            "title": title,
+            "quantity": quantity,
+            "unit": "kg",
+            "food_type": FoodType.BAKERY,
+            "expiry_time": datetime.now(timezone.utc) + timedelta(hours=hours),
+            "pickup_address": "Test Address",
+            "latitude": latitude,
+            "longitude": -74.0060,
+        })
+    
+    def test_search_runs_no_sql(self, hot_app):
+        """Test searches are answered from memory once listings are loaded"""
+        self._create("Nearby bread", 40.7130)
+        self._create("Walkable soup", 40.7400)
+        self._create("Far apples", 40.8500)
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            newest = ListingService.search_listings(40.7128, -74.0060, radius_km=5)
+            ranked = ListingService.search_listings(40.7128, -74.0060, radius_km=20, sort='rank')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        
+        assert statements == []
+        assert [listing.to_dict()['title'] for listing in newest] == ["Walkable soup", "Nearby bread"]
+        assert ranked[0].to_dict()['title'] == "Nearby bread"
+        assert ranked[0].to_dict()['distance_km'] < 0.1
+    
+    def test_changes_reach_the_hot_set(self, hot_app):
+        """Test deleted, claimed-out and expired listings drop out of search"""
+        deleted = self._create("Deleted", 40.7130)
+        claimed = self._create("Claimed", 40.7131, quantity=1)
+        self._create("Expiring", 40.7132, hours=0.5 / 3600)
+        kept = self._create("Kept", 40.7133)
+        charity = User.query.filter_by(email="charity@test.com").first()
+        
+        ListingService.delete_listing(deleted.id, deleted.vendor_id)
+        ClaimService.create_claim(charity.id, claimed.id, quantity=1)
+        time.sleep(0.6)
+        results = ListingService.search_listings(40.7128, -74.0060, radius_km=5)
+        
+        assert [listing.id for listing in results] == [kept.id]
+        assert len(hot_app.extensions['listing_hot_set']) == 1
+
+
+
+class TestReadReplicas:
+    """Test read-only queries routed to a replica, with read-your-writes"""
+    
+    @pytest.fixture
+    def replica_app(self, tmp_path):
+        class ReplicaConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+            SQLALCHEMY_REPLICA_URIS = [f"sqlite:///{tmp_path / 'replica.db'}"]
+            READ_YOUR_WRITES_SECONDS = 30
+        
+        app = create_app(ReplicaConfig)
+        with app.app_context():
+            # An empty replica that has not caught up with anything yet
+            db.metadata.create_all(app.extensions['read_replicas'][0])
+            vendor = User(
+                email="vendor@test.com", name="Test Vendor", role=UserRole.VENDOR,
+                latitude=40.7128, longitude=-74.0060
+            )
+            vendor.set_password("password123")
+            db.session.add(vendor)
+            db.session.commit()
+            yield app
+            db.session.remove()
+            db.drop_all()
+    
+    def test_reads_follow_writes_then_replica(self, replica_app):
+        """Test a writer reads its listing from the primary until the window lapses"""
+        client = replica_app.test_client()
+        response = client.post('/api/auth/login', json={"email": "vendor@test.com", "password": "password123"})
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        
+        created = client.post('/api/listings/', headers=headers, json={
+            "title": "Bagels", "quantity": 6, "unit": "pieces", "food_type": "bakery",
+            "expiry_time": (datetime.now(timezone.utc) + timedelta(hours=3)).isoformat(),
+            "pickup_address": "1 Test St", "latitude": 40.7128, "longitude": -74.0060
+        })
+        listing_id = created.get_json()['listing']['id']
+        
+        assert READ_PRIMARY_COOKIE in created.headers['Set-Cookie']
+        assert client.get(f'/api/listings/{listing_id}', headers=headers).status_code == 200
+        
+        client.delete_cookie(READ_PRIMARY_COOKIE)
+        assert client.get(f'/api/listings/{listing_id}', headers=headers).status_code == 404
+        assert client.get('/api/listings/my-listings', headers=headers).get_json()['count'] == 0
+        # Ownership checks before writes always use the primary
+        assert ListingService.get_listing(listing_id).title == "Bagels"
+
+
+class TestClaims:
+    """Test claim endpoints and contention-safe claiming"""
+    
+    @pytest.fixture
+    def listing_id(self, app, vendor_user):
+        """Create a listing with 40 units available"""
+        with app.app_context():
+            vendor = User.query.filter_by(email="vendor@test.com").first()
+            listing = FoodListing(
+                vendor_id=vendor.id,
+                title="Sourdough Loaves",
+                quantity=40,
+                unit="loaves",
+                food_type=FoodType.BAKERY,
+                expiry_time=datetime.now(timezone.utc) + timedelta(hours=6),
+                pickup_address="123 Test St",
+                latitude=40.7128,
+                longitude=-74.0060
+            )
+            db.session.add(listing)
+            db.session.commit()
+            return listing.id
+    
+    @staticmethod
+    def _headers(client, email):
+        response = client.post('/api/auth/login', json={
+            "email": email,
+            "password": "password123"
+        })
+        return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    
+    def test_partial_claim(self, client, charity_user, listing_id):
+        """Test claiming part of a listing leaves the rest available"""
+        headers = self._headers(client, "charity@test.com")
+        
+        response = client.post('/api/claims/', headers=headers, json={
+            "listing_id": listing_id,
+            "quantity": 15
+        })
+        
+        assert response.status_code == 201
+        assert response.get_json()['claim']['quantity'] == 15
+        
+        listing = client.get(f'/api/listings/{listing_id}', headers=headers).get_json()['listing']
+        assert listing['remaining_quantity'] == 25
+        assert listing['status'] == "available"
+    
+    def test_claim_more_than_remaining(self, client, charity_user, listing_id):
+        """Test over-claiming is rejected without changing the listing"""
+        headers = self._headers(client, "charity@test.com")
+        
+        response = client.post('/api/claims/', headers=headers, json={
+            "listing_id": listing_id,
+            "quantity": 41
+        })
+        
+        assert response.status_code == 409
+    
+    def test_claim_all_then_cancel(self, client, charity_user, listing_id):
+        """Test a full claim marks the listing claimed and cancelling releases it"""
+        headers = self._headers(client, "charity@test.com")
+        
+        response = client.post('/api/claims/', headers=headers, json={"listing_id": listing_id})
+        claim = response.get_json()['claim']
+        assert claim['quantity'] == 40
+        
+        listing = client.get(f'/api/listings/{listing_id}', headers=headers).get_json()['listing']
+        assert listing['status'] == "claimed"
+        
+        response = client.post(f"/api/claims/{claim['id']}/cancel", headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()['claim']['status'] == "cancelled"
+        
+        listing = client.get(f'/api/listings/{listing_id}', headers=headers).get_json()['listing']
+        assert listing['status'] == "available"
+        assert listing['remaining_quantity'] == 40
+    
+    def test_vendor_cannot_claim(self, client, vendor_user, listing_id):
+        """Test vendors are not allowed to claim food"""
+        headers = self._headers(client, "vendor@test.com")
+        
+        response = client.post('/api/claims/', headers=headers, json={"listing_id": listing_id})
+        
+        assert response.status_code == 403
+    
+    def test_expired_reservation_is_released(self, app, charity_user, listing_id):
+        """Test the sweeper returns lapsed reservations to the listing"""
+        with app.app_context():
+            charity = User.query.filter_by(email="charity@test.com").first()
+            claim = ClaimService.create_claim(charity.id, listing_id, quantity=40)
+            assert claim.reserved_until is not None
+            
+            claim.reserved_until = datetime.now(timezone.utc) - timedelta(minutes=1)
+            db.session.commit()
+            
+            assert reservation_engine.release_expired() == 1
+            
+            listing = FoodListing.query.get(listing_id)
+            assert listing.remaining_quantity == 40
+            assert listing.status == ListingStatus.AVAILABLE
+            assert Claim.query.get(claim.id).status.value == "cancelled"
+    
+    def test_claim_reclaims_abandoned_reservation(self, app, charity_user, listing_id):
+        """Test a new claim sweeps lapsed reservations holding the quantity"""
+        with app.app_context():
+            charity = User.query.filter_by(email="charity@test.com").first()
+            abandoned = ClaimService.create_claim(charity.id, listing_id)
+            abandoned.reserved_until = datetime.now(timezone.utc) - timedelta(minutes=1)
+            db.session.commit()
+            
+            claim = ClaimService.create_claim(charity.id, listing_id, quantity=10)
+            
+            assert claim.quantity == 10
+            assert FoodListing.query.get(listing_id).remaining_quantity == 30
+    
+    def test_confirmed_claim_does_not_expire(self, client, vendor_user, charity_user, listing_id):
+        """Test vendor confirmation clears the reservation TTL"""
+        charity_headers = self._headers(client, "charity@test.com")
+        vendor_headers = self._headers(client, "vendor@test.com")
+        
+        claim = client.post('/api/claims/', headers=charity_headers, json={
+            "listing_id": listing_id,
+            "quantity": 5
+        }).get_json()['claim']
+        
+        response = client.post(f"/api/claims/{claim['id']}/confirm", headers=vendor_headers)
+        
+        assert response.status_code == 200
+        assert response.get_json()['claim']['status'] == "confirmed"
+        assert response.get_json()['claim']['reserved_until'] is None
+    
+    def test_parallel_claimers_never_over_allocate(self, tmp_path):
+        """Stress test: 100 parallel claimers compete for 40 units"""
+        class StressConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'claims.db'}"
+        
+        app = create_app(StressConfig)
+        
+        with app.app_context():
+            vendor = User(email="v@test.com", name="Vendor", role=UserRole.VENDOR, password_hash="x")
+            claimers = [
+                User(email=f"c{i}@test.com", name=f"Claimer {i}", role=UserRole.CHARITY, password_hash="x")
+                for i in range(100)
+            ]
+            db.session.add_all([vendor] + claimers)
+            db.session.flush()
+            listing = FoodListing(
+                vendor_id=vendor.id,
+                title="Bread",
+                quantity=40,
+                unit="loaves",
+                food_type=FoodType.BAKERY,
+                expiry_time=datetime.now(timezone.utc) + timedelta(hours=1),
+                pickup_address="1 Main St",
+                latitude=40.0,
+                longitude=-74.0
+            )
+            db.session.add(listing)
+            db.session.commit()
+            listing_id = listing.id
+            claimer_ids = [claimer.id for claimer in claimers]
+        
+        def claim(claimer_id):
+            with app.app_context():
+                try:
+                    ClaimService.create_claim(claimer_id, listing_id, quantity=1)
+                    return True
+                except ClaimError:
+                    return False
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=100) as pool:
+            results = list(pool.map(claim, claimer_ids))
+        elapsed = time.perf_counter() - started
+        
+        with app.app_context():
+            listing = FoodListing.query.get(listing_id)
+            claimed = sum(c.quantity for c in Claim.query.filter_by(listing_id=listing_id))
+            
+            assert sum(results) == 40
+            assert claimed == 40
+            assert listing.remaining_quantity == 0
+            assert listing.status == ListingStatus.CLAIMED
+            db.session.remove()
+            db.engine.dispose()
+        
+        print(f"{len(results) / elapsed:.0f} claim attempts/s under 100 parallel claimers")
+
+
+class TestRatings:
+    """Test rating submission and aggregate maintenance"""
+    
+    @pytest.fixture
+    def collected_listing(self, app, vendor_user, charity_user):
+        """A listing whose claim by the charity the vendor has confirmed"""
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        charity = User.query.filter_by(email="charity@test.com").first()
+        listing = FoodListing(
+            vendor_id=vendor.id,
+            title="Bagels",
+            quantity=10,
+            unit="pieces",
+            food_type=FoodType.BAKERY,
+            expiry_time=datetime.now(timezone.utc) + timedelta(hours=4),
+            pickup_address="1 Test St",
+            latitude=40.7128,
+            longitude=-74.0060
+        )
+        db.session.add(listing)
+        db.session.commit()
+        claim = ClaimService.create_claim(charity.id, listing.id, quantity=2)
+        ClaimService.transition_claim(claim.id, ClaimStatus.CONFIRMED)
+        return listing.id, vendor.id, charity.id
+    
+    @staticmethod
+    def _headers(client, email):
+        response = client.post('/api/auth/login', json={"email": email, "password": "password123"})
+        return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    
+    def test_rating_updates_aggregates(self, client, collected_listing):
+        """Test counterparties can rate each other once and aggregates update in place"""
+        listing_id, vendor_id, charity_id = collected_listing
+        charity_headers = self._headers(client, "charity@test.com")
+        vendor_headers = self._headers(client, "vendor@test.com")
+        
+        rated = client.post(f'/api/users/{vendor_id}/ratings', headers=charity_headers, json={
+            "listing_id": listing_id, "score": 4, "comment": "Great bagels"
+        })
+        duplicate = client.post(f'/api/users/{vendor_id}/ratings', headers=charity_headers, json={
+            "listing_id": listing_id, "score": 1
+        })
+        back = client.post(f'/api/users/{charity_id}/ratings', headers=vendor_headers, json={
+            "listing_id": listing_id, "score": 5
+        })
+        invalid = client.post(f'/api/users/{charity_id}/ratings', headers=vendor_headers, json={
+            "listing_id": listing_id, "score": 6
+        })
+        summary = client.get(f'/api/users/{vendor_id}/ratings', headers=charity_headers).get_json()
+        
+        assert rated.status_code == 201
+        assert rated.get_json()['user_rating'] == 4.0
+        assert rated.get_json()['user_rating_count'] == 1
+        assert duplicate.status_code == 409
+        assert back.status_code == 201
+        assert invalid.status_code == 400
+        assert summary['rating'] == 4.0
+        assert summary['rating_count'] == 1
+        assert summary['ratings'][0]['comment'] == "Great bagels"
+    
+    def test_only_counterparties_can_rate(self, client, collected_listing):
+        """Test a user without a collected claim cannot rate the vendor"""
+        listing_id, vendor_id, _ = collected_listing
+        client.post('/api/auth/register', json={
+            "email": "bystander@test.com",
+            "password": "password123",
+            "name": "Bystander",
+            "role": "individual",
+            "latitude": 40.7,
+            "longitude": -74.0
+        })
+        
+        response = client.post(
+            f'/api/users/{vendor_id}/ratings',
+            headers=self._headers(client, "bystander@test.com"),
+            json={"listing_id": listing_id, "score": 1}
+        )
+        
+        assert response.status_code == 403
+    
+    def test_reconcile_repairs_drift(self, collected_listing):
+        """Test reconciliation recomputes aggregates from rating rows"""
+        listing_id, vendor_id, charity_id = collected_listing
+        RatingService.submit_rating(charity_id, vendor_id, listing_id, 3)
+        db.session.execute(
+            db.update(User).where(User.id == vendor_id).values(rating=1.0, rating_count=7)
+        )
+        db.session.execute(
+            db.update(User).where(User.id == charity_id).values(rating=2.5, rating_count=2)
+        )
+        db.session.commit()
+        
+        corrected = RatingService.reconcile_ratings(batch_size=1)
+        vendor = db.session.get(User, vendor_id)
+        charity = db.session.get(User, charity_id)
+        
+        assert corrected == 2
+        assert (vendor.rating, vendor.rating_count) == (3.0, 1)
+        assert (charity.rating, charity.rating_count) == (0.0, 0)
+        assert RatingService.reconcile_ratings() == 0
+
+
+class TestImpact:
+    """Test impact rollups and dashboard endpoints"""
+    
+    @pytest.fixture
+    def collected(self, app, vendor_user, charity_user):
+        """Two claims on a 10 kg produce listing, both picked up"""
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        charity = User.query.filter_by(email="charity@test.com").first()
+        listing = FoodListing(
+            vendor_id=vendor.id,
+            title="Apples",
+            quantity=10,
+            unit="kg",
+            food_type=FoodType.PRODUCE,
+            expiry_time=datetime.now(timezone.utc) + timedelta(hours=4),
+            pickup_address="1 Test St",
+            latitude=40.7128,
+            longitude=-74.0060
+        )
+        db.session.add(listing)
+        db.session.commit()
+        for quantity in (2, 3):
+            claim = ClaimService.create_claim(charity.id, listing.id, quantity=quantity)
+            ClaimService.transition_claim(claim.id, ClaimStatus.PICKED_UP)
+        return vendor.id
+    
+    def test_pickups_roll_up(self, client, collected):
+        """Test collected claims are added to every dimension as they are picked up"""
+        response = client.post('/api/auth/login', json={
+            "email": "charity@test.com", "password": "password123"
+        })
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        
+        summary = client.get('/api/impact/summary', headers=headers).get_json()
+        vendor = client.get(f'/api/impact/vendors/{collected}', headers=headers).get_json()
+        by_type = client.get('/api/impact/breakdown?by=food_type', headers=headers).get_json()
+        invalid = client.get('/api/impact/breakdown?by=planet', headers=headers)
+        
+        assert summary['totals'] == {"pickups": 2, "food_kg": 5.0, "meals": 11.9, "co2e_kg": 12.5}
+        assert len(summary['days']) == 1
+        assert vendor['totals']['food_kg'] == 5.0
+        assert by_type['buckets'] == [{"key": "produce", **summary['totals']}]
+        assert invalid.status_code == 400
+        assert ImpactRollup.query.count() == 4
+    
+    def test_backfill_rebuilds_rollups(self, collected):
+        """Test the backfill reproduces the live rollups and can be re-run"""
+        start, end = ImpactService.default_range()
+        live = ImpactService.summary(start, end)
+        
+        assert ImpactService.backfill(batch_size=1) == 2
+        assert ImpactService.backfill() == 2
+        assert ImpactService.summary(start, end) == live
+    
+    def test_interrupted_backfill_keeps_rollups(self, collected, monkeypatch):
+        """Test a backfill failing partway leaves every day range old or rebuilt, never empty"""
+        claim = Claim.query.order_by(Claim.id).first()
+        old_day = datetime.now(timezone.utc) - timedelta(days=20)
+        claim.picked_up_at = old_day
+        db.session.commit()
+        ImpactService.backfill()
+        start, end = ImpactService.default_range()
+        before = ImpactService.summary(start, end)
+        
+        rebuild = ImpactService._rebuild_days
+        calls = []
+        
+        def failing(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            return rebuild(*args)
+        
+        monkeypatch.setattr(ImpactService, '_rebuild_days', staticmethod(failing))
+        with pytest.raises(RuntimeError):
+            ImpactService.backfill()
+        
+        assert ImpactService.summary(start, end) == before
+        assert before['totals']['pickups'] == 2
+        assert [day['day'] for day in before['days']][0] == old_day.date().isoformat()
+
+
+class TestExports:
+    """Test streaming listing and claim exports"""
+    
+    @pytest.fixture
+    def history(self, app, vendor_user, charity_user):
+        """Five listings, one of them claimed by the charity"""
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        charity = User.query.filter_by(email="charity@test.com").first()
+        ids = []
+        for i in range(5):
+            listing = FoodListing(
+                vendor_id=vendor.id,
+                title=f"Batch, {i}",
+                quantity=4,
+                unit="kg",
+                food_type=FoodType.DAIRY,
+                expiry_time=datetime.now(timezone.utc) + timedelta(hours=4),
+                pickup_address="1 Test St",
+                latitude=40.7128,
+                longitude=-74.0060
+            )
+            db.session.add(listing)
+            db.session.commit()
+            ids.append(listing.id)
+        ClaimService.create_claim(charity.id, ids[0], quantity=1)
+        return ids
+    
+    @staticmethod
+    def _headers(client, email):
+        response = client.post('/api/auth/login', json={"email": email, "password": "password123"})
+        return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    
+    def test_export_streams_in_chunks(self, client, history, monkeypatch):
+        """Test CSV and gzipped NDJSON exports cover every row across chunks"""
+        monkeypatch.setattr(ExportService, 'CHUNK_ROWS', 2)
+        monkeypatch.setattr(ExportService, 'YIELD_PER', 2)
+        headers = self._headers(client, "vendor@test.com")
+        
+        # Streamed bodies are read before the next request is made
+        listings_csv = client.get('/api/exports/listings', headers=headers)
+        rows = list(csv.DictReader(io.StringIO(listings_csv.get_data(as_text=True))))
+        claims = client.get('/api/exports/claims?format=ndjson&gzip=true', headers=headers)
+        claim_rows = [
+            json.loads(line) for line in gzip.decompress(claims.get_data()).decode().splitlines()
+        ]
+        
+        assert listings_csv.status_code == 200
+        assert listings_csv.headers['Content-Disposition'] == 'attachment; filename="listings.csv"'
+        assert [int(row['id']) for row in rows] == history
+        assert rows[1]['title'] == "Batch, 1"
+        assert rows[0]['food_type'] == "dairy"
+        assert claims.mimetype == 'application/gzip'
+        assert [(row['listing_id'], row['claimer_name'], row['status']) for row in claim_rows] == [
+            (history[0], "Test Charity", "pending")
+        ]
+    
+    def test_export_requires_vendor_or_admin(self, client, history):
+        """Test claimers cannot export and bad formats are rejected"""
+        charity = self._headers(client, "charity@test.com")
+        vendor = self._headers(client, "vendor@test.com")
+        
+        assert client.get('/api/exports/listings', headers=charity).status_code == 403
+        assert client.get('/api/exports/listings?format=xml', headers=vendor).status_code == 400
+        assert client.get('/api/exports/ratings', headers=vendor).status_code == 400
+
+
+
+class TestImports:
+    """Test bulk listing import"""
+    
+    @staticmethod
+    def _expiry(hours=6):
+        return (datetime.now(timezone.utc) + timedelta(hours=hours)).isoformat()
+    
+    def test_csv_import_in_batches(self, client, vendor_user, charity_user, monkeypatch):
+        """Test valid rows are inserted in batches, bad rows reported and batches notified once"""
+        digests = []
+        monkeypatch.setattr(
+            notification_service, 'notify',
+            lambda listing_data, users: digests.append((listing_data, users))
+        )
+        response = client.post('/api/auth/login', json={"email": "vendor@test.com", "password": "password123"})
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        
+        lines = ["title,quantity,unit,food_type,expiry_time,pickup_address,latitude,longitude"]
+        for i, (food_type, quantity) in enumerate([
+            ("bakery", "5"), ("pastry", "5"), ("dairy", "2"), ("produce", "-1"), ("bakery", "3")
+        ]):
+            lines.append(f"Item {i},{quantity},kg,{food_type},{self._expiry()},1 Test St,40.7128,-74.0060")
+        upload = (io.BytesIO("\n".join(lines).encode()), 'listings.csv')
+        
+        response = client.post(
+            '/api/listings/import?batch_size=2', headers=headers,
+            data={'file': upload}, content_type='multipart/form-data'
+        )
+        
+        assert response.status_code == 200
+        result = response.get_json()
+        assert (result['imported'], result['failed'], result['batches']) == (3, 2, 2)
+        assert result['errors'] == [
+            {"line": 3, "error": "Invalid food_type"},
+            {"line": 5, "error": "quantity must be positive"},
+        ]
+        titles = [listing.title for listing in FoodListing.query.order_by(FoodListing.id)]
+        assert titles == ["Item 0", "Item 2", "Item 4"]
+        assert [digest['title'] for digest, _ in digests] == ["2 new listings from Test Vendor", "Item 4"]
+        assert [user['email'] for user in digests[0][1]] == ["charity@test.com"]
+    
+    def test_ndjson_import_reports_bad_lines(self, app, vendor_user):
+        """Test NDJSON lines are parsed one by one and vendors alone may import"""
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        row = {
+            "title": "Soup", "quantity": 4, "unit": "servings", "food_type": "prepared_food",
+            "expiry_time": self._expiry(), "pickup_address": "1 Test St",
+            "latitude": 40.7128, "longitude": -74.0060
+        }
+        stale = dict(row, expiry_time=self._expiry(-1))
+        text = "\n".join([json.dumps(row), "{not json", "", json.dumps(stale), "[1, 2]", json.dumps(row)])
+        
+        result = ImportService.import_listings(vendor.id, io.StringIO(text), 'ndjson')
+        
+        assert (result.imported, result.batches) == (2, 1)
+        assert [(error['line'], error['error']) for error in result.errors] == [
+            (2, "Invalid JSON"),
+            (4, "expiry_time must be in the future"),
+            (5, "Each line must be a JSON object"),
+        ]
+        assert FoodListing.query.filter_by(vendor_id=vendor.id, title="Soup").count() == 2
+
+
+
+class TestArchive:
+    """Test archival of old terminal listings"""
+    
+    def test_archive_moves_old_terminal_listings(self, client, vendor_user, charity_user):
+        """Test old terminal listings move with their claims and stay in vendor history"""
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        charity = User.query.filter_by(email="charity@test.com").first()
+        listings = [
+            ListingService.create_listing(vendor.id, {
+                "title": title, "quantity": 4, "unit": "kg", "food_type": FoodType.PRODUCE,
+                "expiry_time": datetime.now(timezone.utc) + timedelta(hours=2),
+                "pickup_address": "1 Test St", "latitude": 40.7128, "longitude": -74.0060
+            })
+            for title in ("Old apples", "Recent pears", "Fresh plums")
+        ]
+        old, recent, fresh = [listing.id for listing in listings]
+        ClaimService.create_claim(charity.id, old, quantity=1)
+        db.session.execute(
+            db.update(FoodListing.__table__)
+            .where(FoodListing.id.in_([old, recent]))
+            .values(status=ListingStatus.COMPLETED.name, updated_at=datetime.now(timezone.utc) - timedelta(days=40))
+        )
+        db.session.execute(
+            db.update(FoodListing.__table__).where(FoodListing.id == recent)
+            .values(updated_at=datetime.now(timezone.utc) - timedelta(days=10))
+        )
+        db.session.commit()
+        
+        assert ArchiveService.archive_listings(older_than_days=30, batch_size=1) == 1
+        assert db.session.get(FoodListing, old) is None
+        assert Claim.query.count() == 0
+        assert [claim.listing_id for claim in ArchivedClaim.query] == [old]
+        
+        response = client.post('/api/auth/login', json={"email": "vendor@test.com", "password": "password123"})
+        headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        live = client.get('/api/listings/my-listings', headers=headers).get_json()
+        history = client.get('/api/listings/my-listings?include_archived=true', headers=headers).get_json()
+        completed = client.get(
+            '/api/listings/my-listings?include_archived=true&status=completed', headers=headers
+        ).get_json()
+        
+        assert sorted(listing['id'] for listing in live['listings']) == [recent, fresh]
+        assert [listing['id'] for listing in history['listings']] == [fresh, recent, old]
+        assert [(listing['id'], listing['status']) for listing in completed['listings']] == [
+            (recent, 'completed'), (old, 'completed')
+        ]
+
+    
+    def test_archived_history_exported_and_backfilled(self, vendor_user, charity_user):
+        """Test exports and the impact backfill still see archived listings and claims"""
+        vendor = User.query.filter_by(email="vendor@test.com").first()
+        charity = User.query.filter_by(email="charity@test.com").first()
+        listing = ListingService.create_listing(vendor.id, {
+            "title": "Old apples", "quantity": 4, "unit": "kg", "food_type": FoodType.PRODUCE,
+            "expiry_time": datetime.now(timezone.utc) + timedelta(hours=2),
+            "pickup_address": "1 Test St", "latitude": 40.7128, "longitude": -74.0060
+        })
+        claim = ClaimService.create_claim(charity.id, listing.id, quantity=2)
+        ClaimService.transition_claim(claim.id, ClaimStatus.CONFIRMED)
+        ClaimService.transition_claim(claim.id, ClaimStatus.PICKED_UP)
+        listing_id, claim_id, vendor_id = listing.id, claim.id, vendor.id
+        db.session.execute(
+            db.update(FoodListing.__table__).where(FoodListing.id == listing_id)
+            .values(status=ListingStatus.COMPLETED.name, updated_at=datetime.now(timezone.utc) - timedelta(days=40))
+        )
+        db.session.commit()
+        
+        assert ArchiveService.archive_listings(older_than_days=30) == 1
+        listings = list(ExportService.iter_rows('listings', vendor_id=vendor_id))
+        claims = list(ExportService.iter_rows('claims', vendor_id=vendor_id))
+        
+        assert [(row['id'], row['status']) for row in listings] == [(listing_id, 'completed')]
+        assert [(row['id'], row['listing_title'], row['status']) for row in claims] == [
+            (claim_id, "Old apples", 'picked_up')
+        ]
+        assert ImpactService.backfill() == 1
+        totals = ImpactService.summary(*ImpactService.default_range())['totals']
+        assert (totals['pickups'], totals['food_kg']) == (1, 2.0)
+
+
+class TestRealtimeFeed:
+    """Test real-time listing feed routing and SSE server"""
+    
+    def test_events_routed_by_location(self):
+        """Test only subscribers whose radius covers the listing receive it"""
+        async def scenario():
+            broker = LocalBroker()
+            near = broker.subscribe(40.7138, -74.0070, radius_km=2)
+            far = broker.subscribe(40.7580, -73.9855, radius_km=2)
+            
+            delivered = broker.publish({
+                "type": LISTING_CREATED,
+                "listing": {"id": 1, "latitude": 40.7128, "longitude": -74.0060}
+            })
+            
+            assert delivered == 1
+            assert (await near.get(timeout=1))['listing']['id'] == 1
+            assert await far.get(timeout=0.05) is None
+            
+            broker.unsubscribe(near)
+            assert broker.subscriber_count() == 1
+        
+        asyncio.run(scenario())
+    
+    def test_polar_subscription_registers_bounded_cells(self):
+        """Test a circle spanning every longitude is matched without a cell per degree step"""
+        async def scenario():
+            index = SubscriptionIndex()
+            polar = Subscription(89.9, 10.0, radius_km=25)
+            index.add(polar)
+            
+            assert len(index._subscription_cells[polar.id]) <= MAX_CELLS_PER_SUBSCRIPTION
+            assert index.match(89.95, -170.0) == [polar]
+            assert index.match(10.0, 10.0) == []
+            
+            index.remove(polar)
+            assert index.match(89.95, -170.0) == []
+        
+        asyncio.run(scenario())
+    
+    @pytest.fixture
+    def feed_token(self, app, charity_user):
+        user = User.query.filter_by(email="charity@test.com").first()
+        return create_access_token(identity=str(user.id), additional_claims=token_claims(user))
+    
+    @staticmethod
+    async def open_stream(server, query, token):
+        """Send a feed request and return the reader, writer and status line"""
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(f"GET /stream?{query} HTTP/1.1\r\nAuthorization: Bearer {token}\r\n\r\n".encode())
+        await writer.drain()
+        return reader, writer, await reader.readline()
+    
+    def test_sse_stream_delivers_events(self, app, feed_token):
+        """Test the async feed server streams matching events as SSE"""
+        async def scenario():
+            broker = LocalBroker()
+            server = FeedServer(app, broker=broker, host="127.0.0.1", port=0)
+            await server.start()
+            
+            reader, writer, status = await self.open_stream(
+                server, "latitude=40.7128&longitude=-74.0060&radius_km=5", feed_token
+            )
+            assert b"200 OK" in status
+            while (await reader.readline()) != b"\r\n":
+                pass
+            
+            broker.publish({
+                "type": LISTING_CREATED,
+                "listing": {"id": 7, "latitude": 40.7130, "longitude": -74.0065}
+            })
+            
+            assert await reader.readline() == b"id: 1\n"
+            assert await reader.readline() == b"event: listing.created\n"
+            data = (await reader.readline()).decode()
+            assert json.loads(data[len("data: "):])['id'] == 7
+            
+            writer.close()
+            server._server.close()
+        
+        asyncio.run(scenario())
+    
+    def test_sse_stream_requires_token(self, app):
+        """Test the feed server rejects unauthenticated clients"""
+        async def scenario():
+            server = FeedServer(app, broker=LocalBroker(), host="127.0.0.1", port=0)
+            await server.start()
+            
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GET /stream?latitude=1&longitude=2 HTTP/1.1\r\n\r\n")
+            await writer.drain()
+            
+            assert b"401" in await reader.readline()
+            
+            writer.close()
+            server._server.close()
+        
+        asyncio.run(scenario())
+    
+    def test_sse_stream_checks_revocation(self, app, feed_token):
+        """Test the feed server refuses tokens of deactivated users"""
+        user = User.query.filter_by(email="charity@test.com").first()
+        user.is_active = False
+        db.session.commit()
+        
+        async def scenario():
+            server = FeedServer(app, broker=LocalBroker(), host="127.0.0.1", port=0)
+            await server.start()
+            
+            _, writer, status = await self.open_stream(server, "latitude=1&longitude=2", feed_token)
+            assert b"401" in status
+            
+            writer.close()
+            server._server.close()
+        
+        asyncio.run(scenario())
+    
+    @pytest.mark.parametrize('query', [
+        'latitude=1&longitude=2&radius_km=0',
+        'latitude=1&longitude=2&radius_km=-3',
+        'latitude=1&longitude=2&radius_km=nan',
+        'latitude=1&longitude=2&radius_km=inf',
+        'latitude=nan&longitude=2',
+        'latitude=1&longitude=inf',
+        'latitude=91&longitude=2',
+        'latitude=1&longitude=-181',
+    ])
+    def test_sse_stream_rejects_bad_area(self, app, feed_token, query):
+        """Test the feed server answers 400 to coordinates and radii outside their ranges"""
+        async def scenario():
+            broker = LocalBroker()
+            server = FeedServer(app, broker=broker, host="127.0.0.1", port=0)
+            await server.start()
+            
+            _, writer, status = await self.open_stream(server, query, feed_token)
+            assert b"400" in status
+            assert broker.subscriber_count() == 0
+            
+            writer.close()
+            server._server.close()
+        
+        asyncio.run(scenario())
+    
+    def test_sse_stream_closed_when_user_deactivated(self, app, feed_token):
+        """Test an open stream ends once its user is deactivated"""
+        async def scenario():
+            server = FeedServer(app, broker=LocalBroker(), host="127.0.0.1", port=0)
+            server.HEARTBEAT_SECONDS = 0.05
+            await server.start()
+            
+            reader, writer, status = await self.open_stream(server, "latitude=1&longitude=2", feed_token)
+            assert b"200 OK" in status
+            while (await reader.readline()) != b"\r\n":
+                pass
+            assert await reader.readline() == b": keep-alive\n"
+            
+            user = User.query.filter_by(email="charity@test.com").first()
+            user.is_active = False
+            db.session.commit()
+            
+            await asyncio.wait_for(reader.read(), timeout=2)
+            assert reader.at_eof()
+            
+            writer.close()
+            server._server.close()
+        
+        asyncio.run(scenario())
+
+
+class TestAsyncApi:
+    """Test the asyncio server over the async listing service"""
+    
+    @pytest.fixture
+    def async_app(self, tmp_path):
+        pytest.importorskip("aiosqlite")
+        
+        class AsyncConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'async.db'}"
+        
+        app = create_app(AsyncConfig)
+        with app.app_context():
+            db.create_all()
+            for email, role in (("vendor@test.com", UserRole.VENDOR), ("charity@test.com", UserRole.CHARITY)):
+                user = User(
+                    email=email, name=email.split('@')[0], role=role, password_hash="x",
+                    latitude=40.7128, longitude=-74.0060, verified=True
+                )
+                db.session.add(user)
+            db.session.commit()
+            yield app
+            db.session.remove()
+            db.drop_all()
+    
+    @staticmethod
+    async def _request(reader, writer, method, path, token, body=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: test\r\nAuthorization: Bearer {token}\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(':')
+            headers[name.lower()] = value.strip()
+        return status, json.loads(await reader.readexactly(int(headers['content-length'])))
+    
+    def test_create_search_get_and_claim(self, async_app):
+        """Test the four endpoints on one keep-alive connection per user"""
+        with async_app.app_context():
+            vendor = User.query.filter_by(email="vendor@test.com").first()
+            charity = User.query.filter_by(email="charity@test.com").first()
+            vendor_token = create_access_token(str(vendor.id), additional_claims=token_claims(vendor))
+            charity_token = create_access_token(str(charity.id), additional_claims=token_claims(charity))
+        
+        async def scenario():
+            server = AsyncApiServer(async_app, host="127.0.0.1", port=0)
+            await server.start()
+            vendor_conn = await asyncio.open_connection("127.0.0.1", server.port)
+            charity_conn = await asyncio.open_connection("127.0.0.1", server.port)
+            
+            status, body = await self._request(*vendor_conn, "POST", "/api/listings/", vendor_token, {
+                "title": "Soup", "quantity": 5, "unit": "liters", "food_type": "prepared_food",
+                "expiry_time": (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat(),
+                "pickup_address": "1 Test St", "latitude": 40.7130, "longitude": -74.0062
+            })
+            assert status == 201, body
+            listing_id = body['listing']['id']
+            assert body['listing']['vendor_name'] == "vendor"
+            
+            status, body = await self._request(*vendor_conn, "POST", "/api/listings/", vendor_token, {"title": "x"})
+            assert status == 400
+            assert "Missing required field" in body['error']
+            
+            status, body = await self._request(
+                *charity_conn, "GET", "/api/listings/search?latitude=40.7128&longitude=-74.0060&sort=rank",
+                charity_token
+            )
+            assert status == 200
+            assert [listing['id'] for listing in body['listings']] == [listing_id]
+            assert 'distance_km' in body['listings'][0]
+            
+            status, body = await self._request(*charity_conn, "GET", f"/api/listings/{listing_id}", charity_token)
+            assert (status, body['listing']['title']) == (200, "Soup")
+            
+            status, body = await self._request(
+                *charity_conn, "POST", "/api/claims/", charity_token, {"listing_id": listing_id, "quantity": 2}
+            )
+            assert status == 201
+            assert (body['claim']['quantity'], body['claim']['status']) == (2, "pending")
+            
+            status, body = await self._request(
+                *charity_conn, "POST", "/api/claims/", charity_token, {"listing_id": listing_id, "quantity": 10}
+            )
+            assert status == 409
+            
+            status, _ = await self._request(
+                *vendor_conn, "POST", "/api/claims/", vendor_token, {"listing_id": listing_id}
+            )
+            assert status == 403
+            
+            status, _ = await self._request(*charity_conn, "GET", "/api/listings/999", "not-a-token")
+            assert status == 401
+            
+            for _, writer in (vendor_conn, charity_conn):
+                writer.close()
+            server._server.close()
+            await server.service.dispose()
+        
+        asyncio.run(scenario())
+        
+        with async_app.app_context():
+            listing = db.session.get(FoodListing, 1)
+            assert listing.remaining_quantity == 3
+            assert Claim.query.count() == 1
+    
+    def test_chunked_body_is_refused(self, async_app):
+        """Test a chunked request gets 411 instead of its body being parsed as a request"""
+        async def scenario():
+            server = AsyncApiServer(async_app, host="127.0.0.1", port=0)
+            await server.start()
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            
+            writer.write(
+                b"POST /api/listings/ HTTP/1.1\r\nHost: test\r\nTransfer-Encoding: chunked\r\n\r\n"
+                b"2\r\n{}\r\n0\r\n\r\n"
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+            while (await reader.readline()) != b"\r\n":
+                pass
+            body = await reader.read()
+            
+            assert status_line.startswith(b"HTTP/1.1 411")
+            assert b"Content-Length" in body
+            
+            writer.close()
+            server._server.close()
+            await server.service.dispose()
+        
+        asyncio.run(scenario())
+
+
+class TestRanking:
+    """Test ranked search scoring"""
+    
+    def test_close_expiring_listing_outranks_far_fresh_one(self):
+        """Test a nearby listing about to expire beats a distant long-lived one"""
+        close_urgent = score_listing(0.2, minutes_to_expiry=20, quantity=5, radius_km=5)
+        far_fresh = score_listing(4.9, minutes_to_expiry=600, quantity=5, radius_km=5)
+        
+        assert close_urgent > far_fresh
+    
+    def test_rank_listings_sets_distance(self):
+        """Test ranked listings are ordered best first and expose distance_km"""
+        now = datetime.now(timezone.utc)
+        
+        def listing(listing_id, minutes):
+            return FoodListing(
+                id=listing_id,
+                vendor_id=1,
+                title=f"Listing {listing_id}",
+                quantity=5,
+                remaining_quantity=5,
+                unit="kg",
+                food_type=FoodType.BAKERY,
+                expiry_time=now + timedelta(minutes=minutes),
+                pickup_address="123 Test St",
+                latitude=40.7128,
+                longitude=-74.0060
+            )
+        
+        far = listing(1, 600)
+        near = listing(2, 20)
+        
+        ranked = rank_listings([(far, 4.9), (near, 0.2)], radius_km=5, now=now)
+        
+        assert [item.id for item in ranked] == [2, 1]
+        assert ranked[0].distance_km == 0.2
+
+
+class TestObserverPattern:
+    """Test Observer pattern implementation"""
+    
+    def test_notification_service_attach(self):
+        """Test attaching observers"""
+        service = NotificationService()
+        observer = EmailNotifier()
+        
+        initial_count = service.get_observer_count()
+        service.attach(observer)
+        
+        assert service.get_observer_count() == initial_count + 1
+    
+    def test_notification_service_detach(self):
+        """Test detaching observers"""
+        service = NotificationService()
+        observer = EmailNotifier()
+        
+        service.attach(observer)
+        initial_count = service.get_observer_count()
+        service.detach(observer)
+        
+        assert service.get_observer_count() == initial_count - 1
+    
+    def test_notification_service_notify(self):
+        """Test notifying observers"""
+        service = NotificationService()
+        service.attach(EmailNotifier())
+        
+        listing_data = {
+            'id': 1,
+            'vendor_id': 1,
+            'title': 'Test Food',
+            'quantity': 10,
+            'unit': 'kg',
+            'pickup_address': 'Test Address',
+            'expiry_time': datetime.now(timezone.utc).isoformat()
+        }
+        
+        users_data = [
+            {
+                'id': 2,
+                'name': 'Test User',
+                'email': 'test@example.com',
+                'phone': '+1234567890'
+            }
+        ]
+        
+        # Should not raise any exceptions
+        notification_count = service.notify(listing_data, users_data)
+        assert notification_count >= 0
+    
+    def test_token_bucket_refills(self):
+        """Test token bucket limits bursts and refills over time"""
+        now = [0.0]
+        bucket = TokenBucket(rate=1, capacity=2, clock=lambda: now[0])
+        
+        assert bucket.try_acquire()
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+        
+        now[0] += 1.0
+        assert bucket.try_acquire()
+    
+    def test_rate_limited_channel_queues_excess(self):
+        """Test sends beyond the channel limit are queued, not lost"""
+        service = NotificationService()
+        service.attach(SMSNotifier())
+        service.set_rate_limit('sms', rate=0.001, burst=2)
+        
+        listing_data = {
+            'id': 1,
+            'vendor_id': 1,
+            'title': 'Test Food',
+            'quantity': 10,
+            'unit': 'kg',
+            'pickup_address': 'Test Address',
+            'expiry_time': (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+        }
+        users_data = [
+            {'id': i, 'email': f'user{i}@example.com', 'phone': '+1234567890', 'role': 'individual'}
+            for i in range(2, 7)
+        ]
+        
+        assert service.notify(listing_data, users_data) == 2
+        assert service.pending_count() == 3
+    
+    def test_refilled_recipient_buckets_are_evicted(self):
+        """Test per-recipient buckets do not accumulate once they refill"""
+        service = NotificationService()
+        service.attach(SMSNotifier())
+        service.set_rate_limit('sms', rate=1000, per_recipient_rate=1000, per_recipient_burst=1)
+        service.BUCKET_SWEEP_SECONDS = 0
+        
+        listing_data = {
+            'id': 1,
+            'vendor_id': 1,
+            'title': 'Test Food',
+            'quantity': 10,
+            'unit': 'kg',
+            'pickup_address': 'Test Address',
+            'expiry_time': (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+        }
+        users_data = [
+            {'id': i, 'email': f'user{i}@example.com', 'phone': '+1234567890', 'role': 'individual'}
+            for i in range(2, 50)
+        ]
+        
+        assert service.notify(listing_data, users_data) == len(users_data)
+        time.sleep(0.01)
+        service.drain()
+        
+        assert service._recipient_buckets == {}
+    
+    def test_drainer_sends_deferred_without_new_listing(self):
+        """Test the drainer thread sends queued notifications once capacity returns"""
+        service = NotificationService()
+        service.attach(SMSNotifier())
+        service.set_rate_limit('sms', rate=50, burst=1)
+        
+        listing_data = {
+            'id': 1,
+            'vendor_id': 1,
+            'title': 'Test Food',
+            'quantity': 10,
+            'unit': 'kg',
+            'pickup_address': 'Test Address',
+            'expiry_time': (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+        }
+        users_data = [
+            {'id': i, 'email': f'user{i}@example.com', 'phone': '+1234567890', 'role': 'individual'}
+            for i in range(2, 6)
+        ]
+        
+        assert service.notify(listing_data, users_data) == 1
+        assert service.pending_count() == 3
+        
+        service.start_drainer(0.01)
+        try:
+            deadline = time.time() + 2
+            while service.pending_count() and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            service.stop_drainer()
+        
+        assert service.pending_count() == 0
+        assert service.dropped_count == 0
+    
+    def test_full_queue_drops_lowest_priority(self):
+        """Test charities keep their place when the queue overflows"""
+        service = NotificationService(queue_size=2)
+        service.attach(SMSNotifier())
+        service.set_rate_limit('sms', rate=0.001, burst=0.5)
+        
+        listing_data = {
+            'id': 1,
+            'vendor_id': 1,
+            'title': 'Test Food',
+            'quantity': 10,
+            'unit': 'kg',
+            'pickup_address': 'Test Address',
+            'expiry_time': (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+        }
+        users_data = [
+            {'id': 2, 'email': 'a@example.com', 'phone': '+1', 'role': 'individual'},
+            {'id': 3, 'email': 'b@example.com', 'phone': '+1', 'role': 'individual'},
+            {'id': 4, 'email': 'c@example.com', 'phone': '+1', 'role': 'charity'},
+        ]
+        
+        service.notify(listing_data, users_data)
+        
+        assert service.dropped_count == 1
+        assert service.is_backpressured()
+    
+    def test_expired_listing_not_notified(self):
+        """Test no notifications are sent for food that has already expired"""
+        service = NotificationService()
+        service.attach(EmailNotifier())
+        
+        listing_data = {
+            'id': 1,
+            'vendor_id': 1,
+            'title': 'Old Food',
+            'quantity': 1,
+            'unit': 'kg',
+            'pickup_address': 'Test Address',
+            'expiry_time': (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+        }
+        users_data = [{'id': 2, 'name': 'User', 'email': 'u@example.com', 'role': 'charity'}]
+        
+        assert service.notify(listing_data, users_data) == 0
+        assert service.pending_count() == 0
+
+
+class TestMonitoring:
+    """Test request metrics and profiling"""
+    
+    def test_metrics_record_endpoint_latency_and_sql(self, client, vendor_user):
+        """Test /metrics exposes per-endpoint latency and SQL counts"""
+        client.post('/api/auth/login', json={
+            'email': 'vendor@test.com',
+            'password': 'password123'
+        })
+        
+        response = client.get('/metrics')
+        body = response.get_data(as_text=True)
+        
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain')
+        assert '# TYPE freshshare_http_request_duration_seconds histogram' in body
+        assert 'blueprint="auth",endpoint="auth.login",method="POST",status="200"' in body
+        queries = metrics_registry.get('freshshare_http_request_sql_queries')
+        assert queries.count(endpoint='auth.login') >= 1
+    
+    def test_notification_fanout_recorded(self):
+        """Test notify() records how many recipients a listing fanned out to"""
+        fanout = metrics_registry.get('freshshare_notification_fanout_recipients')
+        before = fanout.count()
+        
+        service = NotificationService()
+        service.attach(EmailNotifier())
+        listing_data = {
+            'id': 1,
+            'vendor_id': 1,
+            'title': 'Test Food',
+            'quantity': 10,
+            'unit': 'kg',
+            'pickup_address': 'Test Address',
+            'expiry_time': (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+        }
+        users_data = [{'id': i, 'email': f'user{i}@example.com'} for i in range(2, 5)]
+        service.notify(listing_data, users_data)
+        
+        assert fanout.count() == before + 1
+    
+    def test_profile_header_writes_collapsed_stacks(self, tmp_path):
+        """Test the X-Profile header profiles a request when profiling is enabled"""
+        class ProfilingConfig(TestingConfig):
+            PROFILING_ENABLED = True
+            PROFILE_DIR = str(tmp_path)
+            PROFILE_SAMPLE_INTERVAL = 0.001
+        
+        app = create_app(ProfilingConfig)
+        
+        @app.route('/slow')
+        def slow():
+            time.sleep(0.05)
+            return 'ok'
+        
+        response = app.test_client().get('/slow', headers={'X-Profile': '1'})
+        
+        assert int(response.headers['X-Profile-Samples']) > 0
+        profile = (tmp_path / response.headers['X-Profile-File']).read_text()
+        assert 'slow (test_app.py' in profile
+    
+    def test_slow_query_log_disabled_installs_nothing(self, app):
+        """Test the slow-query hook is absent unless enabled"""
+        assert 'slow_query_log' not in app.extensions
+        assert app.test_client().get('/debug/slow-queries').status_code == 401
+    
+    @pytest.mark.parametrize('capture', [False, True])
+    def test_slow_queries_logged(self, tmp_path, capture):
+        """Test slow statements reach the log file and the admin endpoint, parameters redacted unless captured"""
+        class SlowQueryConfig(TestingConfig):
+            SLOW_QUERY_LOG_ENABLED = True
+            SLOW_QUERY_THRESHOLD_MS = 0
+            SLOW_QUERY_LOG_FILE = str(tmp_path / 'slow.log')
+            SLOW_QUERY_CAPTURE_PARAMETERS = capture
+        
+        app = create_app(SlowQueryConfig)
+        with app.app_context():
+            admin = User(email='admin@test.com', name='Admin', role=UserRole.ADMIN)
+            admin.set_password('password123')
+            db.session.add(admin)
+            db.session.commit()
+            token = create_access_token(identity=str(admin.id), additional_claims={'role': 'admin', 'ver': 0})
+        
+        client = app.test_client()
+        response = client.get('/debug/slow-queries', headers={'Authorization': f'Bearer {token}'})
+        data = json.loads(response.data)
+        
+        logged = json.dumps([entry['parameters'] for entry in data['queries']])
+        assert response.status_code == 200
+        assert ('admin@test.com' in logged) == capture
+        assert ('admin@test.com' in (tmp_path / 'slow.log').read_text()) == capture
+        if not capture:
+            assert '<str>' in logged
+    
+    def test_queued_json_logging_samples_high_volume_events(self):
+        """Test records are written as JSON off-thread and sampled events thinned"""
+        stream = io.StringIO()
+        handler, listener = build_handlers({
+            'LOG_FORMAT': 'json',
+            'LOG_ASYNC': True,
+            'LOG_SAMPLE_RATES': {'notification.send': 0.0},
+        }, stream)
+        test_logger = logging.getLogger('tests.structured')
+        test_logger.addHandler(handler)
+        test_logger.propagate = False
+        listener.start()
+        try:
+            test_logger.warning("Listing %s created", 7, extra={'listing_id': 7})
+            test_logger.info("Sent to %s", 'a@example.com', extra={'sample': 'notification.send'})
+        finally:
+            listener.stop()
+            test_logger.removeHandler(handler)
+        
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert len(lines) == 1
+        assert lines[0]['message'] == 'Listing 7 created'
+        assert lines[0]['listing_id'] == 7
+    
+    def test_queued_logging_merges_arguments_on_the_calling_thread(self):
+        """Test a record logs its arguments as they were when it was logged"""
+        stream = io.StringIO()
+        handler, listener = build_handlers({'LOG_FORMAT': 'json', 'LOG_ASYNC': True}, stream)
+        test_logger = logging.getLogger('tests.structured.args')
+        test_logger.addHandler(handler)
+        test_logger.propagate = False
+        state = {'status': 'available'}
+        try:
+            test_logger.warning("Listing state %s", state, extra={'listing_id': 7})
+            state['status'] = 'claimed'
+            listener.start()
+        finally:
+            listener.stop()
+            test_logger.removeHandler(handler)
+        
+        line = json.loads(stream.getvalue())
+        assert line['message'] == "Listing state {'status': 'available'}"
+        assert line['listing_id'] == 7
+
+
+class TestSyntheticData:
+    """Test the synthetic dataset generator"""
+    
+    def test_same_seed_same_rows(self):
+        """Test a seed fully determines the generated rows"""
+        now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        first = list(SyntheticDataGenerator(seed=3).listing_rows(50, [1, 2, 3], now))
+        second = list(SyntheticDataGenerator(seed=3).listing_rows(50, [1, 2, 3], now))
+        
+        assert first == second
+    
+    def test_points_cluster_into_hot_spots(self):
+        """Test clustered layouts are far denser in hot spots than on average"""
+        generator = SyntheticDataGenerator(seed=1)
+        counts = density_by_cell(generator.point() for _ in range(5000))
+        
+        assert max(counts.values()) > 5 * (5000 / len(counts))
+    
+    def test_bulk_load(self, app, synthetic_data):
+        """Test bulk loading inserts every row"""
+        assert len(synthetic_data.vendor_ids) == 20
+        assert len(synthetic_data.user_ids) == 200
+        assert FoodListing.query.count() == len(synthetic_data.listing_ids) == 1000
+        
+        listing = db.session.get(FoodListing, synthetic_data.listing_ids[0])
+        assert listing.vendor_id in synthetic_data.vendor_ids
+        assert listing.remaining_quantity == listing.quantity
 
 
 class TestModels: